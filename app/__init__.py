@@ -4,11 +4,10 @@ from flask_login import LoginManager
 from flask_migrate import Migrate
 from flask_wtf.csrf import CSRFProtect
 from datetime import datetime
-import logging
-logging.basicConfig(level=logging.DEBUG)
+from .replica import RoutingSession
 
 # Initialize extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 login_manager = LoginManager()
 csrf = CSRFProtect()
 migrate = Migrate()
@@ -20,6 +19,17 @@ def create_app(config_name='default'):
     # Load configuration
     from .config import config
     app.config.from_object(config[config_name])
+    config[config_name].init_app(app)
+
+    # Trust the forwarded client IP from our own proxies only
+    if app.config.get('PROXY_FIX_X_FOR'):
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        hops = app.config['PROXY_FIX_X_FOR']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
+
+    # Logs are queued and written by a background thread
+    from .logging_setup import configure_logging
+    configure_logging(app)
 
     # Initialize extensions with app
     db.init_app(app)
@@ -34,33 +44,64 @@ def create_app(config_name='default'):
     # Import models here instead of at the top
     from .models import User, Student, Class, Registration
 
+    # Create the schema in-process when not running against init.sql (SQLite)
+    from . import database, health, assets, compression, replica, profiler, slowlog, renewal, metrics, tracing, ratelimit
+    database.init_app(app)
+
+    # Route read-only requests to the replica bind, if one is configured
+    replica.init_app(app)
+    health.init_app(app)
+
+    # Fingerprinted, precompressed static files (built by `flask build-assets`)
+    assets.init_app(app)
+
+    # gzip/brotli for HTML and JSON responses
+    compression.init_app(app)
+
+    # Opt-in cProfile + SQL report per request (see PROFILER_* settings)
+    profiler.init_app(app)
+
+    # Statements over SLOW_QUERY_THRESHOLD_MS go to a JSON lines file (off by default)
+    slowlog.init_app(app)
+
+    # Sampled request traces as OTLP/JSON (see TRACING_* settings)
+    tracing.init_app(app)
+
+    # Renew approved registrations into next month from RENEWAL_DAY on
+    renewal.init_app(app)
+
+    # Cached business gauges on /metrics (METRICS_ENABLED)
+    metrics.init_app(app)
+
+    # Per-IP and per-username login throttling shared across workers
+    ratelimit.init_app(app)
+
     # Register blueprints
     from .routes.auth import auth as auth_blueprint
     from .routes.admin import admin as admin_blueprint
     from .routes.student import student as student_blueprint
     from .routes.classes import classes as classes_blueprint
     from .routes.health import health as health_blueprint
+    from .routes.api import api as api_blueprint
 
     app.register_blueprint(auth_blueprint)
     app.register_blueprint(admin_blueprint, url_prefix='/admin')
     app.register_blueprint(student_blueprint, url_prefix='/student')
     app.register_blueprint(classes_blueprint, url_prefix='/classes')
     app.register_blueprint(health_blueprint, url_prefix='/health')
+    app.register_blueprint(api_blueprint, url_prefix='/api/v1')
 
     # Default route
     @app.route('/')
     def index():
         return render_template('index.html', now=datetime.now())
 
-    # Health check endpoint for Docker (accessible at /health directly)
+    # Health check endpoint for Docker (accessible at /health directly).
+    # Served from the background probe so polling adds no database load.
+    from .routes.health import connectivity_response
+
     @app.route('/health')
     def health_check():
-        try:
-            # Test database connection
-            with app.app_context():
-                db.session.execute(db.text('SELECT 1'))
-            return jsonify({"status": "healthy", "database": "connected"}), 200
-        except Exception as e:
-            return jsonify({"status": "unhealthy", "error": str(e)}), 500
+        return connectivity_response()
 
     return app
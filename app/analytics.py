@@ -0,0 +1,121 @@
+"""Class occupancy for the admin analytics page.
+
+Both aggregates are single GROUP BY queries. Results are cached per
+database and year until a commit that wrote anything, and for at most
+``ANALYTICS_CACHE_SECONDS`` so other worker processes catch up too.
+"""
+import threading
+import time
+import weakref
+
+from flask import current_app
+from sqlalchemy import event, func, select
+
+from . import db
+from .models import Class, Registration, Student
+from .replica import RoutingSession
+
+SEAT_STATUSES = ('pending', 'approved')
+
+
+class _OccupancyCache:
+    def __init__(self):
+        self._entries = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    def get(self, engine, year, max_age):
+        entry = self._entries.get(engine, {}).get(year)
+        if entry is not None and time.monotonic() - entry[0] < max_age:
+            return entry[1]
+        generation, computed_at = self._generation, time.monotonic()
+        data = _compute(year)
+        with self._lock:
+            # A commit while computing may have come too late for our reads
+            if generation == self._generation:
+                self._entries.setdefault(engine, {})[year] = (computed_at, data)
+        return data
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+occupancy_cache = _OccupancyCache()
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _note_flush(session, flush_context):
+    changed = (session.new | session.dirty | session.deleted)
+    if any(isinstance(obj, (Registration, Class, Student)) for obj in changed):
+        session.info['analytics_changed'] = True
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _note_bulk_write(orm_execute_state):
+    # Bulk UPDATE/DELETE/INSERT statements bypass the flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info['analytics_changed'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _invalidate_on_commit(session):
+    # Only once committed, so a concurrent reader can't cache the old state
+    if session.info.pop('analytics_changed', False):
+        occupancy_cache.invalidate()
+
+
+def _compute(year):
+    classes = db.session.execute(
+        select(Class.id, Class.class_no, Class.day_of_week, Class.teacher, Class.capacity)
+        .order_by(Class.class_no, Class.day_of_week)).all()
+
+    counts = db.session.execute(
+        select(Registration.class_id, Registration.month, Registration.status, func.count())
+        .where(Registration.year == year)
+        .group_by(Registration.class_id, Registration.month, Registration.status)).all()
+    heatmap = {}
+    for class_id, month, status, count in counts:
+        heatmap.setdefault(class_id, {}).setdefault(month, {})[status] = count
+
+    load = db.session.execute(
+        select(Class.teacher,
+               func.count(func.distinct(Class.id)),
+               func.count(Registration.id),
+               func.count(func.distinct(Registration.student_id)))
+        .outerjoin(Registration, (Registration.class_id == Class.id)
+                   & (Registration.year == year)
+                   & Registration.status.in_(SEAT_STATUSES))
+        .group_by(Class.teacher)
+        .order_by(Class.teacher)).all()
+
+    return {
+        'year': year,
+        'classes': [{
+            'id': class_id,
+            'class_no': class_no,
+            'day_of_week': day,
+            'teacher': teacher,
+            'capacity': capacity,
+            # month -> status -> registrations
+            'months': heatmap.get(class_id, {}),
+        } for class_id, class_no, day, teacher, capacity in classes],
+        'teachers': [{
+            'teacher': teacher,
+            'classes': class_count,
+            'seats': seats,
+            'students': students,
+        } for teacher, class_count, seats, students in load],
+    }
+
+
+def occupancy(year):
+    """Registrations per class, month and status plus teacher load for ``year``."""
+    max_age = current_app.config.get('ANALYTICS_CACHE_SECONDS', 60)
+    return occupancy_cache.get(db.engine, year, max_age)
+
+
+def seats_taken(months, month):
+    """Registrations holding a seat in one heatmap cell."""
+    return sum(months.get(month, {}).get(status, 0) for status in SEAT_STATUSES)
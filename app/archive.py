@@ -0,0 +1,50 @@
+import time
+from datetime import datetime
+
+from sqlalchemy import delete, insert, literal, select
+
+from . import db
+from .models import ClassSeat, Registration, RegistrationArchive
+
+ARCHIVED_COLUMNS = ('id', 'student_id', 'class_id', 'year', 'month', 'fee',
+                    'status', 'created_at', 'updated_at')
+
+
+def archive_year(year, batch_size=1000, pause=0.0, progress=None):
+    """Move a closed year's registrations into registrations_archive.
+
+    Rows move in primary-key ordered batches, each in its own short
+    transaction, so registration traffic is never blocked for long.
+    Returns the number of rows moved.
+    """
+    moved = 0
+    while True:
+        ids = db.session.scalars(
+            select(Registration.id)
+            .where(Registration.year == year)
+            .order_by(Registration.id)
+            .limit(batch_size)).all()
+        if not ids:
+            break
+
+        source = select(*[getattr(Registration, c) for c in ARCHIVED_COLUMNS],
+                        literal(datetime.utcnow()))
+        db.session.execute(
+            insert(RegistrationArchive).from_select(
+                ARCHIVED_COLUMNS + ('archived_at',),
+                source.where(Registration.id.in_(ids))))
+        db.session.execute(
+            delete(Registration).where(Registration.id.in_(ids))
+            .execution_options(synchronize_session=False))
+        db.session.commit()
+
+        moved += len(ids)
+        if progress:
+            progress(moved)
+        if pause:
+            time.sleep(pause)
+
+    # Seat counters of a closed year are no longer needed
+    db.session.execute(delete(ClassSeat).where(ClassSeat.year == year))
+    db.session.commit()
+    return moved
@@ -0,0 +1,110 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+
+from flask import current_app, request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip variants are always written
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(__file__), 'static')
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+ASSET_EXTENSIONS = ('.css', '.js', '.svg', '.map')
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Preferred first
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def build_assets(static_dir=STATIC_DIR):
+    """Copy static assets to dist/ under content-hashed names.
+
+    Writes .gz (and .br when Brotli is installed) next to each copy plus a
+    manifest mapping the original path to the hashed one. Returns the manifest.
+    """
+    dist_dir = os.path.join(static_dir, DIST_DIR)
+    shutil.rmtree(dist_dir, ignore_errors=True)
+
+    manifest = {}
+    for root, dirs, files in os.walk(static_dir):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != dist_dir]
+        for name in sorted(files):
+            if not name.endswith(ASSET_EXTENSIONS):
+                continue
+            source = os.path.join(root, name)
+            rel_path = os.path.relpath(source, static_dir).replace(os.sep, '/')
+            with open(source, 'rb') as f:
+                content = f.read()
+
+            stem, ext = os.path.splitext(rel_path)
+            digest = hashlib.sha256(content).hexdigest()[:12]
+            hashed = f'{DIST_DIR}/{stem}.{digest}{ext}'
+            target = os.path.join(static_dir, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+
+            with open(target, 'wb') as f:
+                f.write(content)
+            with open(target + '.gz', 'wb') as f:
+                f.write(gzip.compress(content, compresslevel=9, mtime=0))
+            if brotli is not None:
+                with open(target + '.br', 'wb') as f:
+                    f.write(brotli.compress(content))
+
+            manifest[rel_path] = hashed
+
+    with open(os.path.join(dist_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def serve_static(filename):
+    """Static view: hashed assets are immutable and served precompressed."""
+    if filename not in current_app.extensions['asset_files']:
+        return current_app.send_static_file(filename)
+
+    accepted = request.accept_encodings
+    directory = current_app.static_folder
+    for encoding, suffix in ENCODINGS:
+        if accepted[encoding] and os.path.exists(os.path.join(directory, filename + suffix)):
+            response = send_from_directory(
+                directory, filename + suffix,
+                mimetype=mimetypes.guess_type(filename)[0],
+                max_age=IMMUTABLE_MAX_AGE)
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(directory, filename, max_age=IMMUTABLE_MAX_AGE)
+
+    response.headers['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def init_app(app):
+    manifest_path = os.path.join(app.static_folder, DIST_DIR, MANIFEST_NAME)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    app.extensions['asset_manifest'] = manifest
+    app.extensions['asset_files'] = frozenset(manifest.values())
+
+    # url_for('static', filename='css/style.css') -> /static/dist/css/style.<hash>.css
+    @app.url_defaults
+    def hashed_static_url(endpoint, values):
+        if endpoint == 'static' and values.get('filename') in manifest:
+            values['filename'] = manifest[values['filename']]
+
+    app.view_functions['static'] = serve_static
+
+
+if __name__ == '__main__':
+    built = build_assets()
+    print(f'Built {len(built)} assets into {os.path.join(STATIC_DIR, DIST_DIR)}')
@@ -0,0 +1,137 @@
+"""Chunked data backfills for online Alembic migrations.
+
+Use inside a migration's autocommit block so every chunk commits on its
+own and row locks are only held for one primary-key range at a time::
+
+    from alembic import op
+    from app.backfill import backfill
+
+    def upgrade():
+        op.add_column('registrations', sa.Column('year', sa.Integer()))
+        with op.get_context().autocommit_block():
+            backfill(op.get_bind(), 'registrations_add_year', 'registrations',
+                     values={'year': sa.text('YEAR(created_at)')},
+                     where=sa.text('year IS NULL'))
+
+The ``where`` clause must exclude rows that are already done, so a chunk
+that is re-run after a crash is harmless. Progress is stored in the
+``backfill_progress`` table and a rerun resumes after the last finished
+chunk; ``dry_run=True`` only estimates the work.
+"""
+import logging
+import math
+import time
+from collections import namedtuple
+from datetime import datetime
+
+import sqlalchemy as sa
+
+logger = logging.getLogger(__name__)
+
+BackfillResult = namedtuple('BackfillResult', 'rows chunks seconds dry_run')
+
+_progress_metadata = sa.MetaData()
+progress_table = sa.Table(
+    'backfill_progress', _progress_metadata,
+    sa.Column('name', sa.String(100), primary_key=True),
+    sa.Column('last_id', sa.Integer, nullable=False),
+    sa.Column('rows_done', sa.Integer, nullable=False, default=0),
+    sa.Column('finished', sa.Boolean, nullable=False, default=False),
+    sa.Column('updated_at', sa.DateTime, default=datetime.utcnow,
+              onupdate=datetime.utcnow),
+)
+
+
+def _load_progress(connection, name):
+    progress_table.create(connection, checkfirst=True)
+    return connection.execute(
+        sa.select(progress_table).where(progress_table.c.name == name)).first()
+
+
+def _save_progress(connection, name, last_id, rows_done, finished, exists):
+    values = dict(last_id=last_id, rows_done=rows_done, finished=finished,
+                  updated_at=datetime.utcnow())
+    if exists:
+        connection.execute(sa.update(progress_table)
+                           .where(progress_table.c.name == name).values(**values))
+    else:
+        connection.execute(sa.insert(progress_table).values(name=name, **values))
+
+
+def progress_rows(connection):
+    """All recorded backfills, most recently touched first."""
+    progress_table.create(connection, checkfirst=True)
+    return connection.execute(sa.select(progress_table)
+                              .order_by(progress_table.c.updated_at.desc())).all()
+
+
+def backfill(connection, name, table, values, where=None, chunk_size=1000,
+             pause=0.0, load_ratio=0.0, dry_run=False):
+    """Update ``table`` in primary-key ranges of ``chunk_size`` ids.
+
+    ``pause`` is a fixed sleep between chunks; ``load_ratio`` adds a sleep
+    proportional to how long the last chunk took (1.0 keeps the database
+    idle for as long as it was busy). Returns a ``BackfillResult``.
+
+    Nothing is committed here: pass an AUTOCOMMIT connection (which is what
+    Alembic's ``autocommit_block()`` gives you) so each chunk stands alone.
+    """
+    if isinstance(table, str):
+        table = sa.Table(table, sa.MetaData(), autoload_with=connection)
+    pk = list(table.primary_key.columns)[0]
+    condition = where if where is not None else sa.true()
+
+    low, high = connection.execute(
+        sa.select(sa.func.min(pk), sa.func.max(pk)).where(condition)).one()
+    if low is None:
+        logger.info('Backfill %s: nothing to do', name)
+        return BackfillResult(0, 0, 0.0, dry_run)
+
+    if dry_run:
+        return _estimate(connection, name, pk, condition, low, high, chunk_size, pause)
+
+    progress = _load_progress(connection, name)
+    tracked = progress is not None
+    # Only an interrupted run resumes; a finished one (e.g. after a
+    # downgrade) starts over, which the where clause makes safe
+    resume = tracked and not progress.finished
+    rows_done = progress.rows_done if resume else 0
+    start = max(low, progress.last_id + 1) if resume else low
+
+    chunks, started = 0, time.perf_counter()
+    while start <= high:
+        end = start + chunk_size
+        chunk_started = time.perf_counter()
+        result = connection.execute(
+            sa.update(table).where(pk >= start, pk < end, condition).values(**values))
+        rows_done += max(result.rowcount, 0)
+        _save_progress(connection, name, end - 1, rows_done, False, tracked)
+        tracked = True
+        chunks += 1
+
+        elapsed = time.perf_counter() - chunk_started
+        logger.info('Backfill %s: ids < %s done, %s rows so far', name, end, rows_done)
+        start = end
+        sleep = pause + elapsed * load_ratio
+        if sleep and start <= high:
+            time.sleep(sleep)
+
+    _save_progress(connection, name, high, rows_done, True, tracked)
+    return BackfillResult(rows_done, chunks, time.perf_counter() - started, False)
+
+
+def _estimate(connection, name, pk, condition, low, high, chunk_size, pause):
+    """Count the rows to change and time one read of the first chunk."""
+    rows = connection.execute(sa.select(sa.func.count()).select_from(pk.table)
+                              .where(condition)).scalar()
+    chunks = math.ceil((high - low + 1) / chunk_size)
+
+    sample_started = time.perf_counter()
+    connection.execute(sa.select(sa.func.count()).select_from(pk.table)
+                       .where(pk >= low, pk < low + chunk_size, condition)).scalar()
+    per_chunk = time.perf_counter() - sample_started + pause
+
+    estimate = BackfillResult(rows, chunks, chunks * per_chunk, True)
+    logger.info('Backfill %s (dry run): %s rows in %s chunks, roughly %.1fs',
+                name, rows, chunks, estimate.seconds)
+    return estimate
@@ -0,0 +1,229 @@
+"""Live feed of registration changes for admin pages.
+
+Every flush that adds, deletes or changes the status of a registration
+writes a ``RegistrationEvent`` in the same transaction; bulk statements
+write one event without a registration. The event id is the change
+version: a server-sent events stream sends everything after the version
+the page was rendered at. Commits in this process wake the streams right
+away, and streams also check every ``SSE_POLL_SECONDS`` for events from
+other workers with a primary-key range query.
+
+Ids are assigned at flush but become visible at commit, so a transaction
+that commits after a later one leaves a gap behind the stream's version.
+Streams re-read such gaps for ``GAP_GRACE_SECONDS``; after that the id is
+taken to belong to a rolled-back transaction.
+"""
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, event, func, insert, inspect, select
+
+from . import db
+from .models import Registration, RegistrationEvent, Setting, Student, User
+from .readmodels import registration_rows
+from .replica import RoutingSession
+
+BATCH_SIZE = 100
+RETENTION = timedelta(days=1)
+# Share of event writes that also delete events older than RETENTION
+PRUNE_PROBABILITY = 0.01
+# How long a stream waits for an id skipped over to be committed
+GAP_GRACE_SECONDS = 30
+# Reconnect delay for streams refused because a worker has too many open
+BUSY_RETRY_SECONDS = 30
+
+# Statements touching these tables can add or remove registrations wholesale
+_BULK_TABLES = {Registration.__tablename__, Student.__tablename__, User.__tablename__}
+
+
+class ChangeFeed:
+    """Wakes waiting streams when this process commits a registration change.
+
+    Also counts the open streams, so they cannot take every worker thread.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._version = 0
+        self._streams = 0
+
+    @property
+    def streams(self):
+        return self._streams
+
+    def open_stream(self, limit):
+        """Count a new stream in, unless ``limit`` streams are already open.
+
+        Returns the function that counts it out again, which may be called
+        more than once, or None when the stream is refused.
+        """
+        with self._condition:
+            if limit and self._streams >= limit:
+                return None
+            self._streams += 1
+        closed = []
+
+        def close():
+            with self._condition:
+                if not closed:
+                    closed.append(True)
+                    self._streams -= 1
+        return close
+
+    @property
+    def version(self):
+        return self._version
+
+    def notify(self):
+        with self._condition:
+            self._version += 1
+            self._condition.notify_all()
+
+    def wait(self, seen, timeout):
+        """Block until a commit after ``seen`` or ``timeout``; returns the new local version."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._version != seen, timeout)
+            return self._version
+
+
+change_feed = ChangeFeed()
+
+
+def _write_events(session, connection, rows):
+    # Straight on the connection: same transaction, no flush or ORM events
+    connection.execute(insert(RegistrationEvent.__table__),
+                       [dict(row, created_at=datetime.utcnow()) for row in rows])
+    if random.random() < PRUNE_PROBABILITY:
+        connection.execute(delete(RegistrationEvent.__table__).where(
+            RegistrationEvent.created_at < datetime.utcnow() - RETENTION))
+    session.info['registration_events'] = True
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _record_changes(session, flush_context):
+    rows = [{'registration_id': r.id, 'kind': 'new'}
+            for r in session.new if isinstance(r, Registration)]
+    rows += [{'registration_id': r.id, 'kind': 'cancelled'}
+             for r in session.deleted if isinstance(r, Registration)]
+    for r in session.dirty:
+        if isinstance(r, Registration) and inspect(r).attrs.status.history.has_changes():
+            rows.append({'registration_id': r.id, 'kind': r.status})
+    if rows:
+        _write_events(session, session.connection(), rows)
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _record_bulk_write(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table = getattr(orm_execute_state.statement, 'table', None)
+    if table is not None and table.name in _BULK_TABLES:
+        session = orm_execute_state.session
+        _write_events(session, session.connection(bind_arguments=orm_execute_state.bind_arguments),
+                      [{'registration_id': None, 'kind': 'bulk'}])
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _wake_streams(session):
+    if session.info.pop('registration_events', False):
+        change_feed.notify()
+
+
+def current_version():
+    """Id of the latest event; pages pass it to the stream as ``since``."""
+    return db.session.scalar(select(func.max(RegistrationEvent.id))) or 0
+
+
+def _registration_json(row):
+    return {
+        'id': row.id,
+        'student_id': row.student_id,
+        'student_name': row.student_name,
+        'class_no': row.class_no,
+        'day_of_week': row.day_of_week,
+        'year': row.year,
+        'month_name': row.month_name,
+        'fee': row.fee,
+        'status': row.status,
+        'created_at': row.created_at.strftime('%Y-%m-%d') if row.created_at else None,
+    }
+
+
+def events_after(version, limit=BATCH_SIZE):
+    """Events after ``version`` as dicts ready to send, oldest first."""
+    return _events(RegistrationEvent.id > version, limit)
+
+
+def events_with_ids(ids):
+    """The events among ``ids`` that exist by now, oldest first."""
+    return _events(RegistrationEvent.id.in_(ids)) if ids else []
+
+
+def _events(condition, limit=None):
+    events = db.session.execute(
+        select(RegistrationEvent.id, RegistrationEvent.registration_id, RegistrationEvent.kind)
+        .where(condition).order_by(RegistrationEvent.id).limit(limit)).all()
+    if not events:
+        return []
+
+    ids = {registration_id for _, registration_id, _ in events if registration_id is not None}
+    rows = {row.id: row for row in registration_rows(Registration.id.in_(ids))} if ids else {}
+    pending = Registration.query.filter_by(year=Setting.get_current_year(), status='pending').count()
+    return [{
+        'id': event_id,
+        'kind': kind,
+        'registration_id': registration_id,
+        'registration': _registration_json(rows[registration_id]) if registration_id in rows else None,
+        'pending': pending,
+    } for event_id, registration_id, kind in events]
+
+
+def format_event(payload, with_id=True):
+    # Late events go without an id, so Last-Event-ID never moves backwards
+    event_id = f"id: {payload['id']}\n" if with_id else ''
+    return f"{event_id}event: {payload['kind']}\ndata: {json.dumps(payload)}\n\n"
+
+
+def busy_stream(retry_seconds=BUSY_RETRY_SECONDS):
+    """A stream that only tells the browser to come back in ``retry_seconds``."""
+    yield f'retry: {int(retry_seconds * 1000)}\n\n'
+
+
+def stream(version, poll_seconds, max_seconds, clock=None):
+    """Yield server-sent events after ``version`` for up to ``max_seconds``.
+
+    The database session is released while waiting, so an idle stream
+    holds no connection. The browser reconnects with ``Last-Event-ID``
+    when the stream ends.
+    """
+    clock = clock or time.monotonic
+    deadline = clock() + max_seconds
+    local_version = change_feed.version
+    gaps = {}  # ids skipped over -> when first missed
+    yield f'retry: {int(poll_seconds * 1000)}\n\n'
+    while True:
+        now = clock()
+        gaps = {event_id: missed for event_id, missed in gaps.items() if now - missed < GAP_GRACE_SECONDS}
+        late = events_with_ids(list(gaps))
+        events = events_after(version)
+        db.session.close()
+        for payload in late:
+            del gaps[payload['id']]
+            yield format_event(payload, with_id=False)
+        for payload in events:
+            # A wide jump is pruned or old history, not transactions in flight
+            if payload['id'] - version <= BATCH_SIZE:
+                gaps.update(dict.fromkeys(range(version + 1, payload['id']), now))
+            yield format_event(payload)
+            version = payload['id']
+        if len(events) == BATCH_SIZE:
+            continue
+        if not events and not late:
+            # Also how a closed connection is noticed
+            yield ': keepalive\n\n'
+        if now >= deadline:
+            return
+        local_version = change_feed.wait(local_version, poll_seconds)
@@ -0,0 +1,93 @@
+import gzip
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available
+    brotli = None
+
+
+def _gzip_stream(chunks, level):
+    # wbits=31 writes a gzip header/trailer around the deflate stream
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        # Sync flush so each chunk reaches the client now, not when the
+        # compressor's buffer happens to fill
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _brotli_stream(chunks, level):
+    compressor = brotli.Compressor(quality=level)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def _choose_encoding(use_brotli):
+    accepted = request.accept_encodings
+    if use_brotli and brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress_response(response, config):
+    if (response.status_code < 200 or response.status_code in (204, 206, 304)
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in config['COMPRESS_MIMETYPES']):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = _choose_encoding(config['COMPRESS_BROTLI'])
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        # Compress chunk by chunk so the client still gets early bytes
+        if encoding == 'br':
+            stream = _brotli_stream(response.response, config['COMPRESS_BROTLI_LEVEL'])
+        else:
+            stream = _gzip_stream(response.response, config['COMPRESS_LEVEL'])
+        response.response = stream
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < config['COMPRESS_MIN_SIZE']:
+            return response
+        if encoding == 'br':
+            data = brotli.compress(data, quality=config['COMPRESS_BROTLI_LEVEL'])
+        else:
+            data = gzip.compress(data, compresslevel=config['COMPRESS_LEVEL'])
+        response.set_data(data)
+
+    response.headers['Content-Encoding'] = encoding
+    if response.headers.get('ETag'):
+        # The compressed body is a different representation
+        response.set_etag(f"{response.get_etag()[0]}-{encoding}", weak=True)
+        # The view compared If-None-Match with the uncompressed tag; clients
+        # send back this one, so compare again
+        if request.if_none_match:
+            response = response.make_conditional(request)
+    return response
+
+
+def init_app(app):
+    if not app.config.get('COMPRESS_ENABLED', True):
+        return
+
+    @app.after_request
+    def compress(response):
+        return compress_response(response, app.config)
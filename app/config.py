@@ -14,9 +14,105 @@ class Config:
     SQLALCHEMY_DATABASE_URI = 'mysql+pymysql://testuser:testpass@db:3306/testdb'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Optional read replica: GET requests read from it unless the user wrote
+    # something in the last REPLICA_STICKY_SECONDS
+    SQLALCHEMY_BINDS = {'replica': os.environ['REPLICA_DATABASE_URL']} \
+        if os.environ.get('REPLICA_DATABASE_URL') else {}
+    REPLICA_STICKY_SECONDS = 5
+
     # Session
     PERMANENT_SESSION_LIFETIME = timedelta(days=1)
 
+    # Background health probe (seconds / ratio of pool in use)
+    HEALTH_PROBE_ENABLED = True
+    HEALTH_PROBE_INTERVAL = int(os.environ.get('HEALTH_PROBE_INTERVAL', 10))
+    HEALTH_DB_LATENCY_MAX = 1.0
+    HEALTH_POOL_SATURATION_MAX = 0.9
+
+    # Logging: JSON lines written by a background thread. DEBUG records can be
+    # sampled per endpoint, e.g. {'health.ready': 0.0, '*': 0.1}
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_JSON = True
+    LOG_SQL = False
+    LOG_DEBUG_SAMPLE_RATES = {}
+
+    # Response compression for text bodies (brotli used when installed)
+    COMPRESS_ENABLED = True
+    COMPRESS_LEVEL = 6
+    COMPRESS_BROTLI = True
+    COMPRESS_BROTLI_LEVEL = 4
+    COMPRESS_MIN_SIZE = 1024
+    COMPRESS_MIMETYPES = ('text/html', 'text/css', 'text/plain', 'text/csv',
+                          'application/json', 'application/javascript')
+
+    # Per-request profiler. PROFILER_ENABLED profiles every request; with
+    # PROFILER_QUERY_PARAM=_profile admins can add ?_profile to a URL. Reports
+    # (JSON + .prof, SQL parameter values redacted) are written to
+    # PROFILER_DIR (default instance/profiles) and listed at /admin/profiles.
+    # With both off (the default) no hooks are installed at all.
+    PROFILER_ENABLED = os.environ.get('PROFILER_ENABLED') == '1'
+    PROFILER_QUERY_PARAM = os.environ.get('PROFILER_QUERY_PARAM')
+    PROFILER_DIR = os.environ.get('PROFILER_DIR')
+    PROFILER_KEEP = 50
+
+    # Slow-query log: statements taking at least this long are written with
+    # their endpoint and calling line (JSON lines) to SLOW_QUERY_LOG, default
+    # instance/slow_queries.log. Off unless set; rotate it with logrotate.
+    SLOW_QUERY_THRESHOLD_MS = int(os.environ['SLOW_QUERY_THRESHOLD_MS']) \
+        if os.environ.get('SLOW_QUERY_THRESHOLD_MS') else None
+    SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG')
+
+    # Occupancy analytics are dropped on every write commit in this process;
+    # other workers pick changes up after at most this many seconds
+    ANALYTICS_CACHE_SECONDS = 60
+    # Same for the student search index (SQLite; MySQL searches in SQL)
+    SEARCH_CACHE_SECONDS = 60
+
+    # Number of reverse proxies in front of the app whose X-Forwarded-For and
+    # X-Forwarded-Proto are trusted. Set it behind a proxy, or every client
+    # shares the proxy's IP (and its login rate limit bucket).
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR', 0))
+
+    # Login rate limit: token buckets of (burst, attempts per minute) per
+    # client IP and, for failed attempts, per username and IP, shared by all
+    # workers through a SQLite file (default instance/ratelimit.sqlite)
+    LOGIN_RATE_LIMIT_ENABLED = os.environ.get('LOGIN_RATE_LIMIT_ENABLED', '1') == '1'
+    LOGIN_RATE_LIMIT_STORE = os.environ.get('LOGIN_RATE_LIMIT_STORE')
+    LOGIN_RATE_LIMIT_IP = (20, 10)
+    LOGIN_RATE_LIMIT_USERNAME = (5, 2)
+
+    # Request tracing: spans for the user loader, SQL, form validation, fees
+    # and templates, written as OTLP/JSON lines to TRACING_FILE (default
+    # instance/traces.jsonl) with 'file' or to stderr with 'console'. A
+    # sampled traceparent header always traces; otherwise TRACING_SAMPLE_RATE.
+    TRACING_EXPORTER = os.environ.get('TRACING_EXPORTER')
+    TRACING_SAMPLE_RATE = float(os.environ.get('TRACING_SAMPLE_RATE', 0.1))
+    TRACING_FILE = os.environ.get('TRACING_FILE')
+    TRACING_SERVICE_NAME = 'class-registration'
+
+    # Business gauges on /metrics (prometheus_client). The aggregate
+    # query runs at most once per METRICS_CACHE_SECONDS across all workers;
+    # the shared cache file defaults to $PROMETHEUS_MULTIPROC_DIR or instance/.
+    METRICS_ENABLED = True
+    METRICS_PATH = '/metrics'
+    METRICS_CACHE_SECONDS = int(os.environ.get('METRICS_CACHE_SECONDS', 30))
+    METRICS_CACHE_FILE = os.environ.get('METRICS_CACHE_FILE')
+
+    # Admin live feed (server-sent events): streams check for other workers'
+    # changes every SSE_POLL_SECONDS and end after SSE_MAX_SECONDS, when the
+    # browser reconnects. Each open stream holds a worker thread, so a worker
+    # serves at most SSE_MAX_STREAMS; keep it below gunicorn's --threads.
+    SSE_POLL_SECONDS = 5
+    SSE_MAX_SECONDS = 300
+    SSE_MAX_STREAMS = int(os.environ.get('SSE_MAX_STREAMS', 4))
+
+    # Monthly renewal: from this day of the month on, a background thread
+    # copies the month's approved registrations into the next month (same as
+    # `flask renew-registrations`). None leaves it to cron or the CLI.
+    RENEWAL_DAY = int(os.environ['RENEWAL_DAY']) if os.environ.get('RENEWAL_DAY') else None
+    RENEWAL_STATUS = os.environ.get('RENEWAL_STATUS', 'approved')
+    RENEWAL_CHECK_INTERVAL = 3600
+
     @staticmethod
     def init_app(app):
         pass
@@ -24,36 +120,59 @@ class Config:
 
 class DevelopmentConfig(Config):
     DEBUG = True
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'DEBUG')
+    LOG_JSON = False
 
 
 class TestingConfig(Config):
     TESTING = True
     WTF_CSRF_ENABLED = False
 
-    # Use environment variable if in Docker, otherwise use localhost
-    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or \
-        'mysql+pymysql://testuser:testpass@db:3306/testdb'
+    # Probe inline on demand instead of from a thread
+    HEALTH_PROBE_ENABLED = False
+    SLOW_QUERY_THRESHOLD_MS = None
+    RENEWAL_DAY = None
+    TRACING_EXPORTER = None
+    LOGIN_RATE_LIMIT_ENABLED = False
 
-    # Print SQL queries for debugging
-    SQLALCHEMY_ECHO = True
+    # Use environment variable if in Docker/CI, otherwise an in-process SQLite database
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or 'sqlite://'
 
+    # SQLite has no init.sql, so build the schema from the models
+    CREATE_SCHEMA_ON_STARTUP = SQLALCHEMY_DATABASE_URI.startswith('sqlite')
 
-class ProductionConfig(Config):
-    @classmethod
-    def init_app(cls, app):
-        Config.init_app(app)
+    # Log SQL queries for debugging (through the logging queue, not echo)
+    LOG_SQL = True
+
+
+class SQLiteConfig(DevelopmentConfig):
+    # File (sqlite:///app.db, relative to instance/) or in-memory (sqlite://).
+    # Flask-SQLAlchemy pins in-memory databases to a StaticPool so every
+    # thread sees the same connection.
+    SQLALCHEMY_DATABASE_URI = os.environ.get('SQLITE_DATABASE_URL') or 'sqlite://'
 
-        # Log to stderr
-        import logging
-        from logging import StreamHandler
-        file_handler = StreamHandler()
-        file_handler.setLevel(logging.INFO)
-        app.logger.addHandler(file_handler)
+    CREATE_SCHEMA_ON_STARTUP = True
+    SEED_SAMPLE_DATA = True
+
+
+class SQLiteTestingConfig(TestingConfig):
+    # Always in-process, whatever TEST_DATABASE_URL points at
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    LOG_SQL = False
+    CREATE_SCHEMA_ON_STARTUP = True
+    SEED_SAMPLE_DATA = True
+
+
+class ProductionConfig(Config):
+    # Logs go to stderr through the background writer set up in create_app
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
 
 
 config = {
     'development': DevelopmentConfig,
     'testing': TestingConfig,
     'production': ProductionConfig,
+    'sqlite': SQLiteConfig,
+    'sqlite-testing': SQLiteTestingConfig,
     'default': DevelopmentConfig
 }
@@ -0,0 +1,90 @@
+import sqlite3
+from datetime import datetime, time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from . import db
+from .health import MIGRATIONS_DIR
+
+# Password hash for the default admin account (password: admin123), same as init.sql
+DEFAULT_ADMIN_PASSWORD_HASH = (
+    'pbkdf2:sha256:260000$JuTOg6ds6yhgryUg$'
+    '10449b20eaf7bb02959311d54ad839cca2049412783716afd7a88e2d86941cde')
+
+SAMPLE_CLASSES = [
+    (101, 'monday', time(9, 0), time(10, 30), 'John Smith'),
+    (102, 'monday', time(11, 0), time(12, 30), 'Sarah Johnson'),
+    (201, 'wednesday', time(14, 0), time(15, 30), 'Michael Brown'),
+    (301, 'friday', time(16, 0), time(17, 30), 'Jennifer Davis'),
+]
+
+
+@event.listens_for(Engine, 'connect')
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    # SQLite ignores foreign keys (and so ON DELETE CASCADE) unless asked per connection
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
+
+
+def is_sqlite(engine=None):
+    """Return True when the (default) engine is backed by SQLite."""
+    engine = engine or db.engine
+    return engine.dialect.name == 'sqlite'
+
+
+def create_schema(sample_data=False):
+    """Create all tables from the models and seed the default rows.
+
+    This is the portable equivalent of init.sql: MySQL-only bits such as
+    ``YEAR(CURDATE())`` and ``ON UPDATE CURRENT_TIMESTAMP`` are handled by
+    the model defaults instead.
+    """
+    from .models import User, Class, Setting
+
+    db.create_all(bind_key=None)
+
+    # A local SQLite "replica" needs the same tables; real replicas get them
+    # through replication
+    replica = db.engines.get('replica')
+    if replica is not None and is_sqlite(replica):
+        db.Model.metadata.create_all(replica)
+
+    if Setting.query.first() is None:
+        db.session.add(Setting(year=datetime.utcnow().year, fee_per_session=50.00))
+
+    if sample_data:
+        if User.query.filter_by(username='admin').first() is None:
+            db.session.add(User(username='admin', email='admin@example.com',
+                                password_hash=DEFAULT_ADMIN_PASSWORD_HASH, role='admin'))
+        if Class.query.first() is None:
+            for class_no, day, start, end, teacher in SAMPLE_CLASSES:
+                db.session.add(Class(class_no=class_no, day_of_week=day,
+                                     start_time=start, end_time=end, teacher=teacher))
+
+    db.session.commit()
+    stamp_head()
+
+
+def stamp_head():
+    """Record the tables just created as being at the latest migration.
+
+    They already match the models, so ``flask db upgrade`` has nothing to
+    do and the readiness probe sees the database at head.
+    """
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    script = ScriptDirectory(MIGRATIONS_DIR)
+    with db.engine.begin() as connection:
+        context = MigrationContext.configure(connection)
+        if context.get_current_revision() is None:
+            context.stamp(script, 'head')
+
+
+def init_app(app):
+    if app.config.get('CREATE_SCHEMA_ON_STARTUP'):
+        with app.app_context():
+            create_schema(sample_data=app.config.get('SEED_SAMPLE_DATA', False))
@@ -0,0 +1,97 @@
+import calendar
+
+from sqlalchemy import and_, case, or_, select, update
+
+from . import db
+from .models import Class, Registration, Setting
+from .tracing import traced
+
+DAY_INDEX = {
+    'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3,
+    'friday': 4, 'saturday': 5, 'sunday': 6
+}
+
+# Registrations whose fee is not final yet
+UNSETTLED_STATUSES = ('pending', 'waitlisted')
+
+
+def count_sessions(year, month, day_of_week):
+    """Count the occurrences of a weekday in a month."""
+    month_calendar = calendar.monthcalendar(year, month)
+    day_index = DAY_INDEX[day_of_week]
+    return sum(1 for week in month_calendar if week[day_index] != 0)
+
+
+@traced('fees.calculate_fee')
+def calculate_fee(class_obj, month, year=None, fee_per_session=None):
+    """Fee for attending every session of a class in the given month."""
+    if year is None:
+        year = Setting.get_current_year()
+    if fee_per_session is None:
+        fee_per_session = Setting.get_current_fee()
+    return count_sessions(year, month, class_obj.day_of_week) * fee_per_session
+
+
+@traced('fees.calculate_fees')
+def calculate_fees(items, year=None, fee_per_session=None):
+    """Fees for many ``(class_obj, month)`` pairs with a single settings lookup.
+
+    Returns a dict keyed by ``(class_id, month)``.
+    """
+    if year is None:
+        year = Setting.get_current_year()
+    if fee_per_session is None:
+        fee_per_session = Setting.get_current_fee()
+    return {(class_obj.id, month): count_sessions(year, month, class_obj.day_of_week) * fee_per_session
+            for class_obj, month in items}
+
+
+def session_count_expr(year, month_col, day_col):
+    """SQL expression for the number of sessions of ``day_col`` in ``month_col``.
+
+    Every weekday occurs four or five times a month, so the lookup only
+    needs to list the (month, weekday) pairs that occur five times.
+    """
+    fifth_days = []
+    for month in range(1, 13):
+        days = [day for day in DAY_INDEX if count_sessions(year, month, day) == 5]
+        fifth_days.append(and_(month_col == month, day_col.in_(days)))
+    return case((or_(*fifth_days), 5), else_=4)
+
+
+def month_sessions_expr(year, month, day_col):
+    """SQL expression for the number of sessions of ``day_col`` in one fixed month."""
+    return case({day: count_sessions(year, month, day) for day in DAY_INDEX},
+                value=day_col, else_=4)
+
+
+def reprice_unsettled(fee_per_session=None, year=None):
+    """Recompute the fee of every pending or waitlisted registration from ``year`` on.
+
+    ``year`` defaults to the current term, so renewals already made into
+    the next year are repriced too. Runs one UPDATE per year, as session
+    counts depend on it. Returns the number of registrations whose fee
+    changed.
+    """
+    if year is None:
+        year = Setting.get_current_year()
+    if fee_per_session is None:
+        fee_per_session = Setting.get_current_fee()
+
+    years = db.session.scalars(
+        select(Registration.year).distinct()
+        .where(Registration.year >= year, Registration.status.in_(UNSETTLED_STATUSES))).all()
+    changed = 0
+    for term in years:
+        new_fee = session_count_expr(
+            term, Registration.month, Class.day_of_week) * fee_per_session
+        result = db.session.execute(
+            update(Registration)
+            .where(Registration.class_id == Class.id,
+                   Registration.year == term,
+                   Registration.status.in_(UNSETTLED_STATUSES),
+                   Registration.fee != new_fee)
+            .values(fee=new_fee)
+            .execution_options(synchronize_session=False))
+        changed += result.rowcount
+    return changed
@@ -1,12 +1,23 @@
 from flask_wtf import FlaskForm
-from wtforms import StringField, PasswordField, SubmitField, BooleanField, IntegerField, SelectField, TimeField, FloatField
-from wtforms.validators import DataRequired, Email, Length, EqualTo, ValidationError, NumberRange
+from flask_wtf.file import FileAllowed, FileField, FileRequired
+from wtforms import StringField, PasswordField, SubmitField, BooleanField, IntegerField, SelectField, SelectMultipleField, TimeField, FloatField
+from wtforms.widgets import CheckboxInput, ListWidget
+from wtforms.validators import DataRequired, Email, Length, EqualTo, ValidationError, NumberRange, Optional
 from datetime import datetime
 
-from .models import User, Student, Class
+from .models import MONTH_NAMES, User, Student, Class
+from .tracing import span
 
 
-class LoginForm(FlaskForm):
+class TracedForm(FlaskForm):
+    """FlaskForm whose submit validation shows up as a span in request traces."""
+
+    def validate_on_submit(self, extra_validators=None):
+        with span(f'{type(self).__name__}.validate'):
+            return super().validate_on_submit(extra_validators=extra_validators)
+
+
+class LoginForm(TracedForm):
     username = StringField('Username', validators=[
                            DataRequired(), Length(1, 50)])
     password = PasswordField('Password', validators=[DataRequired()])
@@ -14,7 +25,7 @@ class LoginForm(FlaskForm):
     submit = SubmitField('Log In')
 
 
-class RegistrationForm(FlaskForm):
+class RegistrationForm(TracedForm):
     username = StringField('Username', validators=[
                            DataRequired(), Length(1, 50)])
     email = StringField('Email', validators=[
@@ -37,7 +48,7 @@ class RegistrationForm(FlaskForm):
             raise ValidationError('Email already registered.')
 
 
-class StudentProfileForm(FlaskForm):
+class StudentProfileForm(TracedForm):
     name = StringField('Full Name', validators=[
                        DataRequired(), Length(1, 100)])
     age = IntegerField('Age', validators=[
@@ -53,7 +64,7 @@ class StudentProfileForm(FlaskForm):
                 'Contact number must be 10 digits and start with 0.')
 
 
-class ClassForm(FlaskForm):
+class ClassForm(TracedForm):
     class_no = IntegerField('Class Number', validators=[
                             DataRequired(), NumberRange(min=1)])
     day_of_week = SelectField('Day of Week', choices=[
@@ -71,6 +82,8 @@ class ClassForm(FlaskForm):
                          DataRequired()], format='%H:%M')
     teacher = StringField('Teacher Name', validators=[
                           DataRequired(), Length(1, 100)])
+    capacity = IntegerField('Seats Per Month', validators=[
+                            Optional(), NumberRange(min=1)])
     submit = SubmitField('Save Class')
 
     def validate_end_time(self, field):
@@ -106,7 +119,7 @@ class ClassForm(FlaskForm):
         return True
 
 
-class RegistrationRequestForm(FlaskForm):
+class RegistrationRequestForm(TracedForm):
     class_id = SelectField('Class', coerce=int, validators=[DataRequired()])
     month = SelectField('Month', choices=[
         (1, 'January'), (2, 'February'), (3, 'March'), (4, 'April'),
@@ -129,7 +142,29 @@ class RegistrationRequestForm(FlaskForm):
         return True
 
 
-class SettingsForm(FlaskForm):
+class MultiCheckboxField(SelectMultipleField):
+    widget = ListWidget(prefix_label=False)
+    option_widget = CheckboxInput()
+
+
+class BatchRegistrationForm(TracedForm):
+    class_ids = MultiCheckboxField('Classes', coerce=int, validators=[
+                                   DataRequired(message='Select at least one class.')])
+    months = MultiCheckboxField('Months', choices=list(MONTH_NAMES.items()), coerce=int, validators=[
+                                DataRequired(message='Select at least one month.')])
+    submit = SubmitField('Request Registrations')
+
+
+class RegistrationImportForm(TracedForm):
+    csv_file = FileField('CSV File', validators=[
+                         FileRequired(), FileAllowed(['csv'], 'Please upload a .csv file.')])
+    status = SelectField('Import As', choices=[
+        ('pending', 'Pending'), ('approved', 'Approved')], default='pending')
+    submit = SubmitField('Import')
+
+
+class SettingsForm(TracedForm):
     fee_per_session = FloatField('Fee Per Session', validators=[
                                  DataRequired(), NumberRange(min=0)])
+    reprice_pending = BooleanField('Reprice pending registrations')
     submit = SubmitField('Update Settings')
@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+import logging
+
+from . import db
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'migrations')
+
+
+class HealthProbe:
+    """Checks the database in the background and caches the readiness result.
+
+    Health endpoints only read the cached result, so load balancer and Docker
+    polling never touch the database themselves.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.interval = app.config.get('HEALTH_PROBE_INTERVAL', 10)
+        self.max_latency = app.config.get('HEALTH_DB_LATENCY_MAX', 1.0)
+        self.max_saturation = app.config.get('HEALTH_POOL_SATURATION_MAX', 0.9)
+        # QueuePool's default; the pool itself does not expose its limit
+        self.max_overflow = app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}).get('max_overflow', 10)
+        self._result = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread = None
+        self._head = self._migration_head()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name='health-probe', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self.refresh()
+            time.sleep(self.interval)
+
+    def result(self):
+        """Return the latest probe result, refreshing inline if no thread is running."""
+        running = self._thread is not None and self._thread.is_alive()
+        age = time.monotonic() - self._checked_at
+        if self._result is None or (not running and age >= self.interval):
+            self.refresh()
+        elif age > self.interval * 3:
+            # The background thread has stopped reporting
+            return dict(self._result, ready=False, error='health probe is stale')
+        return self._result
+
+    def refresh(self):
+        with self._lock:
+            with self.app.app_context():
+                self._result = self._check()
+            self._checked_at = time.monotonic()
+        return self._result
+
+    def _check(self):
+        result = {'ready': True, 'database': 'connected'}
+        try:
+            start = time.perf_counter()
+            with db.engine.connect() as conn:
+                conn.execute(db.text('SELECT 1'))
+                current = self._current_revision(conn)
+            latency = time.perf_counter() - start
+        except Exception as e:
+            logger.warning('Health probe failed: %s', e)
+            return {'ready': False, 'database': 'disconnected', 'error': str(e)}
+
+        result['db_latency_ms'] = round(latency * 1000, 2)
+        if latency > self.max_latency:
+            result['ready'] = False
+            result['error'] = 'database latency above threshold'
+
+        pool = self._pool_stats()
+        result['pool'] = pool
+        if pool.get('saturation', 0) >= self.max_saturation:
+            result['ready'] = False
+            result['error'] = 'connection pool saturated'
+
+        result['migration'] = {'current': current, 'head': self._head}
+        if self._head is not None and current != self._head:
+            result['ready'] = False
+            result['error'] = 'database is not at the migration head'
+
+        return result
+
+    def _pool_stats(self):
+        pool = db.engine.pool
+        if not hasattr(pool, 'size'):
+            return {'checked_out': pool.checkedout() if hasattr(pool, 'checkedout') else 0}
+
+        capacity = pool.size() + max(self.max_overflow, 0)
+        checked_out = pool.checkedout()
+        return {
+            'checked_out': checked_out,
+            'overflow': max(pool.overflow(), 0),
+            'capacity': capacity,
+            'saturation': round(checked_out / capacity, 2) if capacity else 0,
+        }
+
+    @staticmethod
+    def _migration_head():
+        try:
+            from alembic.script import ScriptDirectory
+            return ScriptDirectory(MIGRATIONS_DIR).get_current_head()
+        except Exception:
+            # No migration scripts yet (or more than one head)
+            return None
+
+    def _current_revision(self, conn):
+        if self._head is None:
+            return None
+        from alembic.runtime.migration import MigrationContext
+        return MigrationContext.configure(conn).get_current_revision()
+
+
+def init_app(app):
+    probe = HealthProbe(app)
+    app.extensions['health_probe'] = probe
+    if app.config.get('HEALTH_PROBE_ENABLED', True):
+        # Started by the first request, so CLI commands never run the thread
+        app.before_request(probe.start)
+    return probe
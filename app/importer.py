@@ -0,0 +1,156 @@
+"""Bulk registration import from the office's term spreadsheets.
+
+The CSV needs ``username``, ``class_no``, ``day_of_week`` and ``month``
+columns (month as a number or name); ``year`` and ``status`` are optional
+per row. Students and classes are resolved from in-memory maps built with
+one query each, fees come from a per (year, month, weekday) memo, and rows
+are inserted in chunks with INSERT IGNORE semantics so a re-run or a
+concurrent registration only shows up as a reported duplicate.
+"""
+import csv
+from dataclasses import dataclass, field
+
+from sqlalchemy import insert, select, tuple_
+
+from . import db
+from .fees import count_sessions
+from .models import MONTH_NAMES, Class, ClassSeat, Registration, Setting, Student, User
+
+REQUIRED_COLUMNS = ('username', 'class_no', 'day_of_week', 'month')
+# What bytes that are not UTF-8 decode to with errors='replace'
+_UNDECODABLE = '\ufffd'
+IMPORT_STATUSES = ('pending', 'approved')
+_MONTHS_BY_NAME = {name.lower(): number for number, name in MONTH_NAMES.items()}
+
+
+@dataclass
+class ImportReport:
+    inserted: int = 0
+    duplicates: list = field(default_factory=list)
+    errors: list = field(default_factory=list)
+
+    @property
+    def problems(self):
+        """(line, message) pairs for everything that was not inserted."""
+        return sorted(self.errors + [(line, 'already registered') for line in self.duplicates])
+
+
+def _parse_month(value):
+    value = value.strip()
+    if value.isdigit() and 1 <= int(value) <= 12:
+        return int(value)
+    return _MONTHS_BY_NAME.get(value.lower())
+
+
+def _insert_ignore():
+    return (insert(Registration.__table__)
+            .prefix_with('IGNORE', dialect='mysql')
+            .prefix_with('OR IGNORE', dialect='sqlite'))
+
+
+def _write_chunk(chunk, report):
+    """Insert one chunk, reporting rows that already exist as duplicates."""
+    keys = [(r['student_id'], r['class_id'], r['year'], r['month']) for r, _ in chunk]
+    existing = set(db.session.execute(
+        select(Registration.student_id, Registration.class_id, Registration.year, Registration.month)
+        .where(tuple_(Registration.student_id, Registration.class_id,
+                      Registration.year, Registration.month).in_(keys))).all())
+
+    rows = []
+    for (row, line), key in zip(chunk, keys):
+        if key in existing:
+            report.duplicates.append(line)
+        else:
+            rows.append(row)
+    if rows:
+        result = db.session.execute(_insert_ignore(), rows)
+        # Rows a concurrent writer added since the check are ignored, not failed
+        report.inserted += result.rowcount if result.rowcount >= 0 else len(rows)
+    db.session.commit()
+
+
+def _recount_seats(terms):
+    """Bring seat counters of capacity-limited classes in line with the import."""
+    limited = {c.id: c for c in Class.query.filter(
+        Class.id.in_({class_id for class_id, _, _ in terms}), Class.capacity.isnot(None))}
+    for class_id, year, month in sorted(terms):
+        if class_id in limited:
+            ClassSeat.recount(limited[class_id], year, month)
+    db.session.commit()
+
+
+def import_registrations(lines, year=None, status='pending', chunk_size=1000):
+    """Import registrations from CSV ``lines`` (a file or any iterable of str).
+
+    Files should be decoded with ``errors='replace'``: rows with bytes that
+    are not UTF-8 are then reported instead of failing the import. Returns
+    an ``ImportReport``. Imported registrations are office
+    decisions, so capacity is not enforced; seat counters are recounted
+    afterwards instead.
+    """
+    report = ImportReport()
+    reader = csv.DictReader(lines)
+    reader.fieldnames = [name.strip().lower() for name in reader.fieldnames or []]
+    missing = [c for c in REQUIRED_COLUMNS if c not in reader.fieldnames]
+    if missing:
+        report.errors.append((1, f"missing column(s): {', '.join(missing)}"))
+        return report
+
+    default_year = year or Setting.get_current_year()
+    fee_per_session = Setting.get_current_fee()
+    students = dict(db.session.execute(
+        select(User.username, Student.id).join(Student, Student.user_id == User.id)).all())
+    classes = {(class_no, day): class_id for class_id, class_no, day in db.session.execute(
+        select(Class.id, Class.class_no, Class.day_of_week)).all()}
+    fees = {}
+
+    chunk, seen, terms = [], set(), set()
+    for line, record in enumerate(reader, start=2):
+        if any(_UNDECODABLE in (value or '') for value in record.values() if isinstance(value, str)):
+            report.errors.append((line, 'not UTF-8; save the file as "CSV UTF-8"'))
+            continue
+        student_id = students.get((record.get('username') or '').strip())
+        try:
+            class_key = (int(record['class_no']), (record['day_of_week'] or '').strip().lower())
+            row_year = int(record.get('year') or default_year)
+        except (TypeError, ValueError):
+            report.errors.append((line, 'invalid class number or year'))
+            continue
+        month = _parse_month(record.get('month') or '')
+        row_status = (record.get('status') or status).strip().lower()
+
+        if student_id is None:
+            report.errors.append((line, f"unknown student {record.get('username')!r}"))
+            continue
+        if class_key not in classes:
+            report.errors.append((line, f'unknown class {class_key[0]} on {class_key[1]}'))
+            continue
+        if month is None:
+            report.errors.append((line, f"invalid month {record.get('month')!r}"))
+            continue
+        if row_status not in IMPORT_STATUSES:
+            report.errors.append((line, f'invalid status {row_status!r}'))
+            continue
+
+        class_id, day = classes[class_key], class_key[1]
+        key = (student_id, class_id, row_year, month)
+        if key in seen:
+            report.duplicates.append(line)
+            continue
+        seen.add(key)
+
+        fee_key = (row_year, month, day)
+        if fee_key not in fees:
+            fees[fee_key] = count_sessions(row_year, month, day) * fee_per_session
+        chunk.append(({'student_id': student_id, 'class_id': class_id, 'year': row_year,
+                       'month': month, 'fee': fees[fee_key], 'status': row_status}, line))
+        terms.add((class_id, row_year, month))
+
+        if len(chunk) >= chunk_size:
+            _write_chunk(chunk, report)
+            chunk = []
+
+    if chunk:
+        _write_chunk(chunk, report)
+    _recount_seats(terms)
+    return report
@@ -0,0 +1,132 @@
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import g, has_request_context, request
+from sqlalchemy import inspect
+
+_listener = None
+
+
+class RequestContextFilter(logging.Filter):
+    """Attach request id, user id and endpoint to every record logged in a request."""
+
+    def filter(self, record):
+        if has_request_context():
+            record.request_id = getattr(g, 'request_id', None)
+            record.endpoint = request.endpoint
+            record.user_id = _current_user_id()
+        else:
+            record.request_id = record.endpoint = record.user_id = None
+        return True
+
+
+class EndpointSamplingFilter(logging.Filter):
+    """Keep only a fraction of DEBUG records for noisy endpoints.
+
+    ``rates`` maps an endpoint name (or ``'*'``) to the share of DEBUG
+    records to keep; INFO and above always pass.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or not self.rates:
+            return True
+        endpoint = getattr(record, 'endpoint', None)
+        rate = self.rates.get(endpoint, self.rates.get('*', 1.0))
+        return rate >= 1.0 or random.random() < rate
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+            'user_id': getattr(record, 'user_id', None),
+            'endpoint': getattr(record, 'endpoint', None),
+        }
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def _current_user_id():
+    # Only read a user Flask-Login has already loaded; loading one here would
+    # run a query (and log it) from inside the logging call
+    user = g.get('_login_user')
+    if user is None or not user.is_authenticated:
+        return None
+    # After a commit the user is expired and reading user.id would refresh it
+    state = inspect(user, raiseerr=False)
+    if state is not None and state.identity:
+        return str(state.identity[0])
+    return user.get_id()
+
+
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(_stop_listener)
+
+
+def configure_logging(app):
+    """Route all logging through a queue to a background writer thread."""
+    global _listener
+
+    level = app.config.get('LOG_LEVEL', 'INFO')
+    stream_handler = logging.StreamHandler(sys.stderr)
+    if app.config.get('LOG_JSON', True):
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter(
+            '%(asctime)s %(levelname)s [%(name)s] [%(request_id)s] %(message)s'))
+
+    # Unbounded queue: request threads only enqueue, never wait on the writer
+    queue_handler = QueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(RequestContextFilter())
+    queue_handler.addFilter(EndpointSamplingFilter(app.config.get('LOG_DEBUG_SAMPLE_RATES', {})))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, QueueHandler):
+            root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    # SQL statements go through the same queue instead of SQLALCHEMY_ECHO's
+    # synchronous stdout handler
+    if app.config.get('LOG_SQL'):
+        logging.getLogger('sqlalchemy.engine').setLevel(logging.INFO)
+
+    _stop_listener()
+    _listener = QueueListener(queue_handler.queue, stream_handler)
+    _listener.start()
+
+    # Flask's own handler writes synchronously; let records reach the root queue
+    from flask.logging import default_handler
+    app.logger.removeHandler(default_handler)
+
+    @app.before_request
+    def assign_request_id():
+        g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+
+    @app.after_request
+    def add_request_id_header(response):
+        response.headers['X-Request-ID'] = g.get('request_id', '')
+        return response
@@ -0,0 +1,157 @@
+"""Business gauges for Prometheus.
+
+Pending queue depth, registrations per status, students and classes come
+from one aggregate query. The result is cached in a small JSON file for
+``METRICS_CACHE_SECONDS`` and shared by every gunicorn worker, so however
+many workers Prometheus scrapes the database sees at most one query per
+TTL. With ``PROMETHEUS_MULTIPROC_DIR`` set, ``/metrics`` also merges the
+per-worker counters (e.g. ``app_slow_queries_total``).
+"""
+import json
+import logging
+import os
+import time
+
+from flask import current_app
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+from sqlalchemy import case, func, select
+
+from . import db
+from .models import Class, Registration, Student
+
+
+try:
+    import fcntl
+except ImportError:  # Not on Windows; every worker then refreshes on its own
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+REGISTRATION_STATUSES = ('pending', 'approved', 'waitlisted', 'rejected')
+
+
+def business_snapshot():
+    """Counts for the business gauges: one pass over registrations, one SELECT."""
+    row = db.session.execute(
+        select(select(func.count()).select_from(Student).scalar_subquery(),
+               select(func.count()).select_from(Class).scalar_subquery(),
+               *[func.coalesce(func.sum(case((Registration.status == status, 1), else_=0)), 0)
+                 for status in REGISTRATION_STATUSES])
+        .select_from(Registration)).one()
+    return {
+        'students': row[0],
+        'classes': row[1],
+        'registrations': dict(zip(REGISTRATION_STATUSES, row[2:])),
+    }
+
+
+class SnapshotCache:
+    """``business_snapshot`` cached in ``path`` for ``max_age`` seconds.
+
+    The refresh runs under an exclusive lock on ``path + '.lock'``; workers
+    that find the lock taken serve the previous snapshot instead of
+    queuing up behind it.
+    """
+
+    def __init__(self, path, max_age):
+        self.path = path
+        self.max_age = max_age
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, snapshot):
+        tmp = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp, self.path)
+
+    def get(self):
+        cached = self._read()
+        if cached is not None and time.time() - cached['computed_at'] < self.max_age:
+            return cached
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(f'{self.path}.lock', 'w') as lock:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | (fcntl.LOCK_NB if cached else 0))
+                except BlockingIOError:
+                    return cached
+            # Another worker may have refreshed while we waited for the lock
+            fresh = self._read()
+            if fresh is not None and time.time() - fresh['computed_at'] < self.max_age:
+                return fresh
+            snapshot = dict(business_snapshot(), computed_at=time.time())
+            self._write(snapshot)
+            return snapshot
+
+
+class BusinessCollector:
+    """Prometheus collector yielding the cached business gauges."""
+
+    def __init__(self, app, cache):
+        self.app = app
+        self.cache = cache
+
+    def describe(self):
+        # Lets registries check names without running the query
+        return self._families({'students': 0, 'classes': 0, 'registrations': {}})
+
+    def collect(self):
+        try:
+            with self.app.app_context():
+                snapshot = self.cache.get()
+                db.session.remove()
+        except Exception:
+            logger.exception('Could not compute business metrics')
+            return []
+        return self._families(snapshot)
+
+    def _families(self, snapshot):
+        statuses = snapshot['registrations']
+        pending = GaugeMetricFamily('app_pending_registrations',
+                                    'Registrations waiting for admin approval')
+        pending.add_metric([], statuses.get('pending', 0))
+        registrations = GaugeMetricFamily('app_registrations', 'Registrations by status',
+                                          labels=['status'])
+        for status, count in statuses.items():
+            registrations.add_metric([status], count)
+        return [
+            pending,
+            registrations,
+            GaugeMetricFamily('app_students', 'Registered students', value=snapshot['students']),
+            GaugeMetricFamily('app_classes', 'Classes on offer', value=snapshot['classes']),
+        ]
+
+
+def metrics_view():
+    collector = current_app.extensions['business_metrics']
+    registry = CollectorRegistry()
+    registry.register(collector)
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        MultiProcessCollector(registry)
+        output = generate_latest(registry)
+    else:
+        output = generate_latest(REGISTRY) + generate_latest(registry)
+    return current_app.response_class(output, content_type=CONTENT_TYPE_LATEST)
+
+
+def make_collector(app):
+    path = app.config.get('METRICS_CACHE_FILE') or os.path.join(
+        os.environ.get('PROMETHEUS_MULTIPROC_DIR') or app.instance_path, 'business_metrics.json')
+    return BusinessCollector(app, SnapshotCache(path, app.config.get('METRICS_CACHE_SECONDS', 30)))
+
+
+def init_app(app):
+    if not app.config.get('METRICS_ENABLED'):
+        return None
+    collector = make_collector(app)
+    app.extensions['business_metrics'] = collector
+    app.add_url_rule(app.config.get('METRICS_PATH', '/metrics'), 'metrics', metrics_view)
+    return collector
@@ -2,6 +2,20 @@ from . import db, login_manager
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
 from datetime import datetime
+from sqlalchemy import DDL, event, select, update
+from sqlalchemy.exc import IntegrityError
+
+from .tracing import traced
+
+MONTH_NAMES = {
+    1: 'January', 2: 'February', 3: 'March', 4: 'April',
+    5: 'May', 6: 'June', 7: 'July', 8: 'August',
+    9: 'September', 10: 'October', 11: 'November', 12: 'December'
+}
+
+
+def format_time_range(start_time, end_time):
+    return f"{start_time.strftime('%I:%M %p')} - {end_time.strftime('%I:%M %p')}"
 
 
 class User(UserMixin, db.Model):
@@ -18,7 +32,8 @@ class User(UserMixin, db.Model):
 
     # Relationships
     student = db.relationship(
-        'Student', uselist=False, back_populates='user', cascade='all, delete-orphan')
+        'Student', uselist=False, back_populates='user', cascade='all, delete-orphan',
+        passive_deletes=True)
 
     @property
     def password(self):
@@ -42,6 +57,7 @@ class User(UserMixin, db.Model):
 
 
 @login_manager.user_loader
+@traced('auth.load_user')
 def load_user(user_id):
     return User.query.get(int(user_id))
 
@@ -50,18 +66,21 @@ class Student(db.Model):
     __tablename__ = 'students'
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    name = db.Column(db.String(100), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey(
+        'users.id', ondelete='CASCADE'), nullable=False)
+    name = db.Column(db.String(100), nullable=False, index=True)
     age = db.Column(db.Integer, nullable=False)
-    contact = db.Column(db.String(20), nullable=False)
+    contact = db.Column(db.String(20), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     user = db.relationship('User', back_populates='student')
+    # Unloaded registrations are removed by ON DELETE CASCADE, not one by one
     registrations = db.relationship(
-        'Registration', back_populates='student', cascade='all, delete-orphan')
+        'Registration', back_populates='student', cascade='all, delete-orphan',
+        passive_deletes=True)
 
     def __repr__(self):
         return f'<Student {self.name}>'
@@ -71,6 +90,13 @@ class Student(db.Model):
         return [reg.class_obj for reg in self.registrations if reg.status == 'approved']
 
 
+# Word search on names for the admin console (MySQL only; other databases
+# use the in-process trie in app/search.py)
+event.listen(Student.__table__, 'after_create', DDL(
+    'CREATE FULLTEXT INDEX ft_students_name ON students (name)'
+).execute_if(dialect='mysql'))
+
+
 class Class(db.Model):
     __tablename__ = 'classes'
 
@@ -80,13 +106,16 @@ class Class(db.Model):
     start_time = db.Column(db.Time, nullable=False)
     end_time = db.Column(db.Time, nullable=False)
     teacher = db.Column(db.String(100), nullable=False)
+    # Seats per month; None means unlimited
+    capacity = db.Column(db.Integer, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     registrations = db.relationship(
-        'Registration', back_populates='class_obj', cascade='all, delete-orphan')
+        'Registration', back_populates='class_obj', cascade='all, delete-orphan',
+        passive_deletes=True)
 
     __table_args__ = (
         db.UniqueConstraint('class_no', 'day_of_week', name='_class_day_uc'),
@@ -97,7 +126,141 @@ class Class(db.Model):
 
     @property
     def time_display(self):
-        return f"{self.start_time.strftime('%I:%M %p')} - {self.end_time.strftime('%I:%M %p')}"
+        return format_time_range(self.start_time, self.end_time)
+
+
+class ClassSeat(db.Model):
+    """Seats taken in a class for one month.
+
+    Seats are claimed with a conditional UPDATE on this single counter row,
+    so concurrent registrations never over-fill a class and never need to
+    count registrations under a lock.
+    """
+    __tablename__ = 'class_seats'
+
+    id = db.Column(db.Integer, primary_key=True)
+    class_id = db.Column(db.Integer, db.ForeignKey(
+        'classes.id', ondelete='CASCADE'), nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+    month = db.Column(db.Integer, nullable=False)
+    taken = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('class_id', 'year', 'month',
+                            name='_class_seat_year_month_uc'),
+    )
+
+    @classmethod
+    def _live_count(cls, class_id, year, month):
+        return Registration.query.filter(
+            Registration.class_id == class_id, Registration.year == year,
+            Registration.month == month,
+            Registration.status.in_(('pending', 'approved'))).count()
+
+    @classmethod
+    def _ensure_row(cls, class_id, year, month):
+        if db.session.query(cls.id).filter_by(
+                class_id=class_id, year=year, month=month).first():
+            return
+        # The first claim for a class/month creates the counter, seeded with
+        # the seats registrations made while the class was unlimited already
+        # hold; a concurrent creator may win the race, which is fine
+        taken = cls._live_count(class_id, year, month)
+        try:
+            with db.session.begin_nested():
+                db.session.add(cls(class_id=class_id, year=year, month=month, taken=taken))
+        except IntegrityError:
+            pass
+
+    @classmethod
+    def claim(cls, class_obj, year, month):
+        """Take a seat if one is free. Returns False when the class is full."""
+        if class_obj.capacity is None:
+            return True
+        cls._ensure_row(class_obj.id, year, month)
+        result = db.session.execute(
+            update(cls)
+            .where(cls.class_id == class_obj.id, cls.year == year,
+                   cls.month == month, cls.taken < class_obj.capacity)
+            .values(taken=cls.taken + 1)
+            .execution_options(synchronize_session=False))
+        return result.rowcount == 1
+
+    @classmethod
+    def release(cls, class_obj, year, month):
+        """Free a seat, handing it straight to the oldest waitlisted student.
+
+        Returns the promoted registration, if any.
+        """
+        if class_obj.capacity is None:
+            return None
+        promoted = Registration.query.filter_by(
+            class_id=class_obj.id, year=year, month=month, status='waitlisted'
+        ).order_by(Registration.created_at, Registration.id).with_for_update().first()
+        if promoted:
+            promoted.status = 'pending'
+            return promoted
+        db.session.execute(
+            update(cls)
+            .where(cls.class_id == class_obj.id, cls.year == year,
+                   cls.month == month, cls.taken > 0)
+            .values(taken=cls.taken - 1)
+            .execution_options(synchronize_session=False))
+        return None
+
+    @classmethod
+    def recount(cls, class_obj, year, month):
+        """Reset the counter from the registrations after a bulk change."""
+        if class_obj.capacity is None:
+            return
+        cls._ensure_row(class_obj.id, year, month)
+        db.session.execute(
+            update(cls)
+            .where(cls.class_id == class_obj.id, cls.year == year, cls.month == month)
+            .values(taken=cls._live_count(class_obj.id, year, month))
+            .execution_options(synchronize_session=False))
+
+    @classmethod
+    def resize(cls, class_obj):
+        """Recount every month after the class's capacity changed.
+
+        Counters are not kept while a class is unlimited, so they are
+        rebuilt from the registrations before the waitlist is served.
+        Returns the number of waitlisted students promoted.
+        """
+        terms = db.session.query(Registration.year, Registration.month).filter_by(
+            class_id=class_obj.id).distinct().all()
+        for year, month in terms:
+            cls.recount(class_obj, year, month)
+        return cls.fill_from_waitlist(class_obj)
+
+    @classmethod
+    def fill_from_waitlist(cls, class_obj):
+        """Promote waitlisted students into seats freed by a capacity increase."""
+        terms = db.session.query(Registration.year, Registration.month).filter_by(
+            class_id=class_obj.id, status='waitlisted').distinct().all()
+        promoted = 0
+        for year, month in terms:
+            waiting = Registration.query.filter_by(
+                class_id=class_obj.id, year=year, month=month, status='waitlisted'
+            ).order_by(Registration.created_at, Registration.id).all()
+            for registration in waiting:
+                if not cls.claim(class_obj, year, month):
+                    break
+                registration.status = 'pending'
+                promoted += 1
+        return promoted
+
+
+def _current_year(context):
+    # Fallback for inserts without a year: the term the app shows (settings),
+    # read on the inserting connection once per statement, not per row.
+    # Callers that know the year pass it and skip this.
+    year = getattr(context, '_registration_year', None)
+    if year is None:
+        year = context.connection.scalar(select(Setting.year).limit(1)) or datetime.utcnow().year
+        context._registration_year = year
+    return year
 
 
 class Registration(db.Model):
@@ -105,9 +268,10 @@ class Registration(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey(
-        'students.id'), nullable=False)
+        'students.id', ondelete='CASCADE'), nullable=False)
     class_id = db.Column(db.Integer, db.ForeignKey(
-        'classes.id'), nullable=False)
+        'classes.id', ondelete='CASCADE'), nullable=False)
+    year = db.Column(db.Integer, nullable=False, default=_current_year)
     month = db.Column(db.Integer, nullable=False)
     fee = db.Column(db.Float, nullable=False)
     status = db.Column(db.String(10), default='pending')
@@ -120,21 +284,62 @@ class Registration(db.Model):
     class_obj = db.relationship('Class', back_populates='registrations')
 
     __table_args__ = (
-        db.UniqueConstraint('student_id', 'class_id', 'month',
+        db.UniqueConstraint('student_id', 'class_id', 'year', 'month',
                             name='_student_class_month_uc'),
+        # Hot queries only look at the current year
+        db.Index('ix_registrations_year_status', 'year', 'status'),
     )
 
     def __repr__(self):
         return f'<Registration: {self.student.name} for {self.class_obj.day_of_week} class {self.class_obj.class_no}>'
 
+    @property
+    def holds_seat(self):
+        return self.status in ('pending', 'approved')
+
     @property
     def month_name(self):
-        months = {
-            1: 'January', 2: 'February', 3: 'March', 4: 'April',
-            5: 'May', 6: 'June', 7: 'July', 8: 'August',
-            9: 'September', 10: 'October', 11: 'November', 12: 'December'
-        }
-        return months.get(self.month, 'Unknown')
+        return MONTH_NAMES.get(self.month, 'Unknown')
+
+
+class RegistrationArchive(db.Model):
+    """Registrations of closed years, moved out by ``flask archive-year``.
+
+    No foreign keys: archived rows outlive deleted students and classes.
+    """
+    __tablename__ = 'registrations_archive'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    student_id = db.Column(db.Integer, nullable=False)
+    class_id = db.Column(db.Integer, nullable=False)
+    year = db.Column(db.Integer, nullable=False, index=True)
+    month = db.Column(db.Integer, nullable=False)
+    fee = db.Column(db.Float, nullable=False)
+    status = db.Column(db.String(10))
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<RegistrationArchive {self.id} ({self.year}-{self.month:02d})>'
+
+
+class RegistrationEvent(db.Model):
+    """A change to a registration, for the admin live feed.
+
+    The id is the feed's change version. ``registration_id`` is NULL for
+    bulk statements, whose rows are not known one by one, and has no
+    foreign key so events of cancelled registrations outlive them.
+    """
+    __tablename__ = 'registration_events'
+
+    id = db.Column(db.Integer, primary_key=True)
+    registration_id = db.Column(db.Integer)
+    kind = db.Column(db.String(10), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f'<RegistrationEvent {self.id}: {self.kind} {self.registration_id}>'
 
 
 class Setting(db.Model):
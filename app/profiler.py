@@ -0,0 +1,201 @@
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app, g, has_request_context, request
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+REPORT_ID_RE = re.compile(r'^[\w-]+$')
+MAX_PARAMS_LENGTH = 200
+
+# cProfile allows one active profiler per process on Python 3.12+, so
+# concurrent requests are not profiled while another one is
+_active = threading.Lock()
+
+
+def find_call_site(skip=()):
+    """Return ``'path:line in function'`` for the innermost app frame.
+
+    Frames of compiled Jinja templates are reported with the template's own
+    line number, so a lazy load such as ``reg.student.name`` points at the
+    template line that triggered it.
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(APP_DIR) and filename not in skip:
+            lineno = frame.f_lineno
+            template = frame.f_globals.get('__jinja_template__')
+            if template is not None:
+                lineno = template.get_corresponding_lineno(lineno)
+            name = os.path.relpath(filename, os.path.dirname(APP_DIR))
+            return f'{name}:{lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return None
+
+
+class RequestProfile:
+    """cProfile data and SQL statements for one request."""
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+        self.queries = []
+        self.started = time.perf_counter()
+
+    def add_query(self, statement, parameters, duration):
+        self.queries.append({
+            'statement': statement,
+            'parameters': redact_parameters(parameters)[:MAX_PARAMS_LENGTH],
+            'duration_ms': round(duration * 1000, 3),
+            'call_site': find_call_site(skip=(__file__,)),
+        })
+
+    def report(self, response):
+        stream = io.StringIO()
+        pstats.Stats(self.profiler, stream=stream).sort_stats('cumulative').print_stats(40)
+        return {
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'created': datetime.utcnow().isoformat(timespec='seconds'),
+            'duration_ms': round((time.perf_counter() - self.started) * 1000, 3),
+            'sql_count': len(self.queries),
+            'sql_ms': round(sum(q['duration_ms'] for q in self.queries), 3),
+            'queries': self.queries,
+            'stats': stream.getvalue(),
+        }
+
+
+def redact_parameters(parameters):
+    """Parameter types without their values, which can hold personal data."""
+    if isinstance(parameters, dict):
+        return '{' + ', '.join(f'{key}: {type(value).__name__}' for key, value in parameters.items()) + '}'
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (list, tuple, dict)):
+            return f'{len(parameters)} x {redact_parameters(parameters[0])}'
+        return '(' + ', '.join(type(value).__name__ for value in parameters) + ')'
+    return type(parameters).__name__
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and g.get('_profile') is not None:
+        context._profile_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_profile_started', None)
+    if started is not None and has_request_context() and g.get('_profile') is not None:
+        g._profile.add_query(statement, parameters, time.perf_counter() - started)
+
+
+def report_dir(app=None):
+    app = app or current_app
+    return app.config.get('PROFILER_DIR') or os.path.join(app.instance_path, 'profiles')
+
+
+def list_reports():
+    """Summaries of the stored reports, newest first."""
+    directory = report_dir()
+    if not os.path.isdir(directory):
+        return []
+    reports = []
+    for filename in sorted(os.listdir(directory), reverse=True):
+        if filename.endswith('.json'):
+            report = load_report(filename[:-5])
+            if report is not None:
+                report.pop('stats')
+                report.pop('queries')
+                reports.append(report)
+    return reports
+
+
+def load_report(report_id):
+    if not REPORT_ID_RE.match(report_id):
+        return None
+    path = os.path.join(report_dir(), f'{report_id}.json')
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        report = json.load(f)
+    report['id'] = report_id
+    return report
+
+
+def _save(profile, response, app):
+    directory = report_dir(app)
+    os.makedirs(directory, exist_ok=True)
+    report_id = f"{datetime.utcnow():%Y%m%d-%H%M%S-%f}-{g.get('request_id', '')[:8]}".rstrip('-')
+
+    profile.profiler.dump_stats(os.path.join(directory, f'{report_id}.prof'))
+    with open(os.path.join(directory, f'{report_id}.json'), 'w') as f:
+        json.dump(profile.report(response), f)
+
+    # Keep the newest PROFILER_KEEP reports
+    stored = sorted(name[:-5] for name in os.listdir(directory) if name.endswith('.json'))
+    for old_id in stored[:-app.config.get('PROFILER_KEEP', 50)]:
+        for extension in ('.json', '.prof'):
+            try:
+                os.remove(os.path.join(directory, old_id + extension))
+            except FileNotFoundError:
+                pass
+    return report_id
+
+
+def _wants_profile(app):
+    if request.endpoint == 'static':
+        return False
+    if app.config.get('PROFILER_ENABLED'):
+        return True
+    param = app.config.get('PROFILER_QUERY_PARAM')
+    return (bool(param) and param in request.args
+            and current_user.is_authenticated and current_user.is_admin())
+
+
+def init_app(app):
+    # Switched off entirely: no hooks, no SQL listeners
+    if not app.config.get('PROFILER_ENABLED') and not app.config.get('PROFILER_QUERY_PARAM'):
+        return
+
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @app.before_request
+    def start_profile():
+        if _wants_profile(app) and _active.acquire(blocking=False):
+            g._profile = RequestProfile()
+            g._profile.profiler.enable()
+
+    @app.after_request
+    def save_profile(response):
+        profile = g.pop('_profile', None)
+        if profile is None:
+            return response
+        profile.profiler.disable()
+        _active.release()
+        report_id = _save(profile, response, app)
+        response.headers['X-Profile-Id'] = report_id
+        logger.info('Profiled %s %s as %s', request.method, request.path, report_id)
+        return response
+
+    @app.teardown_request
+    def stop_profile(exc):
+        # after_request is skipped when the view raised
+        profile = g.pop('_profile', None)
+        if profile is not None:
+            profile.profiler.disable()
+            _active.release()
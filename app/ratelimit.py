@@ -0,0 +1,157 @@
+"""Login rate limiting shared by all worker processes.
+
+Every login attempt takes a token from the client IP's bucket, and every
+failed one also from a bucket for the username tried from that IP. When
+either is empty further attempts are refused before the user is looked up
+or a password hash is checked. Keying the username bucket on the IP too
+means guessing someone's password from one address does not lock them out
+everywhere, and correct passwords never drain it. Buckets live in a
+small SQLite file (``LOGIN_RATE_LIMIT_STORE``, default
+instance/ratelimit.sqlite) that every gunicorn worker on the host opens,
+and each check is a single ``BEGIN IMMEDIATE`` transaction.
+"""
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+from prometheus_client import Counter
+
+logger = logging.getLogger(__name__)
+
+LOGIN_REJECTIONS = Counter('app_login_rate_limited_total',
+                           'Login attempts refused by the rate limiter',
+                           ['scope'])
+
+Bucket = namedtuple('Bucket', 'burst per_second')
+Rejection = namedtuple('Rejection', 'scope retry_after')
+
+# Share of checks that also delete buckets idle long enough to be full again
+PRUNE_PROBABILITY = 0.01
+
+
+class TokenBucketStore:
+    """Token buckets in a SQLite file, safe to share between processes."""
+
+    def __init__(self, path, timeout=1.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        # One connection per thread and process; forked workers open their own
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS buckets ('
+                         'key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def take(self, buckets, now=None, charge=None):
+        """Take one token from every ``key -> Bucket`` in ``buckets``, or from none.
+
+        Every bucket must hold a token, but only the keys in ``charge``
+        (default: all) pay one. Returns None when the attempt is allowed,
+        otherwise the key that ran dry and the seconds until it has a token
+        again.
+        """
+        now = time.time() if now is None else now
+        charge = buckets.keys() if charge is None else charge
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            placeholders = ','.join('?' * len(buckets))
+            stored = {key: (tokens, updated) for key, tokens, updated in conn.execute(
+                f'SELECT key, tokens, updated FROM buckets WHERE key IN ({placeholders})',
+                list(buckets))}
+
+            levels = {}
+            for key, bucket in buckets.items():
+                tokens, updated = stored.get(key, (bucket.burst, now))
+                levels[key] = min(bucket.burst, tokens + (now - updated) * bucket.per_second)
+            empty = [(key, (1 - level) / buckets[key].per_second)
+                     for key, level in levels.items() if level < 1]
+            if not empty:
+                conn.executemany(
+                    'INSERT INTO buckets (key, tokens, updated) VALUES (?, ?, ?) '
+                    'ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated',
+                    [(key, levels[key] - 1, now) for key in charge])
+            if random.random() < PRUNE_PROBABILITY:
+                self._prune(conn, buckets, now)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return max(empty, key=lambda item: item[1]) if empty else None
+
+    def _prune(self, conn, buckets, now):
+        refill = max(b.burst / b.per_second for b in buckets.values())
+        conn.execute('DELETE FROM buckets WHERE updated < ?', (now - refill,))
+
+    def reset(self):
+        conn = self._connection()
+        conn.execute('DELETE FROM buckets')
+
+
+class LoginRateLimiter:
+    def __init__(self, store, ip_bucket, username_bucket):
+        self.store = store
+        self.ip_bucket = ip_bucket
+        self.username_bucket = username_bucket
+
+    @staticmethod
+    def _username_key(ip, username):
+        return f'username:{(username or "").strip().lower()}@{ip}'
+
+    def hit(self, ip, username):
+        """Record a login attempt; returns a ``Rejection`` if it must be refused.
+
+        Takes a token from the IP's bucket; the username bucket is only
+        checked here and paid for by ``record_failure``. If the store
+        cannot be used the attempt is allowed: a broken limiter must not
+        lock everybody out.
+        """
+        ip_key = f'ip:{ip}'
+        buckets = {ip_key: self.ip_bucket, self._username_key(ip, username): self.username_bucket}
+        try:
+            empty = self.store.take(buckets, charge=(ip_key,))
+        except sqlite3.Error as e:
+            logger.warning('Login rate limiter unavailable: %s', e)
+            return None
+        if empty is None:
+            return None
+        key, retry_after = empty
+        scope = key.split(':', 1)[0]
+        LOGIN_REJECTIONS.labels(scope=scope).inc()
+        logger.info('Login attempt refused by the %s rate limit', scope)
+        return Rejection(scope, retry_after)
+
+    def record_failure(self, ip, username):
+        """Charge a failed password check to the username bucket for this IP."""
+        try:
+            self.store.take({self._username_key(ip, username): self.username_bucket})
+        except sqlite3.Error as e:
+            logger.warning('Login rate limiter unavailable: %s', e)
+
+
+def _bucket(app, name):
+    burst, per_minute = app.config[name]
+    return Bucket(burst, per_minute / 60)
+
+
+def init_app(app):
+    if not app.config.get('LOGIN_RATE_LIMIT_ENABLED'):
+        return None
+    path = app.config.get('LOGIN_RATE_LIMIT_STORE') or os.path.join(app.instance_path, 'ratelimit.sqlite')
+    limiter = LoginRateLimiter(TokenBucketStore(path),
+                               ip_bucket=_bucket(app, 'LOGIN_RATE_LIMIT_IP'),
+                               username_bucket=_bucket(app, 'LOGIN_RATE_LIMIT_USERNAME'))
+    app.extensions['login_limiter'] = limiter
+    return limiter
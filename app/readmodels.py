@@ -0,0 +1,89 @@
+"""Read-only rows for list and detail pages.
+
+These run Core ``select()``s for just the displayed columns and wrap each
+row in a small namedtuple, skipping the identity map, change tracking and
+per-row lazy loads that full ORM instances bring along.
+"""
+from collections import namedtuple
+
+from sqlalchemy import func, select
+
+from . import db
+from .models import MONTH_NAMES, Class, Registration, Student, User, format_time_range
+
+
+class RegistrationRow(namedtuple('RegistrationRow', [
+        'id', 'student_id', 'student_name', 'class_id', 'class_no', 'day_of_week',
+        'start_time', 'end_time', 'teacher', 'year', 'month', 'fee', 'status',
+        'created_at'])):
+    __slots__ = ()
+
+    @property
+    def month_name(self):
+        return MONTH_NAMES.get(self.month, 'Unknown')
+
+    @property
+    def time_display(self):
+        return format_time_range(self.start_time, self.end_time)
+
+
+StudentRow = namedtuple('StudentRow', 'id name age contact registration_count')
+
+StudentDetailRow = namedtuple('StudentDetailRow', 'id user_id name age contact username email')
+
+
+class ClassRow(namedtuple('ClassRow', 'id class_no day_of_week start_time end_time teacher capacity')):
+    __slots__ = ()
+
+    @property
+    def time_display(self):
+        return format_time_range(self.start_time, self.end_time)
+
+
+def registration_rows(*criteria, order_by=None):
+    """Registrations matching ``criteria`` with student and class joined in.
+
+    Newest first unless ``order_by`` (a tuple of columns) is given.
+    """
+    stmt = (select(Registration.id, Registration.student_id, Student.name,
+                   Registration.class_id, Class.class_no, Class.day_of_week,
+                   Class.start_time, Class.end_time, Class.teacher,
+                   Registration.year, Registration.month, Registration.fee,
+                   Registration.status, Registration.created_at)
+            .join(Student, Registration.student_id == Student.id)
+            .join(Class, Registration.class_id == Class.id)
+            .where(*criteria)
+            .order_by(*(order_by or (Registration.created_at.desc(),))))
+    return [RegistrationRow._make(row) for row in db.session.execute(stmt)]
+
+
+def student_rows(student_ids=None):
+    """Students ordered by name with their registration counts.
+
+    ``student_ids`` restricts the list, e.g. to one page of search results.
+    """
+    stmt = (select(Student.id, Student.name, Student.age, Student.contact,
+                   func.count(Registration.id))
+            .outerjoin(Registration, Registration.student_id == Student.id)
+            .group_by(Student.id, Student.name, Student.age, Student.contact)
+            .order_by(Student.name, Student.id))
+    if student_ids is not None:
+        stmt = stmt.where(Student.id.in_(student_ids))
+    return [StudentRow._make(row) for row in db.session.execute(stmt)]
+
+
+def student_detail_row(student_id):
+    row = db.session.execute(
+        select(Student.id, Student.user_id, Student.name, Student.age, Student.contact,
+               User.username, User.email)
+        .join(User, Student.user_id == User.id)
+        .where(Student.id == student_id)).first()
+    return StudentDetailRow._make(row) if row is not None else None
+
+
+def class_row(class_id):
+    row = db.session.execute(
+        select(Class.id, Class.class_no, Class.day_of_week, Class.start_time,
+               Class.end_time, Class.teacher, Class.capacity)
+        .where(Class.id == class_id)).first()
+    return ClassRow._make(row) if row is not None else None
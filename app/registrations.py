@@ -0,0 +1,48 @@
+from collections import namedtuple
+
+from sqlalchemy import select
+
+from . import db, fees
+from .models import Class, ClassSeat, Registration
+
+ItemResult = namedtuple('ItemResult', 'class_obj month outcome fee')
+
+
+def register_many(student, class_ids, months, year):
+    """Register a student for every class in ``class_ids`` and month in ``months``.
+
+    Duplicates are found with one IN query and all fees come from one
+    ``calculate_fees`` call; the new rows are flushed together but not
+    committed. Returns an ``ItemResult`` per requested pair whose outcome
+    is ``'pending'``, ``'waitlisted'``, ``'duplicate'`` or ``'unknown'``.
+    """
+    class_ids, months = sorted(set(class_ids)), sorted(set(months))
+    classes = {c.id: c for c in Class.query.filter(Class.id.in_(class_ids))}
+
+    existing = set(db.session.execute(
+        select(Registration.class_id, Registration.month)
+        .where(Registration.student_id == student.id,
+               Registration.year == year,
+               Registration.class_id.in_(class_ids),
+               Registration.month.in_(months))).all())
+
+    wanted = [(classes[class_id], month) for class_id in class_ids if class_id in classes
+              for month in months if (class_id, month) not in existing]
+    item_fees = fees.calculate_fees(wanted, year=year)
+
+    results = []
+    for class_id in class_ids:
+        for month in months:
+            class_obj = classes.get(class_id)
+            if class_obj is None:
+                results.append(ItemResult(None, month, 'unknown', None))
+            elif (class_id, month) in existing:
+                results.append(ItemResult(class_obj, month, 'duplicate', None))
+            else:
+                fee = item_fees[(class_id, month)]
+                status = 'pending' if ClassSeat.claim(class_obj, year, month) else 'waitlisted'
+                db.session.add(Registration(student_id=student.id, class_id=class_id,
+                                            year=year, month=month, fee=fee, status=status))
+                results.append(ItemResult(class_obj, month, status, fee))
+    db.session.flush()
+    return results
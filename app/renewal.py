@@ -0,0 +1,156 @@
+"""Monthly renewal of approved registrations.
+
+Every ``(student, class)`` pair approved for one month gets a registration
+for the next month. Unlimited classes are renewed with a single
+``INSERT ... SELECT`` that prices the rows in SQL; classes with a capacity
+claim seats one by one so a full month waitlists instead of overfilling.
+Pairs already registered for the next month are skipped, so reruns, and
+several workers running the scheduler, only ever create each row once.
+"""
+import logging
+import threading
+import time
+from collections import namedtuple
+from datetime import date, datetime
+
+from sqlalchemy import and_, exists, insert, literal, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+
+from . import db
+from .fees import count_sessions, month_sessions_expr
+from .models import Class, ClassSeat, Registration, Setting
+
+logger = logging.getLogger(__name__)
+
+RENEWAL_STATUSES = ('pending', 'approved')
+
+RenewalResult = namedtuple('RenewalResult', 'created waitlisted')
+
+
+def next_month(year, month):
+    return (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def _renewable(year, month, to_year, to_month):
+    renewed = aliased(Registration)
+    return (Registration.year == year,
+            Registration.month == month,
+            Registration.status == 'approved',
+            ~exists().where(and_(renewed.student_id == Registration.student_id,
+                                 renewed.class_id == Registration.class_id,
+                                 renewed.year == to_year,
+                                 renewed.month == to_month)))
+
+
+def _insert_unlimited(year, month, to_year, to_month, status, fee_per_session):
+    now = datetime.utcnow()
+    rows = (select(Registration.student_id, Registration.class_id,
+                   literal(to_year), literal(to_month),
+                   month_sessions_expr(to_year, to_month, Class.day_of_week) * fee_per_session,
+                   literal(status), literal(now), literal(now))
+            .join(Class, Registration.class_id == Class.id)
+            .where(Class.capacity.is_(None), *_renewable(year, month, to_year, to_month)))
+    result = db.session.execute(insert(Registration).from_select(
+        ['student_id', 'class_id', 'year', 'month', 'fee', 'status', 'created_at', 'updated_at'],
+        rows))
+    return result.rowcount
+
+
+def _insert_limited(year, month, to_year, to_month, status, fee_per_session):
+    """Returns ``(seated, waitlisted)`` counts."""
+    # Oldest registrations first, so long-standing students keep their seat
+    pairs = db.session.execute(
+        select(Registration.student_id, Class)
+        .join(Class, Registration.class_id == Class.id)
+        .where(Class.capacity.isnot(None), *_renewable(year, month, to_year, to_month))
+        .order_by(Registration.created_at, Registration.id)).all()
+    waitlisted = 0
+    for student_id, class_obj in pairs:
+        seated = ClassSeat.claim(class_obj, to_year, to_month)
+        waitlisted += not seated
+        fee = count_sessions(to_year, to_month, class_obj.day_of_week) * fee_per_session
+        db.session.add(Registration(student_id=student_id, class_id=class_obj.id,
+                                    year=to_year, month=to_month, fee=fee,
+                                    status=status if seated else 'waitlisted'))
+    db.session.flush()
+    return len(pairs) - waitlisted, waitlisted
+
+
+def renew_month(year, month, status='approved', fee_per_session=None):
+    """Renew ``year``/``month``'s approved registrations into the following month.
+
+    Returns a ``RenewalResult``: registrations created with ``status`` and
+    those only waitlisted because their class was full, both 0 when
+    everything was already renewed. Commits.
+    """
+    if status not in RENEWAL_STATUSES:
+        raise ValueError(f'invalid renewal status {status!r}')
+    to_year, to_month = next_month(year, month)
+    if fee_per_session is None:
+        fee_per_session = Setting.get_current_fee()
+
+    try:
+        created = _insert_unlimited(year, month, to_year, to_month, status, fee_per_session)
+        seated, waitlisted = _insert_limited(year, month, to_year, to_month, status, fee_per_session)
+        db.session.commit()
+    except IntegrityError:
+        # Another worker renewed the same month concurrently
+        db.session.rollback()
+        logger.info('Renewal of %d-%02d already done by another run', year, month)
+        return RenewalResult(0, 0)
+    result = RenewalResult(created + seated, waitlisted)
+    logger.info('Renewed %d registrations into %d-%02d, %d waitlisted',
+                result.created, to_year, to_month, result.waitlisted)
+    return result
+
+
+class RenewalScheduler:
+    """Renews the current month once ``RENEWAL_DAY`` of the month is reached.
+
+    Checks every ``RENEWAL_CHECK_INTERVAL`` seconds; ``renew_month`` is
+    idempotent, so repeated checks and several workers are harmless.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.day = app.config['RENEWAL_DAY']
+        self.interval = app.config.get('RENEWAL_CHECK_INTERVAL', 3600)
+        self.status = app.config.get('RENEWAL_STATUS', 'approved')
+        self._done = None
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._run, name='renewal-scheduler', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.run_due(date.today())
+            except Exception:
+                logger.exception('Registration renewal failed')
+            time.sleep(self.interval)
+
+    def run_due(self, today):
+        """Renew ``today``'s month of the current term if due and not done by this process yet."""
+        if today.day < self.day:
+            return None
+        with self.app.app_context():
+            term = (Setting.get_current_year(), today.month)
+            result = None
+            if self._done != term:
+                result = renew_month(*term, status=self.status)
+            db.session.remove()
+        self._done = term
+        return result
+
+
+def init_app(app):
+    if not app.config.get('RENEWAL_DAY'):
+        return None
+    scheduler = RenewalScheduler(app)
+    app.extensions['renewal_scheduler'] = scheduler
+    scheduler.start()
+    return scheduler
@@ -0,0 +1,57 @@
+import time
+
+from flask import g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+REPLICA_BIND = 'replica'
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RoutingSession(Session):
+    """Sends reads of read-only requests to the replica bind.
+
+    A request reads from the replica when it is a GET, the user has not
+    written anything in the last ``REPLICA_STICKY_SECONDS`` and the session
+    has not flushed yet. Everything else uses the primary.
+    """
+
+    def __init__(self, db, **kwargs):
+        super().__init__(db, **kwargs)
+        self.has_written = False
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and self._use_replica():
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _use_replica(self):
+        return (not self.has_written
+                and has_request_context()
+                and g.get('read_from_replica', False)
+                and REPLICA_BIND in self._db.engines)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _stick_to_primary(db_session, flush_context):
+    # Once this request has written, read its own writes from the primary
+    db_session.has_written = True
+
+
+def init_app(app):
+    if REPLICA_BIND not in app.config.get('SQLALCHEMY_BINDS', {}):
+        return
+
+    sticky_seconds = app.config.get('REPLICA_STICKY_SECONDS', 5)
+
+    @app.before_request
+    def choose_read_bind():
+        g.read_from_replica = (request.method in READ_METHODS
+                               and time.time() >= session.get('_primary_until', 0))
+
+    @app.after_request
+    def remember_write(response):
+        # Read-your-writes: keep this user on the primary for a short while
+        if request.method not in READ_METHODS:
+            session['_primary_until'] = time.time() + sticky_seconds
+        return response
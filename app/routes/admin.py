@@ -1,11 +1,17 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, current_app, render_template, redirect, url_for, flash, request, jsonify, abort, send_from_directory, stream_with_context
 from flask_login import login_required, current_user
-from ..models import User, Student, Class, Registration, Setting
-from ..forms import ClassForm, SettingsForm
+from ..models import MONTH_NAMES, User, Student, Class, ClassSeat, Registration, Setting
+from ..forms import ClassForm, RegistrationImportForm, SettingsForm
+from ..importer import import_registrations
+from ..fees import reprice_unsettled
+from ..search import search_students, trie_cache
+from .. import analytics, changefeed, profiler
+from ..readmodels import registration_rows, student_rows, student_detail_row
 from .. import db
 from functools import wraps
 import calendar
-from sqlalchemy import func
+import io
+from sqlalchemy import delete, func, select
 from datetime import datetime
 
 admin = Blueprint('admin', __name__)
@@ -30,19 +36,21 @@ def dashboard():
     # Get summary statistics for the dashboard
     total_students = Student.query.count()
     total_classes = Class.query.count()
+    current_year = Setting.get_current_year()
     pending_registrations = Registration.query.filter_by(
-        status='pending').count()
+        year=current_year, status='pending').count()
 
     # Get recent registrations
-    recent_registrations = Registration.query.order_by(
-        Registration.created_at.desc()).limit(5).all()
+    recent_registrations = Registration.query.filter_by(
+        year=current_year).order_by(Registration.created_at.desc()).limit(5).all()
 
     return render_template('admin/dashboard.html',
                            title='Admin Dashboard',
                            total_students=total_students,
                            total_classes=total_classes,
                            pending_registrations=pending_registrations,
-                           recent_registrations=recent_registrations, now=datetime.now())
+                           recent_registrations=recent_registrations,
+                           feed_version=changefeed.current_version(), now=datetime.now())
 
 # Student Management
 
@@ -51,16 +59,50 @@ def dashboard():
 @login_required
 @admin_required
 def student_list():
-    students = Student.query.all()
+    students = student_rows()
     return render_template('admin/student_list.html', title='Student Management', students=students, now=datetime.now())
 
 
+@admin.route('/students/search')
+@login_required
+@admin_required
+def student_search():
+    query = request.args.get('q', '').strip()
+    page = request.args.get('page', 1, type=int)
+    students, has_next = search_students(query, page=page)
+    students = student_rows([s.id for s in students]) if students else []
+    return render_template('admin/student_list.html', title='Student Search',
+                           students=students, query=query, page=page,
+                           has_next=has_next, now=datetime.now())
+
+
+@admin.route('/students/search.json')
+@login_required
+@admin_required
+def student_search_json():
+    """Typeahead suggestions for the student search box"""
+    query = request.args.get('q', '').strip()
+    limit = request.args.get('limit', 10, type=int)
+    students, _ = search_students(query, per_page=limit)
+    return jsonify([{
+        'id': s.id,
+        'name': s.name,
+        'username': s.user.username,
+        'email': s.user.email,
+        'contact': s.contact,
+        'url': url_for('admin.student_detail', student_id=s.id)
+    } for s in students])
+
+
 @admin.route('/students/<int:student_id>')
 @login_required
 @admin_required
 def student_detail(student_id):
-    student = Student.query.get_or_404(student_id)
-    registrations = Registration.query.filter_by(student_id=student.id).all()
+    student = student_detail_row(student_id)
+    if student is None:
+        abort(404)
+    registrations = registration_rows(Registration.student_id == student.id,
+                                      order_by=(Registration.year, Registration.month))
     return render_template('admin/student_detail.html', title=f'Student: {student.name}', student=student, registrations=registrations, now=datetime.now())
 
 
@@ -69,16 +111,61 @@ def student_detail(student_id):
 @admin_required
 def delete_student(student_id):
     student = Student.query.get_or_404(student_id)
-    user = User.query.get(student.user_id)
+    name = student.name
+    _delete_students([student.id])
+    db.session.commit()
+
+    flash(f'Student {name} has been deleted.', 'success')
+    return redirect(url_for('admin.student_list'))
+
+
+@admin.route('/students/delete', methods=['POST'])
+@login_required
+@admin_required
+def delete_students():
+    student_ids = request.form.getlist('student_ids', type=int)
+    if not student_ids:
+        flash('No students selected.', 'warning')
+        return redirect(url_for('admin.student_list'))
 
-    db.session.delete(student)
-    if user:
-        db.session.delete(user)
+    deleted = _delete_students(student_ids)
     db.session.commit()
 
-    flash(f'Student {student.name} has been deleted.', 'success')
+    flash(f'{deleted} student(s) have been deleted.', 'success')
     return redirect(url_for('admin.student_list'))
 
+
+def _delete_students(student_ids):
+    """Delete students with their user accounts and registrations.
+
+    Only the user rows are deleted here; students and registrations follow
+    through ON DELETE CASCADE. Seats the registrations held are handed to
+    the waitlist afterwards. Returns the number of students deleted.
+    """
+    held = db.session.execute(
+        select(Registration.class_id, Registration.year, Registration.month, func.count())
+        .where(Registration.student_id.in_(student_ids),
+               Registration.status.in_(('pending', 'approved')))
+        .group_by(Registration.class_id, Registration.year, Registration.month)).all()
+    user_ids = db.session.scalars(
+        select(Student.user_id).where(Student.id.in_(student_ids))).all()
+    if not user_ids:
+        return 0
+
+    db.session.execute(delete(User).where(User.id.in_(user_ids))
+                       .execution_options(synchronize_session=False))
+
+    limited = {c.id: c for c in Class.query.filter(
+        Class.id.in_({class_id for class_id, _, _, _ in held}), Class.capacity.isnot(None))}
+    for class_id, year, month, seats in held:
+        if class_id in limited:
+            for _ in range(seats):
+                ClassSeat.release(limited[class_id], year, month)
+
+    # Core deletes skip the mapper events that keep the search index fresh
+    trie_cache.invalidate()
+    return len(user_ids)
+
 # Class Management
 
 
@@ -114,7 +201,8 @@ def add_class():
             day_of_week=form.day_of_week.data,
             start_time=form.start_time.data,
             end_time=form.end_time.data,
-            teacher=form.teacher.data
+            teacher=form.teacher.data,
+            capacity=form.capacity.data
         )
         db.session.add(new_class)
         db.session.commit()
@@ -140,6 +228,9 @@ def edit_class(class_id):
         class_obj.start_time = form.start_time.data
         class_obj.end_time = form.end_time.data
         class_obj.teacher = form.teacher.data
+        if class_obj.capacity != form.capacity.data:
+            class_obj.capacity = form.capacity.data
+            ClassSeat.resize(class_obj)
         db.session.commit()
         flash(f'Class {class_obj.class_no} has been updated.', 'success')
         return redirect(url_for('admin.class_list'))
@@ -166,23 +257,71 @@ def delete_class(class_id):
 def registration_list():
     status = request.args.get('status', 'all')
 
-    if status == 'pending':
-        registrations = Registration.query.filter_by(
-            status='pending').order_by(Registration.created_at.desc()).all()
-    elif status == 'approved':
-        registrations = Registration.query.filter_by(
-            status='approved').order_by(Registration.created_at.desc()).all()
-    elif status == 'rejected':
-        registrations = Registration.query.filter_by(
-            status='rejected').order_by(Registration.created_at.desc()).all()
+    # Only the current term unless another year is asked for
+    year = request.args.get('year', type=int) or Setting.get_current_year()
+    criteria = [Registration.year == year]
+    if status in ('pending', 'approved', 'rejected', 'waitlisted'):
+        criteria.append(Registration.status == status)
+
+    # The waitlist is served first come, first served
+    if status == 'waitlisted':
+        registrations = registration_rows(*criteria, order_by=(Registration.created_at,))
     else:
-        registrations = Registration.query.order_by(
-            Registration.created_at.desc()).all()
+        registrations = registration_rows(*criteria)
 
     return render_template('admin/registration_list.html',
                            title='Registration Management',
                            registrations=registrations,
-                           current_status=status, now=datetime.now())
+                           current_status=status, year=year,
+                           feed_version=changefeed.current_version(), now=datetime.now())
+
+
+@admin.route('/registrations/events')
+@login_required
+@admin_required
+def registration_events():
+    """Server-sent events for registration changes after ``since`` (or Last-Event-ID)."""
+    version = request.headers.get('Last-Event-ID', type=int)
+    if version is None:
+        version = request.args.get('since', type=int)
+    if version is None:
+        version = changefeed.current_version()
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    close_stream = changefeed.change_feed.open_stream(current_app.config.get('SSE_MAX_STREAMS'))
+    if close_stream is None:
+        # The browser comes back later; a 503 would make it give up
+        return current_app.response_class(changefeed.busy_stream(), mimetype='text/event-stream',
+                                          headers=headers)
+
+    def events():
+        try:
+            yield from changefeed.stream(version,
+                                         poll_seconds=current_app.config.get('SSE_POLL_SECONDS', 5),
+                                         max_seconds=current_app.config.get('SSE_MAX_SECONDS', 300))
+        finally:
+            close_stream()
+
+    response = current_app.response_class(stream_with_context(events()), mimetype='text/event-stream',
+                                          headers=headers)
+    # Also when the server drops a response that never started streaming
+    response.call_on_close(close_stream)
+    return response
+
+
+@admin.route('/registrations/import', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def import_registrations_upload():
+    form = RegistrationImportForm()
+    report = None
+    if form.validate_on_submit():
+        lines = io.TextIOWrapper(form.csv_file.data.stream, encoding='utf-8-sig', errors='replace')
+        report = import_registrations(lines, status=form.status.data)
+        flash(f'{report.inserted} registration(s) imported, '
+              f'{len(report.problems)} row(s) skipped.',
+              'success' if report.inserted else 'warning')
+    return render_template('admin/registration_import.html', title='Import Registrations',
+                           form=form, report=report, now=datetime.now())
 
 
 @admin.route('/registrations/<int:registration_id>/approve', methods=['POST'])
@@ -190,6 +329,12 @@ def registration_list():
 @admin_required
 def approve_registration(registration_id):
     registration = Registration.query.get_or_404(registration_id)
+    # Waitlisted and rejected registrations need a seat before approval
+    if not registration.holds_seat and not ClassSeat.claim(
+            registration.class_obj, registration.year, registration.month):
+        flash(f'{registration.class_obj.day_of_week.capitalize()} Class '
+              f'{registration.class_obj.class_no} is full for {registration.month_name}.', 'warning')
+        return redirect(url_for('admin.registration_list'))
     registration.status = 'approved'
     db.session.commit()
     flash(
@@ -202,12 +347,38 @@ def approve_registration(registration_id):
 @admin_required
 def reject_registration(registration_id):
     registration = Registration.query.get_or_404(registration_id)
+    if registration.holds_seat:
+        ClassSeat.release(registration.class_obj, registration.year, registration.month)
     registration.status = 'rejected'
     db.session.commit()
     flash(
         f'Registration for {registration.student.name} has been rejected.', 'success')
     return redirect(url_for('admin.registration_list'))
 
+# Occupancy Analytics
+
+
+@admin.route('/analytics')
+@login_required
+@admin_required
+def occupancy():
+    year = request.args.get('year', type=int) or Setting.get_current_year()
+    data = analytics.occupancy(year)
+    # Uncapped classes are shaded relative to the busiest cell
+    peak = max((analytics.seats_taken(c['months'], m)
+                for c in data['classes'] for m in c['months']), default=0)
+    return render_template('admin/analytics.html', title='Occupancy',
+                           data=data, peak=peak, month_names=MONTH_NAMES,
+                           seats_taken=analytics.seats_taken, now=datetime.now())
+
+
+@admin.route('/analytics.json')
+@login_required
+@admin_required
+def occupancy_json():
+    year = request.args.get('year', type=int) or Setting.get_current_year()
+    return jsonify(analytics.occupancy(year))
+
 # Settings Management
 
 
@@ -224,6 +395,9 @@ def settings():
     form = SettingsForm(obj=setting)
     if form.validate_on_submit():
         setting.fee_per_session = form.fee_per_session.data
+        if form.reprice_pending.data:
+            repriced = reprice_unsettled(setting.fee_per_session, setting.year)
+            flash(f'{repriced} pending registration(s) repriced.', 'info')
         db.session.commit()
         flash('Settings updated successfully.', 'success')
         return redirect(url_for('admin.settings'))
@@ -244,3 +418,33 @@ def settings():
                            registrations_count=registrations_count,
                            pending_registrations_count=pending_registrations_count,
                            now=datetime.now())
+
+# Request Profiles
+
+
+@admin.route('/profiles')
+@login_required
+@admin_required
+def profile_list():
+    return render_template('admin/profile_list.html', title='Request Profiles',
+                           reports=profiler.list_reports(), now=datetime.now())
+
+
+@admin.route('/profiles/<profile_id>')
+@login_required
+@admin_required
+def profile_detail(profile_id):
+    report = profiler.load_report(profile_id)
+    if report is None:
+        abort(404)
+    return render_template('admin/profile_detail.html', title='Request Profile',
+                           report=report, now=datetime.now())
+
+
+@admin.route('/profiles/<profile_id>.prof')
+@login_required
+@admin_required
+def profile_download(profile_id):
+    if profiler.load_report(profile_id) is None:
+        abort(404)
+    return send_from_directory(profiler.report_dir(), f'{profile_id}.prof', as_attachment=True)
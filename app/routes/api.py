@@ -0,0 +1,190 @@
+"""Read-only JSON API for integrations.
+
+``GET /api/v1/<resource>`` lists students, classes or registrations:
+
+* ``fields=id,name`` picks columns (``id`` is always included)
+* any listed filter field, e.g. ``status=pending&year=2026``, matches exactly
+* ``limit`` (default 50, max 500) and ``cursor`` page by id; follow
+  ``next_cursor`` until it is null
+* responses carry an ETag, so ``If-None-Match`` gets a 304
+
+Rows are selected as plain tuples and encoded in one go, with orjson when
+it is installed.
+"""
+import base64
+import binascii
+import hashlib
+import json
+from collections import namedtuple
+from datetime import date, datetime, time
+
+from flask import Blueprint, current_app, jsonify, request
+from flask_login import current_user
+from sqlalchemy import select
+
+from ..models import Class, Registration, Student, User
+from .. import db
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib encoder is the fallback
+    orjson = None
+
+api = Blueprint('api', __name__)
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+Resource = namedtuple('Resource', 'columns source filters admin_only')
+
+RESOURCES = {
+    'students': Resource(
+        columns={
+            'id': Student.id, 'name': Student.name, 'age': Student.age,
+            'contact': Student.contact, 'user_id': Student.user_id,
+            'username': User.username, 'email': User.email,
+            'created_at': Student.created_at,
+        },
+        source=Student.__table__.join(User.__table__, Student.user_id == User.id),
+        filters=('name', 'age', 'contact', 'username', 'email'),
+        admin_only=True),
+    'classes': Resource(
+        columns={
+            'id': Class.id, 'class_no': Class.class_no, 'day_of_week': Class.day_of_week,
+            'start_time': Class.start_time, 'end_time': Class.end_time,
+            'teacher': Class.teacher, 'capacity': Class.capacity,
+        },
+        source=Class.__table__,
+        filters=('class_no', 'day_of_week', 'teacher'),
+        admin_only=False),
+    'registrations': Resource(
+        columns={
+            'id': Registration.id, 'student_id': Registration.student_id,
+            'student_name': Student.name, 'class_id': Registration.class_id,
+            'class_no': Class.class_no, 'day_of_week': Class.day_of_week,
+            'year': Registration.year, 'month': Registration.month,
+            'fee': Registration.fee, 'status': Registration.status,
+            'created_at': Registration.created_at,
+        },
+        source=Registration.__table__
+        .join(Student.__table__, Registration.student_id == Student.id)
+        .join(Class.__table__, Registration.class_id == Class.id),
+        filters=('student_id', 'class_id', 'year', 'month', 'status'),
+        admin_only=True),
+}
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+@api.errorhandler(ApiError)
+def handle_api_error(error):
+    return jsonify({'error': str(error)}), error.status
+
+
+def _default(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+_encoder = json.JSONEncoder(separators=(',', ':'), default=_default)
+
+
+def dumps(obj):
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default)
+    return _encoder.encode(obj).encode('utf-8')
+
+
+def _json_response(payload):
+    response = current_app.response_class(dumps(payload), mimetype='application/json')
+    response.set_etag(hashlib.sha1(response.get_data()).hexdigest())
+    return response.make_conditional(request)
+
+
+def _encode_cursor(last_id):
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor):
+    try:
+        return int(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, binascii.Error):
+        raise ApiError('Invalid cursor.')
+
+
+def _resource(name):
+    resource = RESOURCES.get(name)
+    if resource is None:
+        raise ApiError(f'Unknown resource {name!r}.', 404)
+    if not current_user.is_authenticated:
+        raise ApiError('Authentication required.', 401)
+    if resource.admin_only and not current_user.is_admin():
+        raise ApiError('Admin access required.', 403)
+    return resource
+
+
+def _fields(resource):
+    requested = request.args.get('fields')
+    if not requested:
+        return list(resource.columns)
+    fields = ['id'] + [f for f in requested.split(',') if f and f != 'id']
+    unknown = [f for f in fields if f not in resource.columns]
+    if unknown:
+        raise ApiError(f"Unknown field(s): {', '.join(unknown)}.")
+    return fields
+
+
+def _filters(resource):
+    criteria = []
+    for name in resource.filters:
+        value = request.args.get(name)
+        if value is None:
+            continue
+        column = resource.columns[name]
+        try:
+            criteria.append(column == column.type.python_type(value))
+        except ValueError:
+            raise ApiError(f'Invalid value for {name}.')
+    return criteria
+
+
+def _select(resource, fields):
+    return select(*[resource.columns[f] for f in fields]).select_from(resource.source)
+
+
+@api.route('/<resource_name>')
+def list_resource(resource_name):
+    resource = _resource(resource_name)
+    fields = _fields(resource)
+    limit = request.args.get('limit', DEFAULT_LIMIT, type=int)
+    limit = max(1, min(limit, MAX_LIMIT))
+    pk = resource.columns['id']
+
+    stmt = _select(resource, fields).where(*_filters(resource))
+    cursor = request.args.get('cursor')
+    if cursor:
+        stmt = stmt.where(pk > _decode_cursor(cursor))
+
+    # One extra row says whether there is another page
+    rows = db.session.execute(stmt.order_by(pk).limit(limit + 1)).all()
+    next_cursor = _encode_cursor(rows[limit - 1][0]) if len(rows) > limit else None
+    return _json_response({
+        'data': [dict(zip(fields, row)) for row in rows[:limit]],
+        'next_cursor': next_cursor,
+    })
+
+
+@api.route('/<resource_name>/<int:item_id>')
+def get_resource(resource_name, item_id):
+    resource = _resource(resource_name)
+    fields = _fields(resource)
+    row = db.session.execute(
+        _select(resource, fields).where(resource.columns['id'] == item_id)).first()
+    if row is None:
+        raise ApiError('Not found.', 404)
+    return _json_response(dict(zip(fields, row)))
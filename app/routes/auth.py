@@ -1,4 +1,6 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+import math
+
+from flask import Blueprint, current_app, render_template, redirect, url_for, flash, request
 from flask_login import login_user, logout_user, login_required, current_user
 from ..models import User, Student
 from ..forms import LoginForm, RegistrationForm, StudentProfileForm
@@ -17,6 +19,15 @@ def login():
 
     form = LoginForm()
     if form.validate_on_submit():
+        # Refuse floods before the lookup and the expensive password hash check
+        limiter = current_app.extensions.get('login_limiter')
+        rejection = limiter.hit(request.remote_addr, form.username.data) if limiter else None
+        if rejection is not None:
+            retry_after = math.ceil(rejection.retry_after)
+            flash(f'Too many login attempts. Please try again in {retry_after} seconds.', 'danger')
+            return render_template('auth/login.html', form=form, title='Login', now=datetime.now()), \
+                429, {'Retry-After': str(retry_after)}
+
         user = User.query.filter_by(username=form.username.data).first()
         if user is not None and user.verify_password(form.password.data):
             login_user(user, form.remember_me.data)
@@ -27,6 +38,8 @@ def login():
                 return redirect(url_for('admin.dashboard'))
             else:
                 return redirect(url_for('student.dashboard'))
+        if limiter:
+            limiter.record_failure(request.remote_addr, form.username.data)
         flash('Invalid username or password.', 'danger')
     return render_template('auth/login.html', form=form, title='Login', now=datetime.now())
 
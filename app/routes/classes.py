@@ -1,6 +1,7 @@
-from flask import Blueprint, render_template, jsonify
+from flask import Blueprint, render_template, jsonify, abort
 from flask_login import login_required
-from ..models import Class, Registration
+from ..models import MONTH_NAMES, Class, Registration, Student
+from ..readmodels import class_row, registration_rows
 from .. import db
 from datetime import datetime
 
@@ -31,21 +32,19 @@ def list_all():
 @classes.route('/<int:class_id>')
 @login_required
 def class_details(class_id):
-    class_obj = Class.query.get_or_404(class_id)
+    class_obj = class_row(class_id)
+    if class_obj is None:
+        abort(404)
 
     # Get registrations for this class
-    registrations = Registration.query.filter_by(class_id=class_id).all()
+    registrations = registration_rows(Registration.class_id == class_id,
+                                      order_by=(Registration.year, Registration.month, Student.name))
 
     # Get months with registrations
     months = set(r.month for r in registrations)
-    month_names = {
-        1: 'January', 2: 'February', 3: 'March', 4: 'April',
-        5: 'May', 6: 'June', 7: 'July', 8: 'August',
-        9: 'September', 10: 'October', 11: 'November', 12: 'December'
-    }
 
     # Format months data for template
-    months_data = [(m, month_names[m]) for m in sorted(months)]
+    months_data = [(m, MONTH_NAMES[m]) for m in sorted(months)]
 
     return render_template('classes/details.html',
                            title=f'Class {class_obj.class_no} - {class_obj.day_of_week.capitalize()}',
@@ -1,8 +1,31 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, current_app
 
 health = Blueprint('health', __name__)
 
 
+def readiness_response():
+    result = current_app.extensions['health_probe'].result()
+    status = dict(result, status='healthy' if result['ready'] else 'unhealthy')
+    return jsonify(status), 200 if result['ready'] else 503
+
+
+def connectivity_response():
+    # Docker's /health: healthy while the database answers, whatever its
+    # migration state, latency or pool; /health/ready gates on those
+    result = current_app.extensions['health_probe'].result()
+    connected = result['database'] == 'connected'
+    status = dict(result, status='healthy' if connected else 'unhealthy')
+    return jsonify(status), 200 if connected else 503
+
+
 @health.route('/')
-def check():
+@health.route('/live')
+def live():
+    # Liveness: the process is serving requests, no I/O
     return jsonify({"status": "healthy"}), 200
+
+
+@health.route('/ready')
+def ready():
+    # Readiness: cached result of the background database probe
+    return readiness_response()
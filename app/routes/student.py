@@ -1,10 +1,13 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
-from ..models import Student, Class, Registration, Setting
-from ..forms import RegistrationRequestForm
+from ..models import MONTH_NAMES, Student, Class, ClassSeat, Registration, Setting
+from .. import fees
+from ..forms import BatchRegistrationForm, RegistrationRequestForm
+from ..registrations import register_many
 from .. import db
+from ..tracing import span
 from functools import wraps
-import calendar
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 
 student = Blueprint('student', __name__)
@@ -33,16 +36,19 @@ def student_required(f):
 @student_required
 def dashboard():
     student = current_user.student
+    current_year = Setting.get_current_year()
 
     # Get approved registrations
     approved_registrations = Registration.query.filter_by(
         student_id=student.id,
+        year=current_year,
         status='approved'
     ).all()
 
     # Get pending registrations
     pending_registrations = Registration.query.filter_by(
         student_id=student.id,
+        year=current_year,
         status='pending'
     ).all()
 
@@ -73,7 +79,9 @@ def available_classes():
     # Get student's registrations
     student_id = current_user.student.id
     registered_class_ids = [reg.class_id for reg in
-                            Registration.query.filter_by(student_id=student_id).all()]
+                            Registration.query.filter_by(
+                                student_id=student_id,
+                                year=Setting.get_current_year()).all()]
 
     return render_template('student/available_classes.html',
                            title='Available Classes',
@@ -96,12 +104,16 @@ def register_for_class():
                              for c in classes]
 
     if form.validate_on_submit():
+        current_year = Setting.get_current_year()
+
         # Check if already registered for this class and month
-        existing_reg = Registration.query.filter_by(
-            student_id=student.id,
-            class_id=form.class_id.data,
-            month=form.month.data
-        ).first()
+        with span('registration.duplicate_check'):
+            existing_reg = Registration.query.filter_by(
+                student_id=student.id,
+                class_id=form.class_id.data,
+                year=current_year,
+                month=form.month.data
+            ).first()
 
         if existing_reg:
             flash(
@@ -110,34 +122,38 @@ def register_for_class():
 
         # Calculate fee based on class day count in the month
         class_obj = Class.query.get(form.class_id.data)
-        day_index = {
-            'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3,
-            'friday': 4, 'saturday': 5, 'sunday': 6
-        }[class_obj.day_of_week]
-
-        # Count occurrences of this day in the selected month
-        current_year = Setting.get_current_year()
-        month_calendar = calendar.monthcalendar(current_year, form.month.data)
-        day_count = sum(1 for week in month_calendar if week[day_index] != 0)
+        total_fee = fees.calculate_fee(
+            class_obj, form.month.data, year=current_year)
 
-        # Calculate fee
-        fee_per_session = Setting.get_current_fee()
-        total_fee = day_count * fee_per_session
+        # Take a seat atomically, or join the waitlist when the month is full
+        status = 'pending' if ClassSeat.claim(
+            class_obj, current_year, form.month.data) else 'waitlisted'
 
         # Create registration
         registration = Registration(
             student_id=student.id,
             class_id=form.class_id.data,
+            year=current_year,
             month=form.month.data,
             fee=total_fee,
-            status='pending'
+            status=status
         )
 
         db.session.add(registration)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # A concurrent request registered the same class and month first
+            db.session.rollback()
+            flash('You are already registered for this class in that month.', 'warning')
+            return redirect(url_for('student.register_for_class'))
 
-        flash(
-            f'Registration request submitted for approval. Fee: {total_fee:.2f}', 'success')
+        if status == 'waitlisted':
+            flash(
+                f'This class is full for {registration.month_name}. You have been added to the waitlist.', 'info')
+        else:
+            flash(
+                f'Registration request submitted for approval. Fee: {total_fee:.2f}', 'success')
         return redirect(url_for('student.dashboard'))
 
     return render_template('student/register_class.html',
@@ -145,6 +161,68 @@ def register_for_class():
                            form=form, now=datetime.now())
 
 
+@student.route('/register/batch', methods=['GET', 'POST'])
+@login_required
+@student_required
+def register_batch():
+    student = current_user.student
+
+    form = BatchRegistrationForm()
+    classes = Class.query.order_by(Class.class_no, Class.day_of_week).all()
+    form.class_ids.choices = [(c.id, f"{c.day_of_week.capitalize()} - Class {c.class_no} ({c.time_display}) - {c.teacher}")
+                              for c in classes]
+
+    if form.validate_on_submit():
+        try:
+            # Flushes inside register_many can hit the unique key too
+            results = register_many(student, form.class_ids.data, form.months.data,
+                                    Setting.get_current_year())
+            db.session.commit()
+        except IntegrityError:
+            # A concurrent request registered one of the pairs first
+            db.session.rollback()
+            flash('Some of these registrations were just made elsewhere. Please try again.', 'warning')
+            return redirect(url_for('student.register_batch'))
+
+        if request.accept_mimetypes.best == 'application/json':
+            return jsonify([{
+                'class_id': r.class_obj.id if r.class_obj else None,
+                'month': r.month,
+                'outcome': r.outcome,
+                'fee': r.fee,
+            } for r in results])
+
+        _flash_batch_results(results)
+        return redirect(url_for('student.dashboard'))
+
+    return render_template('student/register_batch.html',
+                           title='Register for Several Classes',
+                           form=form, now=datetime.now())
+
+
+def _flash_batch_results(results):
+    def describe(items):
+        return ', '.join(f'{r.class_obj.day_of_week.capitalize()} Class {r.class_obj.class_no} '
+                         f'({MONTH_NAMES[r.month]})' for r in items)
+
+    by_outcome = {}
+    for result in results:
+        by_outcome.setdefault(result.outcome, []).append(result)
+
+    created = by_outcome.get('pending', []) + by_outcome.get('waitlisted', [])
+    if created:
+        total = sum(r.fee for r in created)
+        flash(f'{len(created)} registration request(s) submitted. Total fee: {total:.2f}', 'success')
+    else:
+        flash('No new registrations were made.', 'info')
+    if by_outcome.get('waitlisted'):
+        flash(f"Full, added to the waitlist: {describe(by_outcome['waitlisted'])}.", 'info')
+    if by_outcome.get('duplicate'):
+        flash(f"Already registered: {describe(by_outcome['duplicate'])}.", 'info')
+    if by_outcome.get('unknown'):
+        flash(f"{len(by_outcome['unknown'])} selection(s) were no longer available.", 'warning')
+
+
 @student.route('/calculate-fee')
 @login_required
 @student_required
@@ -158,20 +236,8 @@ def calculate_fee():
     # Get the class
     class_obj = Class.query.get_or_404(class_id)
 
-    # Get the day of week index (0=Monday, 6=Sunday)
-    day_index = {
-        'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3,
-        'friday': 4, 'saturday': 5, 'sunday': 6
-    }[class_obj.day_of_week]
-
-    # Count occurrences of this day in the selected month
-    current_year = Setting.get_current_year()
-    month_calendar = calendar.monthcalendar(current_year, month)
-    day_count = sum(1 for week in month_calendar if week[day_index] != 0)
-
-    # Calculate fee
-    fee_per_session = Setting.get_current_fee()
-    total_fee = day_count * fee_per_session
+    # Fee for every occurrence of the class day in the selected month
+    total_fee = fees.calculate_fee(class_obj, month)
 
     return jsonify({'fee': total_fee})
 
@@ -182,14 +248,17 @@ def calculate_fee():
 @student_required
 def my_classes():
     student = current_user.student
+    current_year = Setting.get_current_year()
 
-    # Get all registrations grouped by status
+    # Get this year's registrations grouped by status
     approved = Registration.query.filter_by(
-        student_id=student.id, status='approved').all()
-    pending = Registration.query.filter_by(
-        student_id=student.id, status='pending').all()
+        student_id=student.id, year=current_year, status='approved').all()
+    pending = Registration.query.filter(
+        Registration.student_id == student.id,
+        Registration.year == current_year,
+        Registration.status.in_(['pending', 'waitlisted'])).all()
     rejected = Registration.query.filter_by(
-        student_id=student.id, status='rejected').all()
+        student_id=student.id, year=current_year, status='rejected').all()
 
     return render_template('student/my_classes.html',
                            title='My Classes',
@@ -210,11 +279,15 @@ def cancel_registration(registration_id):
         flash('You do not have permission to cancel this registration.', 'danger')
         return redirect(url_for('student.my_classes'))
 
-    # Only allow cancellation if status is pending
-    if registration.status != 'pending':
+    # Only allow cancellation if status is pending or waitlisted
+    if registration.status not in ('pending', 'waitlisted'):
         flash('Only pending registrations can be cancelled.', 'warning')
         return redirect(url_for('student.my_classes'))
 
+    # A freed seat goes to the next student on the waitlist
+    if registration.holds_seat:
+        ClassSeat.release(registration.class_obj, registration.year, registration.month)
+
     db.session.delete(registration)
     db.session.commit()
 
@@ -0,0 +1,206 @@
+import re
+import threading
+import time
+import weakref
+
+from flask import current_app
+from sqlalchemy import event, select, union
+from sqlalchemy.orm import contains_eager
+
+from . import db
+from .models import Student, User
+from .replica import RoutingSession
+
+MAX_PER_PAGE = 50
+
+_TOKEN_RE = re.compile(r'[\w@.+-]+')
+_BOOLEAN_SPECIAL_RE = re.compile(r'[+\-<>()~*"@]')
+
+
+def tokenize(text):
+    return [t for t in _TOKEN_RE.findall((text or '').lower()) if t]
+
+
+class StudentTrie:
+    """Prefix index over student name words, username, email and contact.
+
+    Students are added in result order (name, id), so ``rank`` sorts any
+    set of matches without going back to the database.
+    """
+
+    def __init__(self):
+        self.root = {}
+        self.tokens = {}
+        self.rank = {}
+
+    def add(self, student_id, *fields):
+        tokens = set()
+        for field in fields:
+            tokens.update(tokenize(field))
+            # Also index the email's local part and domain on their own
+            if field and '@' in field:
+                tokens.update(tokenize(field.replace('@', ' ')))
+        self.tokens[student_id] = tokens
+        self.rank.setdefault(student_id, len(self.rank))
+        for token in tokens:
+            node = self.root
+            for char in token:
+                node = node.setdefault(char, {})
+            node.setdefault(None, set()).add(student_id)
+
+    def _collect(self, prefix):
+        node = self.root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return set()
+        found, stack = set(), [node]
+        while stack:
+            node = stack.pop()
+            for key, child in node.items():
+                if key is None:
+                    found.update(child)
+                else:
+                    stack.append(child)
+        return found
+
+    def search(self, terms):
+        """Ids of students with a token starting with every term."""
+        terms = sorted(terms, key=len, reverse=True)
+        candidates = self._collect(terms[0])
+        for term in terms[1:]:
+            candidates = {sid for sid in candidates
+                          if any(t.startswith(term) for t in self.tokens[sid])}
+        return candidates
+
+    def ranked(self, terms):
+        """Matching ids in name order."""
+        return sorted(self.search(terms), key=self.rank.__getitem__)
+
+
+class _TrieCache:
+    """One trie per database, dropped by commits that change students or users.
+
+    Other worker processes pick changes up once the trie is ``max_age``
+    seconds old. A build that overlaps an invalidating commit may have read
+    the old rows, so it is used but not kept.
+    """
+
+    def __init__(self):
+        self._tries = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    def _fresh(self, engine, max_age):
+        entry = self._tries.get(engine)
+        if entry is not None and time.monotonic() - entry[0] < max_age:
+            return entry[1]
+        return None
+
+    def get(self, engine, max_age):
+        trie = self._fresh(engine, max_age)
+        if trie is None:
+            with self._lock:
+                trie = self._fresh(engine, max_age)
+                if trie is None:
+                    generation, built_at = self._generation, time.monotonic()
+                    trie = _build_trie()
+                    if generation == self._generation:
+                        self._tries[engine] = (built_at, trie)
+        return trie
+
+    def invalidate(self):
+        self._generation += 1
+        self._tries.clear()
+
+
+trie_cache = _TrieCache()
+
+
+def _build_trie():
+    trie = StudentTrie()
+    rows = db.session.execute(
+        select(Student.id, Student.name, Student.contact, User.username, User.email)
+        .join(User, Student.user_id == User.id)
+        .order_by(Student.name, Student.id))
+    for student_id, name, contact, username, email in rows:
+        trie.add(student_id, name, contact, username, email)
+    return trie
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _note_flush(session, flush_context):
+    changed = (session.new | session.dirty | session.deleted)
+    if any(isinstance(obj, (Student, User)) for obj in changed):
+        session.info['search_changed'] = True
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _note_bulk_write(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table = getattr(orm_execute_state.statement, 'table', None)
+    if table is not None and table.name in (Student.__tablename__, User.__tablename__):
+        orm_execute_state.session.info['search_changed'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _invalidate_on_commit(session):
+    # Not at flush: a search could rebuild from rows that are then rolled back
+    if session.info.pop('search_changed', False):
+        trie_cache.invalidate()
+
+
+def _sql_search(terms):
+    """MySQL: ids matching FULLTEXT on name or a prefix of any other column.
+
+    One SELECT per index, merged with UNION: an OR across students and
+    users could use none of them and would scan the whole join.
+    """
+    boolean_query = ' '.join(f'+{_BOOLEAN_SPECIAL_RE.sub("", t)}*' for t in terms)
+    prefix = re.sub(r'([\\%_])', r'\\\1', ' '.join(terms)) + '%'
+    return union(
+        select(Student.id).where(
+            db.text('MATCH (students.name) AGAINST (:q IN BOOLEAN MODE)').bindparams(q=boolean_query)),
+        select(Student.id).where(Student.name.like(prefix, escape='\\')),
+        select(Student.id).where(Student.contact.like(prefix, escape='\\')),
+        select(Student.id).join(User, Student.user_id == User.id)
+        .where(User.username.like(prefix, escape='\\')),
+        select(Student.id).join(User, Student.user_id == User.id)
+        .where(User.email.like(prefix, escape='\\')),
+    ).subquery()
+
+
+def search_students(query, page=1, per_page=20):
+    """Return ``(students, has_next)`` for one page of search results.
+
+    Results are ordered by name and bounded to ``MAX_PER_PAGE`` a page;
+    each student comes with its user loaded.
+    """
+    terms = tokenize(query)
+    per_page = max(1, min(per_page, MAX_PER_PAGE))
+    page = max(page, 1)
+    if not terms:
+        return [], False
+
+    stmt = (select(Student).join(User, Student.user_id == User.id)
+            .options(contains_eager(Student.user)))
+    offset = (page - 1) * per_page
+    if db.engine.dialect.name == 'mysql':
+        matches = _sql_search(terms)
+        # One extra row tells us whether there is a next page without a COUNT
+        students = db.session.scalars(
+            stmt.join(matches, Student.id == matches.c.id)
+            .order_by(Student.name, Student.id)
+            .offset(offset).limit(per_page + 1)).all()
+        return students[:per_page], len(students) > per_page
+
+    # The trie orders every match, so only this page's rows are loaded
+    max_age = current_app.config.get('SEARCH_CACHE_SECONDS', 60)
+    ids = trie_cache.get(db.engine, max_age).ranked(terms)
+    page_ids = ids[offset:offset + per_page]
+    if not page_ids:
+        return [], False
+    students = db.session.scalars(
+        stmt.where(Student.id.in_(page_ids)).order_by(Student.name, Student.id)).all()
+    return students, len(ids) > offset + per_page
@@ -0,0 +1,94 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+
+from flask import g, has_request_context, request
+from prometheus_client import Counter
+from sqlalchemy import event
+
+from . import db
+from .profiler import MAX_PARAMS_LENGTH, find_call_site, redact_parameters
+
+slow_query_logger = logging.getLogger('app.slow_queries')
+slow_query_logger.propagate = False
+_listener = None
+
+SLOW_QUERIES = Counter('app_slow_queries_total',
+                       'SQL statements slower than SLOW_QUERY_THRESHOLD_MS',
+                       ['endpoint'])
+
+
+def _record(statement, parameters, duration):
+    endpoint = request.endpoint if has_request_context() else None
+    entry = {
+        'time': datetime.now(timezone.utc).isoformat(),
+        'duration_ms': round(duration * 1000, 3),
+        'endpoint': endpoint,
+        'request_id': g.get('request_id') if has_request_context() else None,
+        'call_site': find_call_site(skip=(__file__,)),
+        'statement': statement,
+        'parameters': redact_parameters(parameters)[:MAX_PARAMS_LENGTH],
+    }
+    slow_query_logger.warning(json.dumps(entry))
+    SLOW_QUERIES.labels(endpoint=endpoint or 'none').inc()
+
+
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(_stop_listener)
+
+
+def _configure_handler(app):
+    """Queue records to a background writer, like the main log.
+
+    Every worker appends to the same file, so rotation is left to
+    logrotate (or similar); WatchedFileHandler reopens the file once it
+    has been moved away.
+    """
+    global _listener
+
+    path = app.config.get('SLOW_QUERY_LOG') or os.path.join(app.instance_path, 'slow_queries.log')
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    file_handler = WatchedFileHandler(path)
+    file_handler.setFormatter(logging.Formatter('%(message)s'))
+
+    for old in list(slow_query_logger.handlers):
+        slow_query_logger.removeHandler(old)
+    _stop_listener()
+    queue_handler = QueueHandler(queue.SimpleQueue())
+    _listener = QueueListener(queue_handler.queue, file_handler)
+    _listener.start()
+    slow_query_logger.addHandler(queue_handler)
+    slow_query_logger.setLevel(logging.WARNING)
+
+
+def init_app(app):
+    threshold_ms = app.config.get('SLOW_QUERY_THRESHOLD_MS')
+    if threshold_ms is None:
+        return
+    threshold = threshold_ms / 1000
+    _configure_handler(app)
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._slow_query_started = time.perf_counter()
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - context._slow_query_started
+        if duration >= threshold:
+            _record(statement, parameters, duration)
+
+    # Listen on this app's engines only (primary and replica)
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', after_cursor_execute)
@@ -0,0 +1,120 @@
+// Live registration updates for the admin dashboard and registration list.
+// The page renders the change version it shows into data-feed-url (?since=),
+// so no event between rendering and connecting is lost.
+
+document.addEventListener("DOMContentLoaded", function () {
+	const feed = document.querySelector("[data-feed-url]");
+	if (!feed || !window.EventSource) {
+		return;
+	}
+
+	const BADGES = {
+		pending: '<span class="badge bg-warning text-dark">Pending</span>',
+		approved: '<span class="badge bg-success">Approved</span>',
+		waitlisted: '<span class="badge bg-secondary">Waitlisted</span>',
+		rejected: '<span class="badge bg-danger">Rejected</span>',
+	};
+	const filter = feed.dataset.status || "all";
+	const year = Number(feed.dataset.year || 0);
+	const tbody = feed.querySelector("tbody");
+	const notice = document.getElementById("feed-notice");
+
+	function escapeHtml(text) {
+		const div = document.createElement("div");
+		div.textContent = text == null ? "" : String(text);
+		return div.innerHTML;
+	}
+
+	function showNotice(message) {
+		if (notice) {
+			notice.querySelector(".feed-message").textContent = message;
+			notice.classList.remove("d-none");
+		}
+	}
+
+	function actionsHtml(reg) {
+		if (reg.status !== "pending" || !feed.dataset.approveUrl) {
+			return '<span class="text-muted">No actions</span>';
+		}
+		const csrf = '<input type="hidden" name="csrf_token" value="' + escapeHtml(feed.dataset.csrf) + '">';
+		const approve = feed.dataset.approveUrl.replace("/0/", "/" + reg.id + "/");
+		const reject = feed.dataset.rejectUrl.replace("/0/", "/" + reg.id + "/");
+		return (
+			'<div class="btn-group">' +
+			'<form action="' + approve + '" method="POST" class="d-inline">' + csrf +
+			'<button type="submit" class="btn btn-sm btn-success me-1"><i class="fas fa-check"></i> Approve</button></form>' +
+			'<form action="' + reject + '" method="POST" class="d-inline">' + csrf +
+			'<button type="submit" class="btn btn-sm btn-danger"><i class="fas fa-times"></i> Reject</button></form>' +
+			"</div>"
+		);
+	}
+
+	function rowFor(id) {
+		return feed.querySelector('tr[data-registration-id="' + id + '"]');
+	}
+
+	function updateRow(row, reg) {
+		if (filter !== "all" && reg.status !== filter) {
+			row.remove();
+			return;
+		}
+		row.querySelector(".registration-status").innerHTML = BADGES[reg.status] || BADGES.rejected;
+		const actions = row.querySelector(".registration-actions");
+		if (actions && (reg.status !== "pending" || feed.dataset.approveUrl)) {
+			actions.innerHTML = actionsHtml(reg);
+		}
+	}
+
+	function insertRow(reg) {
+		if (!tbody || !feed.dataset.studentUrl || (filter !== "all" && reg.status !== filter) || reg.year !== year) {
+			return;
+		}
+		const row = document.createElement("tr");
+		row.dataset.registrationId = reg.id;
+		row.className = "table-info";
+		const studentUrl = feed.dataset.studentUrl.replace("/0", "/" + reg.student_id);
+		row.innerHTML =
+			"<td>" + reg.id + "</td>" +
+			'<td><a href="' + studentUrl + '">' + escapeHtml(reg.student_name) + "</a></td>" +
+			"<td>" + escapeHtml(reg.day_of_week.charAt(0).toUpperCase() + reg.day_of_week.slice(1)) +
+			" (Class " + reg.class_no + ")</td>" +
+			"<td>" + escapeHtml(reg.month_name) + "</td>" +
+			"<td>$" + reg.fee + "</td>" +
+			'<td class="registration-status">' + (BADGES[reg.status] || BADGES.rejected) + "</td>" +
+			"<td>" + escapeHtml(reg.created_at) + "</td>" +
+			'<td class="registration-actions">' + actionsHtml(reg) + "</td>";
+		tbody.prepend(row);
+	}
+
+	function handle(event) {
+		const change = JSON.parse(event.data);
+		const pendingCount = document.getElementById("pending-count");
+		if (pendingCount) {
+			pendingCount.textContent = change.pending;
+		}
+
+		if (change.kind === "bulk") {
+			showNotice("Registrations were changed in bulk. Reload to see them.");
+			return;
+		}
+		const row = rowFor(change.registration_id);
+		if (change.kind === "cancelled" || !change.registration) {
+			if (row) {
+				row.remove();
+			}
+		} else if (row) {
+			updateRow(row, change.registration);
+		} else if (change.kind === "new" || change.kind === "pending") {
+			if (tbody && feed.dataset.studentUrl) {
+				insertRow(change.registration);
+			} else {
+				showNotice("New registration from " + change.registration.student_name + ".");
+			}
+		}
+	}
+
+	const source = new EventSource(feed.dataset.feedUrl);
+	["new", "approved", "rejected", "pending", "waitlisted", "cancelled", "bulk"].forEach(function (kind) {
+		source.addEventListener(kind, handle);
+	});
+});
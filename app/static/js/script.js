@@ -102,6 +102,36 @@ document.addEventListener("DOMContentLoaded", function () {
 		monthSelect.addEventListener("change", updateFee);
 	}
 
+	// Admin student search: typeahead suggestions
+	const studentSearch = document.getElementById("student-search");
+	const suggestions = document.getElementById("student-suggestions");
+	if (studentSearch && suggestions) {
+		let suggestTimer;
+		studentSearch.addEventListener("input", function () {
+			clearTimeout(suggestTimer);
+			const query = this.value.trim();
+			if (query.length < 2) {
+				return;
+			}
+			suggestTimer = setTimeout(function () {
+				fetch(`${studentSearch.dataset.suggestUrl}?q=${encodeURIComponent(query)}`)
+					.then((response) => response.json())
+					.then((students) => {
+						suggestions.innerHTML = "";
+						students.forEach((student) => {
+							const option = document.createElement("option");
+							option.value = student.name;
+							option.label = `${student.username} · ${student.contact}`;
+							suggestions.appendChild(option);
+						});
+					})
+					.catch((error) => {
+						console.error("Error fetching suggestions:", error);
+					});
+			}, 200);
+		});
+	}
+
 	// Confirmation dialogs for destructive actions
 	document.querySelectorAll(".confirm-action").forEach((button) => {
 		button.addEventListener("click", function (e) {
@@ -0,0 +1,257 @@
+"""Lightweight request tracing.
+
+A sampled request gets a root span; ``span()`` / ``@traced`` blocks, the
+user loader, every SQL statement, form validation, fee calculation and
+each ``render_template`` become child spans. When the request ends the
+trace is written as one OTLP/JSON ``ExportTraceServiceRequest`` line to
+``TRACING_FILE`` (default instance/traces.jsonl) or to stderr, in the
+format the OpenTelemetry collector's ``otlpjsonfile`` receiver reads.
+
+Requests are sampled at ``TRACING_SAMPLE_RATE``, unless a W3C
+``traceparent`` header decides. Outside a sampled request ``span()`` only
+costs a context variable lookup.
+"""
+import json
+import logging
+import os
+import random
+import re
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from logging.handlers import RotatingFileHandler
+
+from flask import g, request
+from jinja2 import Template
+from sqlalchemy import event
+
+from . import db
+from .profiler import find_call_site
+
+trace_logger = logging.getLogger('app.traces')
+trace_logger.propagate = False
+
+# OTLP span kinds and status codes
+KIND_INTERNAL, KIND_SERVER, KIND_CLIENT = 1, 2, 3
+STATUS_OK, STATUS_ERROR = 1, 2
+
+TRACEPARENT_RE = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+MAX_STATEMENT_LENGTH = 1000
+
+_current_span = ContextVar('current_span', default=None)
+
+
+class Span:
+    __slots__ = ('trace', 'span_id', 'parent_id', 'name', 'kind',
+                 'start_ns', 'end_ns', 'attributes', 'error')
+
+    def __init__(self, trace, name, parent_id=None, kind=KIND_INTERNAL, attributes=None):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = dict(attributes or {})
+        self.error = None
+        trace.spans.append(self)
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def finish(self, error=None):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.error = error
+
+    def child(self, name, kind=KIND_INTERNAL, attributes=None):
+        return Span(self.trace, name, self.span_id, kind, attributes)
+
+    def to_otlp(self):
+        entry = {
+            'traceId': self.trace.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns or time.time_ns()),
+            'attributes': [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            'status': {'code': STATUS_ERROR, 'message': self.error} if self.error
+            else {'code': STATUS_OK},
+        }
+        if self.parent_id:
+            entry['parentSpanId'] = self.parent_id
+        return entry
+
+
+class Trace:
+    def __init__(self, trace_id=None):
+        self.trace_id = trace_id or os.urandom(16).hex()
+        self.spans = []
+
+
+def _otlp_attribute(key, value):
+    if isinstance(value, bool):
+        typed = {'boolValue': value}
+    elif isinstance(value, int):
+        typed = {'intValue': str(value)}
+    elif isinstance(value, float):
+        typed = {'doubleValue': value}
+    else:
+        typed = {'stringValue': str(value)}
+    return {'key': key, 'value': typed}
+
+
+@contextmanager
+def span(name, **attributes):
+    """Time the block as a child of the current span; a no-op when not tracing."""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = parent.child(name, attributes=attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except Exception as e:
+        child.finish(error=repr(e))
+        raise
+    finally:
+        _current_span.reset(token)
+        child.finish()
+
+
+def traced(name):
+    """Decorator form of ``span()``."""
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return f(*args, **kwargs)
+            with span(name):
+                return f(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TracedTemplate(Template):
+    """Jinja template class that traces each top-level render."""
+
+    def render(self, *args, **kwargs):
+        if _current_span.get() is None:
+            return super().render(*args, **kwargs)
+        with span(f'render {self.name}', template=self.name or ''):
+            return super().render(*args, **kwargs)
+
+
+def _export(trace, service_name):
+    batch = {'resourceSpans': [{
+        'resource': {'attributes': [_otlp_attribute('service.name', service_name)]},
+        'scopeSpans': [{
+            'scope': {'name': __name__},
+            'spans': [s.to_otlp() for s in trace.spans],
+        }],
+    }]}
+    trace_logger.info(json.dumps(batch, separators=(',', ':')))
+
+
+def _configure_handler(app, exporter):
+    if exporter == 'console':
+        handler = logging.StreamHandler(sys.stderr)
+    else:
+        path = app.config.get('TRACING_FILE') or os.path.join(app.instance_path, 'traces.jsonl')
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        handler = RotatingFileHandler(path, maxBytes=app.config.get('TRACING_FILE_MAX_BYTES', 50 * 1024 * 1024),
+                                      backupCount=app.config.get('TRACING_FILE_BACKUPS', 3))
+    handler.setFormatter(logging.Formatter('%(message)s'))
+
+    for old in list(trace_logger.handlers):
+        trace_logger.removeHandler(old)
+        old.close()
+    trace_logger.addHandler(handler)
+    trace_logger.setLevel(logging.INFO)
+
+
+def _sampled_trace(sample_rate):
+    """A new ``(trace, remote parent id)`` if this request is sampled, else None."""
+    match = TRACEPARENT_RE.match(request.headers.get('traceparent', ''))
+    if match:
+        trace_id, parent_id, flags = match.groups()
+        return (Trace(trace_id), parent_id) if int(flags, 16) & 1 else None
+    return (Trace(), None) if random.random() < sample_rate else None
+
+
+def init_app(app):
+    exporter = app.config.get('TRACING_EXPORTER')
+    if not exporter:
+        return
+    if exporter not in ('file', 'console'):
+        raise ValueError(f'unknown TRACING_EXPORTER {exporter!r}')
+    _configure_handler(app, exporter)
+    sample_rate = app.config.get('TRACING_SAMPLE_RATE', 1.0)
+    service_name = app.config.get('TRACING_SERVICE_NAME', app.import_name)
+
+    def start_trace():
+        sampled = _sampled_trace(sample_rate)
+        if sampled is None:
+            return
+        trace, remote_parent = sampled
+        root = Span(trace, f'{request.method} {request.url_rule or request.path}', remote_parent,
+                    KIND_SERVER, {'http.method': request.method, 'http.target': request.full_path.rstrip('?'),
+                                  'flask.endpoint': request.endpoint or ''})
+        g._trace_root = root
+        g._trace_token = _current_span.set(root)
+
+    # First, so spans opened by other before_request hooks have a parent
+    app.before_request_funcs.setdefault(None, []).insert(0, start_trace)
+
+    @app.after_request
+    def record_status(response):
+        root = g.get('_trace_root')
+        if root is not None:
+            root.set_attribute('http.status_code', response.status_code)
+            response.headers['X-Trace-Id'] = root.trace.trace_id
+        return response
+
+    @app.teardown_request
+    def finish_trace(exc):
+        root = g.pop('_trace_root', None)
+        if root is None:
+            return
+        _current_span.reset(g.pop('_trace_token'))
+        error = repr(exc) if exc is not None else None
+        # Spans a failed statement left open end with the request
+        for open_span in root.trace.spans:
+            open_span.finish(error=error)
+        _export(root.trace, service_name)
+
+    app.jinja_env.template_class = TracedTemplate
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        parent = _current_span.get()
+        if parent is not None:
+            context._trace_span = parent.child('sql', KIND_CLIENT, {
+                'db.system': conn.dialect.name,
+                'db.statement': statement[:MAX_STATEMENT_LENGTH],
+                'code.location': find_call_site(skip=(__file__,)) or '',
+            })
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        sql_span = getattr(context, '_trace_span', None)
+        if sql_span is not None:
+            sql_span.finish()
+
+    def handle_error(exception_context):
+        context = exception_context.execution_context
+        sql_span = getattr(context, '_trace_span', None) if context is not None else None
+        if sql_span is not None:
+            sql_span.finish(error=repr(exception_context.original_exception))
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+            event.listen(engine, 'handle_error', handle_error)
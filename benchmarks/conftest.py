@@ -0,0 +1,57 @@
+from datetime import time
+
+import pytest
+from sqlalchemy import insert, select
+
+from app import create_app, db
+from app.models import Class, Registration, Student, User
+
+MONTHS = range(1, 13)
+
+
+@pytest.fixture
+def app():
+    """App backed by a fresh in-memory SQLite database with the sample data."""
+    app = create_app('sqlite-testing')
+    with app.app_context():
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def admin(app):
+    return User.query.filter_by(username='admin').one()
+
+
+def seed_registrations(count, year):
+    """Insert ``count`` registrations spread over the sample classes and all months."""
+    classes = Class.query.order_by(Class.id).all()
+    per_student = len(classes) * len(MONTHS)
+    students = -(-count // per_student)
+
+    # Hashes are irrelevant here and slow to compute, so skip the password setter
+    db.session.execute(insert(User), [
+        {'username': f'bench{i}', 'email': f'bench{i}@example.com', 'password_hash': 'x',
+         'role': 'student'} for i in range(students)])
+    user_ids = db.session.scalars(
+        select(User.id).where(User.username.like('bench%')).order_by(User.id)).all()
+    db.session.execute(insert(Student), [
+        {'user_id': user_id, 'name': f'Student {i}', 'age': 20, 'contact': '0123456789'}
+        for i, user_id in enumerate(user_ids)])
+    student_ids = db.session.scalars(select(Student.id).order_by(Student.id)).all()
+
+    rows = [{'student_id': student_id, 'class_id': class_obj.id, 'year': year, 'month': month,
+             'fee': 40.0, 'status': 'pending'}
+            for student_id in student_ids for class_obj in classes for month in MONTHS]
+    db.session.execute(insert(Registration), rows[:count])
+    db.session.commit()
+
+
+def seed_classes(day, count):
+    """``count`` back-to-back 5-minute classes on ``day`` from 06:00."""
+    for i in range(count):
+        minutes = 6 * 60 + i * 5
+        db.session.add(Class(class_no=1000 + i, day_of_week=day, teacher='Bench Teacher',
+                             start_time=time(minutes // 60, minutes % 60),
+                             end_time=time((minutes + 5) // 60, (minutes + 5) % 60)))
+    db.session.commit()
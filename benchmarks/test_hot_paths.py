@@ -0,0 +1,78 @@
+"""Micro-benchmarks for code that runs on every request.
+
+Run with ``python -m pytest benchmarks``; see pytest.ini for how results
+are saved and compared.
+"""
+from datetime import datetime, time
+
+import pytest
+from flask import render_template
+from flask_login import login_user
+from werkzeug.datastructures import MultiDict
+
+from app import db
+from app.fees import calculate_fee
+from app.forms import ClassForm
+from app.models import Class, Registration, Setting, load_user
+from app.readmodels import registration_rows
+
+from conftest import seed_classes, seed_registrations
+
+LOOP_SIZE = 10_000
+
+
+def test_calculate_fee(benchmark, app):
+    # As register_for_class calls it: year given, fee per session looked up
+    class_obj = Class.query.filter_by(class_no=101).first()
+    year = Setting.get_current_year()
+    benchmark(calculate_fee, class_obj, 3, year=year)
+
+
+def test_calculate_fee_given_rate(benchmark, app):
+    class_obj = Class.query.filter_by(class_no=101).first()
+    benchmark(calculate_fee, class_obj, 3, year=2026, fee_per_session=10.0)
+
+
+@pytest.mark.parametrize('classes_per_day', [10, 100])
+def test_class_form_validate(benchmark, app, classes_per_day):
+    seed_classes('sunday', classes_per_day)
+    data = MultiDict({'class_no': '999', 'day_of_week': 'sunday', 'start_time': '23:00',
+                      'end_time': '23:30', 'teacher': 'New Teacher'})
+    with app.test_request_context(method='POST'):
+        form = ClassForm(formdata=data)
+        # A free slot is checked against every class of the day
+        assert benchmark(form.validate)
+
+
+def test_month_name_loop(benchmark):
+    registrations = [Registration(month=i % 12 + 1) for i in range(LOOP_SIZE)]
+    benchmark(lambda: [r.month_name for r in registrations])
+
+
+def test_time_display_loop(benchmark):
+    classes = [Class(start_time=time(9, 0), end_time=time(10, 30)) for _ in range(LOOP_SIZE)]
+    benchmark(lambda: [c.time_display for c in classes])
+
+
+def test_load_user(benchmark, app, admin):
+    user_id = str(admin.id)
+
+    def fresh_session():
+        # Measure the query, not an identity-map hit
+        db.session.expunge_all()
+        return (user_id,), {}
+
+    benchmark.pedantic(load_user, setup=fresh_session, rounds=200)
+
+
+@pytest.mark.parametrize('rows', [1_000, 10_000])
+def test_render_registration_list(benchmark, app, admin, rows):
+    year = Setting.get_current_year()
+    seed_registrations(rows, year)
+    registrations = registration_rows(Registration.year == year)
+    assert len(registrations) == rows
+
+    with app.test_request_context('/admin/registrations'):
+        login_user(admin)
+        benchmark(render_template, 'admin/registration_list.html', title='Registration Management',
+                  registrations=registrations, current_status='all', now=datetime.now())
@@ -20,7 +20,10 @@ CREATE TABLE IF NOT EXISTS students (
     contact VARCHAR(20) NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    KEY ix_students_name (name),
+    KEY ix_students_contact (contact),
+    FULLTEXT KEY ft_students_name (name)
 );
 
 -- Classes Table
@@ -31,16 +34,29 @@ CREATE TABLE IF NOT EXISTS classes (
     start_time TIME NOT NULL,
     end_time TIME NOT NULL,
     teacher VARCHAR(100) NOT NULL,
+    capacity INT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     UNIQUE KEY unique_class_day (class_no, day_of_week)
 );
 
+-- Seats taken per class and month (claimed with a conditional UPDATE)
+CREATE TABLE IF NOT EXISTS class_seats (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    class_id INT NOT NULL,
+    year INT NOT NULL,
+    month INT NOT NULL,
+    taken INT NOT NULL DEFAULT 0,
+    FOREIGN KEY (class_id) REFERENCES classes(id) ON DELETE CASCADE,
+    UNIQUE KEY unique_class_seat_month (class_id, year, month)
+);
+
 -- Registrations Table
 CREATE TABLE IF NOT EXISTS registrations (
     id INT AUTO_INCREMENT PRIMARY KEY,
     student_id INT NOT NULL,
     class_id INT NOT NULL,
+    year INT NOT NULL,
     month INT NOT NULL,
     fee DECIMAL(10, 2) NOT NULL,
     status VARCHAR(10) DEFAULT 'pending',
@@ -48,7 +64,32 @@ CREATE TABLE IF NOT EXISTS registrations (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE,
     FOREIGN KEY (class_id) REFERENCES classes(id) ON DELETE CASCADE,
-    UNIQUE KEY unique_registration (student_id, class_id, month)
+    UNIQUE KEY unique_registration (student_id, class_id, year, month),
+    KEY ix_registrations_year_status (year, status)
+);
+
+-- Registrations of closed years (filled by `flask archive-year`)
+CREATE TABLE IF NOT EXISTS registrations_archive (
+    id INT PRIMARY KEY,
+    student_id INT NOT NULL,
+    class_id INT NOT NULL,
+    year INT NOT NULL,
+    month INT NOT NULL,
+    fee DECIMAL(10, 2) NOT NULL,
+    status VARCHAR(10),
+    created_at TIMESTAMP NULL,
+    updated_at TIMESTAMP NULL,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    KEY ix_registrations_archive_year (year)
+);
+
+-- Registration changes for the admin live feed (id = change version)
+CREATE TABLE IF NOT EXISTS registration_events (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    registration_id INT NULL,
+    kind VARCHAR(10) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    KEY ix_registration_events_created_at (created_at)
 );
 
 -- Settings Table
@@ -13,6 +13,10 @@ mysqldump -u root -p$MYSQL_ROOT_PASSWORD $MYSQL_DATABASE > backup_$(date +%Y%m%d
 # Show current migration status
 flask db current
 
+# Data backfills run in small chunks and resume where they stopped, so a
+# failed upgrade can simply be re-run. Estimate a big one first with e.g.
+#   flask backfill-estimate registrations --where "year IS NULL"
+
 # Run migrations
 echo "Running database migrations..."
 if flask db upgrade; then
@@ -24,4 +28,5 @@ else
 fi
 
 echo "New migration status:"
-flask db current
\ No newline at end of file
+flask db current
+flask backfill-status
\ No newline at end of file
@@ -92,12 +92,17 @@ def run_migrations_online():
 
     connectable = get_engine()
 
+    # Backfills (app/backfill.py) commit chunk by chunk inside an
+    # autocommit block, so give every migration its own transaction
+    configure_args = dict(current_app.extensions['migrate'].configure_args)
+    configure_args.setdefault('transaction_per_migration', True)
+
     with connectable.connect() as connection:
         context.configure(
             connection=connection,
             target_metadata=get_metadata(),
             process_revision_directives=process_revision_directives,
-            **current_app.extensions['migrate'].configure_args
+            **configure_args
         )
 
         with context.begin_transaction():
@@ -0,0 +1,35 @@
+"""registration events
+
+Revision ID: 061ac82962e3
+Revises: a067db25203b
+Create Date: 2026-10-19 10:10:00
+
+Creates registration_events, the change log the admin live feed streams
+from. Databases created from the current init.sql already have it, so
+upgrading them only records the revision.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '061ac82962e3'
+down_revision = 'a067db25203b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not sa.inspect(op.get_bind()).has_table('registration_events'):
+        op.create_table(
+            'registration_events',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('registration_id', sa.Integer(), nullable=True),
+            sa.Column('kind', sa.String(10), nullable=False),
+            sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.func.current_timestamp()),
+        )
+        op.create_index('ix_registration_events_created_at', 'registration_events', ['created_at'])
+
+
+def downgrade():
+    op.drop_table('registration_events')
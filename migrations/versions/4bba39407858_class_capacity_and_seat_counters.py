@@ -0,0 +1,41 @@
+"""class capacity and seat counters
+
+Revision ID: 4bba39407858
+Revises: 
+Create Date: 2026-10-19 09:10:00
+
+Databases created from the current init.sql already have these; every
+step checks first, so upgrading them only records the revision.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4bba39407858'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'capacity' not in {c['name'] for c in inspector.get_columns('classes')}:
+        op.add_column('classes', sa.Column('capacity', sa.Integer(), nullable=True))
+
+    if not inspector.has_table('class_seats'):
+        op.create_table(
+            'class_seats',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('class_id', sa.Integer(),
+                      sa.ForeignKey('classes.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('year', sa.Integer(), nullable=False),
+            sa.Column('month', sa.Integer(), nullable=False),
+            sa.Column('taken', sa.Integer(), nullable=False, server_default='0'),
+            sa.UniqueConstraint('class_id', 'year', 'month', name='unique_class_seat_month'),
+        )
+
+
+def downgrade():
+    op.drop_table('class_seats')
+    op.drop_column('classes', 'capacity')
@@ -0,0 +1,77 @@
+"""registration year and archive
+
+Revision ID: 961a41b65fa1
+Revises: 4bba39407858
+Create Date: 2026-10-19 09:20:00
+
+Adds registrations.year, filled in chunks with the current term from
+settings (rows predate year scoping, so they all belong to it), makes the
+unique key (student, class, year, month) and creates registrations_archive.
+Each step checks first, so databases created from the current init.sql
+only record the revision. The key swap is MySQL DDL, like init.sql.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.backfill import backfill
+
+
+# revision identifiers, used by Alembic.
+revision = '961a41b65fa1'
+down_revision = '4bba39407858'
+branch_labels = None
+depends_on = None
+
+OLD_KEY = ('student_id', 'class_id', 'month')
+NEW_KEY = ('student_id', 'class_id', 'year', 'month')
+
+
+def _unique_keys(inspector, table):
+    return {tuple(u['column_names']) for u in inspector.get_unique_constraints(table)}
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'year' not in {c['name'] for c in inspector.get_columns('registrations')}:
+        op.add_column('registrations', sa.Column('year', sa.Integer(), nullable=True))
+        with op.get_context().autocommit_block():
+            backfill(op.get_bind(), 'registrations_add_year', 'registrations',
+                     values={'year': sa.text('COALESCE((SELECT year FROM settings LIMIT 1), '
+                                             'YEAR(created_at), YEAR(CURRENT_DATE))')},
+                     where=sa.text('year IS NULL'))
+        op.alter_column('registrations', 'year', existing_type=sa.Integer(), nullable=False)
+
+    keys = _unique_keys(inspector, 'registrations')
+    if NEW_KEY not in keys:
+        # One statement, so the student_id foreign key always has an index
+        drop = ' DROP INDEX unique_registration,' if OLD_KEY in keys else ''
+        op.execute(f'ALTER TABLE registrations{drop} '
+                   f'ADD UNIQUE KEY unique_registration ({", ".join(NEW_KEY)})')
+
+    if 'ix_registrations_year_status' not in {i['name'] for i in inspector.get_indexes('registrations')}:
+        op.create_index('ix_registrations_year_status', 'registrations', ['year', 'status'])
+
+    if not inspector.has_table('registrations_archive'):
+        op.create_table(
+            'registrations_archive',
+            sa.Column('id', sa.Integer(), primary_key=True, autoincrement=False),
+            sa.Column('student_id', sa.Integer(), nullable=False),
+            sa.Column('class_id', sa.Integer(), nullable=False),
+            sa.Column('year', sa.Integer(), nullable=False),
+            sa.Column('month', sa.Integer(), nullable=False),
+            sa.Column('fee', sa.Numeric(10, 2), nullable=False),
+            sa.Column('status', sa.String(10)),
+            sa.Column('created_at', sa.TIMESTAMP(), nullable=True),
+            sa.Column('updated_at', sa.TIMESTAMP(), nullable=True),
+            sa.Column('archived_at', sa.TIMESTAMP(), server_default=sa.func.current_timestamp()),
+        )
+        op.create_index('ix_registrations_archive_year', 'registrations_archive', ['year'])
+
+
+def downgrade():
+    op.drop_table('registrations_archive')
+    op.drop_index('ix_registrations_year_status', table_name='registrations')
+    # Fails if a student has the same class and month in two years
+    op.execute(f'ALTER TABLE registrations DROP INDEX unique_registration, '
+               f'ADD UNIQUE KEY unique_registration ({", ".join(OLD_KEY)})')
+    op.drop_column('registrations', 'year')
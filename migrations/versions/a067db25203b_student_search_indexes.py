@@ -0,0 +1,37 @@
+"""student search indexes
+
+Revision ID: a067db25203b
+Revises: 961a41b65fa1
+Create Date: 2026-10-19 09:40:00
+
+Prefix indexes on students.name and students.contact and the FULLTEXT
+index on names that the admin search reads (MySQL). Existing indexes are
+left alone, so databases created from the current init.sql only record
+the revision.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a067db25203b'
+down_revision = '961a41b65fa1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing = {i['name'] for i in sa.inspect(op.get_bind()).get_indexes('students')}
+    if 'ix_students_name' not in existing:
+        op.create_index('ix_students_name', 'students', ['name'])
+    if 'ix_students_contact' not in existing:
+        op.create_index('ix_students_contact', 'students', ['contact'])
+    if 'ft_students_name' not in existing and op.get_bind().dialect.name == 'mysql':
+        op.create_index('ft_students_name', 'students', ['name'], mysql_prefix='FULLTEXT')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'mysql':
+        op.drop_index('ft_students_name', table_name='students')
+    op.drop_index('ix_students_contact', table_name='students')
+    op.drop_index('ix_students_name', table_name='students')
@@ -33,6 +33,10 @@ def create_app(config_name='default'):
     metrics = PrometheusMetrics(app)
     metrics.info('app_info', 'Application Info', version='1.0.0')
 
+    # Pending queue, registrations per status, students and classes (cached)
+    from . import metrics as business_metrics
+    metrics.registry.register(business_metrics.make_collector(app))
+
     # Set login view for unauthorized redirects
     login_manager.login_view = 'auth.login'
     login_manager.login_message_category = 'info'
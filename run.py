@@ -40,21 +40,112 @@ def create_admin(username, email, password):
 
 
 @app.cli.command("init-db")
+@click.option("--sample-data", is_flag=True, help="Also create the init.sql admin and sample classes.")
 @with_appcontext
-def init_db():
+def init_db(sample_data):
     """Initialize the database with default values."""
-    db.create_all()
-
-    # Create default settings
-    if Setting.query.first() is None:
-        from datetime import datetime
-        setting = Setting(year=datetime.utcnow().year, fee_per_session=50.00)
-        db.session.add(setting)
-        db.session.commit()
-        click.echo("Default settings initialized.")
+    from app.database import create_schema
+    create_schema(sample_data=sample_data)
 
     click.echo("Database initialized.")
 
 
+@app.cli.command("archive-year")
+@click.argument("year", type=int)
+@click.option("--batch-size", default=1000, show_default=True, help="Rows moved per transaction.")
+@click.option("--pause", default=0.0, show_default=True, help="Seconds to sleep between batches.")
+@with_appcontext
+def archive_year(year, batch_size, pause):
+    """Move a closed year's registrations to the archive table."""
+    from app.archive import archive_year as move_year
+
+    if year >= Setting.get_current_year():
+        click.echo(f"Error: {year} is not a closed year.")
+        return
+
+    moved = move_year(year, batch_size=batch_size, pause=pause,
+                      progress=lambda n: click.echo(f"  {n} rows archived..."))
+    click.echo(f"Archived {moved} registrations from {year}.")
+
+
+@app.cli.command("import-registrations")
+@click.argument("csv_file", type=click.File("r", encoding="utf-8-sig", errors="replace"))
+@click.option("--year", type=int, default=None, help="Year for rows without one (default: current year).")
+@click.option("--status", type=click.Choice(["pending", "approved"]), default="pending", show_default=True)
+@click.option("--chunk-size", default=1000, show_default=True, help="Rows inserted per statement.")
+@with_appcontext
+def import_registrations(csv_file, year, status, chunk_size):
+    """Import registrations from a CSV (username, class_no, day_of_week, month)."""
+    from app.importer import import_registrations as run_import
+
+    report = run_import(csv_file, year=year, status=status, chunk_size=chunk_size)
+    for line, message in report.problems:
+        click.echo(f"  line {line}: {message}")
+    click.echo(f"Imported {report.inserted} registrations, skipped {len(report.problems)} rows.")
+
+
+@app.cli.command("renew-registrations")
+@click.option("--year", type=int, default=None, help="Year of the month to renew from (default: the current term).")
+@click.option("--month", type=click.IntRange(1, 12), default=None, help="Month to renew from (default: this month).")
+@click.option("--status", type=click.Choice(["pending", "approved"]), default=None,
+              help="Status of the renewed registrations (default: RENEWAL_STATUS).")
+@with_appcontext
+def renew_registrations(year, month, status):
+    """Copy a month's approved registrations into the next month."""
+    from datetime import date
+    from app.models import Setting
+    from app.renewal import next_month, renew_month
+
+    year, month = year or Setting.get_current_year(), month or date.today().month
+    result = renew_month(year, month, status=status or app.config['RENEWAL_STATUS'])
+    to_year, to_month = next_month(year, month)
+    click.echo(f"Renewed {result.created} registrations into {to_year}-{to_month:02d}, "
+               f"{result.waitlisted} waitlisted.")
+
+
+@app.cli.command("backfill-estimate")
+@click.argument("table")
+@click.option("--where", default=None, help="SQL condition matching the rows still to backfill.")
+@click.option("--chunk-size", default=1000, show_default=True, help="Primary-key ids per chunk.")
+@click.option("--pause", default=0.0, show_default=True, help="Seconds to sleep between chunks.")
+@with_appcontext
+def backfill_estimate(table, where, chunk_size, pause):
+    """Estimate a migration backfill without writing anything."""
+    from app.backfill import backfill
+
+    with db.engine.connect() as connection:
+        estimate = backfill(connection, 'estimate', table, values={},
+                            where=db.text(where) if where else None,
+                            chunk_size=chunk_size, pause=pause, dry_run=True)
+    click.echo(f"{estimate.rows} rows in {estimate.chunks} chunks, "
+               f"roughly {estimate.seconds:.1f}s.")
+
+
+@app.cli.command("backfill-status")
+@with_appcontext
+def backfill_status():
+    """Show the progress of migration backfills."""
+    from app.backfill import progress_rows
+
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        rows = progress_rows(connection)
+    if not rows:
+        click.echo("No backfills recorded.")
+    for row in rows:
+        state = "finished" if row.finished else f"stopped after id {row.last_id}"
+        click.echo(f"  {row.name}: {row.rows_done} rows, {state} ({row.updated_at:%Y-%m-%d %H:%M})")
+
+
+@app.cli.command("build-assets")
+def build_assets():
+    """Fingerprint and precompress static assets."""
+    from app.assets import build_assets as build
+
+    manifest = build()
+    for source, hashed in manifest.items():
+        click.echo(f"  {source} -> {hashed}")
+    click.echo(f"Built {len(manifest)} assets.")
+
+
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,38 @@
+import pytest
+
+from app import create_app, db
+
+
+@pytest.fixture
+def app():
+    """App backed by a fresh in-memory SQLite database with the sample data."""
+    app = create_app('sqlite-testing')
+    with app.app_context():
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def make_student(username, name='Student One'):
+    """Create a student account with a completed profile (password: password123)."""
+    from app.models import User, Student
+
+    user = User(username=username, email=f'{username}@example.com', role='student')
+    user.password = 'password123'
+    user.student = Student(name=name, age=20, contact='0123456789')
+    db.session.add(user)
+    db.session.commit()
+    return user.student
+
+
+@pytest.fixture
+def student(app):
+    return make_student('student1')
+
+
+def login(client, username, password):
+    return client.post('/login', data={'username': username, 'password': password})
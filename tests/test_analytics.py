@@ -0,0 +1,59 @@
+from app import analytics, db
+from app.analytics import occupancy, occupancy_cache
+from app.models import Class, Registration
+
+from conftest import login, make_student
+
+
+def add_registration(student, class_obj, month, status='pending'):
+    db.session.add(Registration(student_id=student.id, class_id=class_obj.id,
+                                year=2026, month=month, fee=200.0, status=status))
+    db.session.commit()
+
+
+def test_occupancy_groups_by_class_month_and_status(app, student):
+    other = make_student('student2')
+    class_obj = Class.query.filter_by(class_no=101).first()
+    add_registration(student, class_obj, 3, status='approved')
+    add_registration(other, class_obj, 3, status='waitlisted')
+
+    data = occupancy(2026)
+
+    (row,) = [c for c in data['classes'] if c['id'] == class_obj.id]
+    assert row['months'] == {3: {'approved': 1, 'waitlisted': 1}}
+    (load,) = [t for t in data['teachers'] if t['teacher'] == class_obj.teacher]
+    assert (load['classes'], load['seats'], load['students']) == (1, 1, 1)
+
+
+def test_cache_is_dropped_on_commit(app, student):
+    class_obj = Class.query.first()
+    assert occupancy(2026)['classes'][0]['months'] == {}
+    assert occupancy(2026) is occupancy(2026)
+
+    add_registration(student, class_obj, 1)
+
+    assert sum(c['months'].get(1, {}).get('pending', 0) for c in occupancy(2026)['classes']) == 1
+
+
+def test_result_overlapping_a_commit_is_not_cached(app, monkeypatch):
+    compute = analytics._compute
+
+    def commit_while_computing(year):
+        data = compute(year)
+        occupancy_cache.invalidate()  # as if another thread committed now
+        return data
+    monkeypatch.setattr(analytics, '_compute', commit_while_computing)
+    stale = occupancy(2026)
+    monkeypatch.setattr(analytics, '_compute', compute)
+
+    assert occupancy(2026) is not stale
+
+
+def test_analytics_page_and_json(client, student):
+    add_registration(student, Class.query.first(), 2)
+    login(client, 'admin', 'admin123')
+
+    assert client.get('/admin/analytics?year=2026').status_code == 200
+    data = client.get('/admin/analytics.json?year=2026').get_json()
+    assert data['year'] == 2026
+    assert any(c['months'] for c in data['classes'])
@@ -0,0 +1,70 @@
+from app import db
+from app.models import Class, Registration
+
+from conftest import login
+
+
+def test_classes_with_field_selection_and_filters(client, student):
+    login(client, 'student1', 'password123')
+
+    data = client.get('/api/v1/classes?fields=class_no,teacher&day_of_week=monday').get_json()
+
+    assert data['next_cursor'] is None
+    assert [sorted(item) for item in data['data']] == [['class_no', 'id', 'teacher']] * 2
+    assert {item['class_no'] for item in data['data']} == {101, 102}
+
+
+def test_cursor_pagination_walks_all_rows(client):
+    login(client, 'admin', 'admin123')
+
+    seen, cursor = [], ''
+    while True:
+        page = client.get(f'/api/v1/classes?limit=3&cursor={cursor}').get_json()
+        seen += [item['id'] for item in page['data']]
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+
+    assert seen == sorted(c.id for c in Class.query.all())
+    assert client.get('/api/v1/classes?cursor=!!').status_code == 400
+
+
+def test_registrations_admin_only_with_etag(client, student):
+    db.session.add(Registration(student_id=student.id, class_id=Class.query.first().id,
+                                year=2026, month=4, fee=200.0))
+    db.session.commit()
+    login(client, 'student1', 'password123')
+    assert client.get('/api/v1/registrations').status_code == 403
+    client.get('/logout')
+
+    login(client, 'admin', 'admin123')
+    response = client.get('/api/v1/registrations?status=pending&year=2026')
+    (item,) = response.get_json()['data']
+    assert item['student_name'] == 'Student One'
+    assert item['created_at']
+
+    etag = response.headers['ETag']
+    again = client.get('/api/v1/registrations?status=pending&year=2026',
+                       headers={'If-None-Match': etag})
+    assert again.status_code == 304
+
+
+def test_errors_are_json(client, student):
+    assert client.get('/api/v1/classes').status_code == 401
+    login(client, 'admin', 'admin123')
+    assert client.get('/api/v1/students?fields=password_hash').get_json()['error']
+    assert client.get('/api/v1/students?age=old').status_code == 400
+    assert client.get(f'/api/v1/students/{student.id}').get_json()['username'] == 'student1'
+    assert client.get('/api/v1/nothing').status_code == 404
+
+
+def test_etag_revalidates_compressed_responses(app, client, student):
+    app.config['COMPRESS_MIN_SIZE'] = 0
+    login(client, 'admin', 'admin123')
+    response = client.get('/api/v1/classes?limit=100', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+
+    again = client.get('/api/v1/classes?limit=100',
+                       headers={'Accept-Encoding': 'gzip', 'If-None-Match': response.headers['ETag']})
+    assert again.status_code == 304
+    assert again.data == b''
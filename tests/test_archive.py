@@ -0,0 +1,53 @@
+from app import db
+from app.archive import archive_year
+from app.models import Class, ClassSeat, Registration, RegistrationArchive, Setting
+
+
+def test_same_month_allowed_in_different_years(app, student):
+    class_obj = Class.query.first()
+    for year in (2024, 2025):
+        db.session.add(Registration(student_id=student.id, class_id=class_obj.id,
+                                    year=year, month=1, fee=200.0))
+    db.session.commit()
+    assert Registration.query.count() == 2
+
+
+def test_year_defaults_to_the_current_term(app, student):
+    Setting.query.first().year = 2031
+    registration = Registration(student_id=student.id, class_id=Class.query.first().id,
+                                month=1, fee=200.0)
+    db.session.add(registration)
+    db.session.commit()
+    assert registration.year == 2031
+
+
+def test_year_default_reads_settings_once_per_statement(app, student):
+    statements = []
+    db.event.listen(db.engine, 'before_cursor_execute',
+                    lambda conn, cursor, statement, *args: statements.append(statement))
+    class_obj = Class.query.first()
+    db.session.add_all([Registration(student_id=student.id, class_id=class_obj.id, month=month, fee=200.0)
+                        for month in (1, 2, 3)])
+    db.session.commit()
+    assert sum('FROM settings' in statement for statement in statements) == 1
+
+
+def test_archive_year_moves_rows_in_batches(app, student):
+    classes = Class.query.all()
+    for class_obj in classes:
+        for month in (1, 2):
+            db.session.add(Registration(student_id=student.id, class_id=class_obj.id,
+                                        year=2024, month=month, fee=200.0))
+    db.session.add(Registration(student_id=student.id, class_id=classes[0].id,
+                                year=2025, month=1, fee=200.0))
+    db.session.add(ClassSeat(class_id=classes[0].id, year=2024, month=1, taken=1))
+    db.session.commit()
+
+    batches = []
+    moved = archive_year(2024, batch_size=3, progress=batches.append)
+
+    assert moved == 8
+    assert batches == [3, 6, 8]
+    assert Registration.query.count() == 1
+    assert RegistrationArchive.query.filter_by(year=2024).count() == 8
+    assert ClassSeat.query.count() == 0
@@ -0,0 +1,35 @@
+import gzip
+import shutil
+
+from flask import url_for
+
+from app import assets
+
+
+def test_hashed_assets_served_immutable_and_precompressed(app, tmp_path):
+    static_dir = tmp_path / 'static'
+    shutil.copytree(assets.STATIC_DIR, static_dir,
+                    ignore=shutil.ignore_patterns(assets.DIST_DIR))
+    manifest = assets.build_assets(str(static_dir))
+
+    hashed = manifest['css/style.css']
+    assert hashed.startswith('dist/css/style.') and hashed.endswith('.css')
+    with open(static_dir / (hashed + '.gz'), 'rb') as f:
+        assert gzip.decompress(f.read()) == (static_dir / 'css' / 'style.css').read_bytes()
+
+    app.static_folder = str(static_dir)
+    assets.init_app(app)
+    with app.test_request_context():
+        url = url_for('static', filename='css/style.css')
+    assert url == f'/static/{hashed}'
+
+    client = app.test_client()
+    response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'immutable' in response.headers['Cache-Control']
+    assert response.mimetype == 'text/css'
+
+    plain = client.get(url)
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.data == (static_dir / 'css' / 'style.css').read_bytes()
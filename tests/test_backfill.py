@@ -0,0 +1,61 @@
+import pytest
+import sqlalchemy as sa
+
+from app import db
+from app.backfill import backfill, progress_rows
+from app.models import Class, Registration
+
+
+@pytest.fixture
+def autocommit(app):
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        yield connection
+
+
+def add_registrations(student, count):
+    class_obj = Class.query.first()
+    for i in range(count):
+        db.session.add(Registration(student_id=student.id, class_id=class_obj.id,
+                                    year=2000 + i, month=1, fee=0))
+    db.session.commit()
+
+
+def test_backfill_updates_in_chunks_and_records_progress(app, student, autocommit):
+    add_registrations(student, 7)
+
+    result = backfill(autocommit, 'set_fee', 'registrations', values={'fee': 100},
+                      where=sa.text('fee = 0'), chunk_size=3)
+
+    assert (result.rows, result.chunks) == (7, 3)
+    db.session.expire_all()
+    assert {r.fee for r in Registration.query.all()} == {100}
+    (row,) = progress_rows(autocommit)
+    assert (row.name, row.rows_done, row.finished) == ('set_fee', 7, True)
+
+
+def test_backfill_resumes_after_last_chunk(app, student, autocommit):
+    add_registrations(student, 6)
+    ids = sorted(r.id for r in Registration.query.all())
+    backfill(autocommit, 'set_fee', 'registrations', values={'fee': 100},
+             where=sa.text('fee = 0'), chunk_size=3)
+    # Simulate a crash after the first chunk
+    autocommit.execute(sa.text("UPDATE backfill_progress SET finished = 0, "
+                               "last_id = :last, rows_done = 3"), {'last': ids[2]})
+    autocommit.execute(sa.text('UPDATE registrations SET fee = 0 WHERE id > :last'),
+                       {'last': ids[2]})
+
+    result = backfill(autocommit, 'set_fee', 'registrations', values={'fee': 100},
+                      where=sa.text('fee = 0'), chunk_size=3)
+
+    assert (result.rows, result.chunks) == (6, 1)
+
+
+def test_dry_run_only_estimates(app, student, autocommit):
+    add_registrations(student, 5)
+
+    estimate = backfill(autocommit, 'set_fee', 'registrations', values={'fee': 100},
+                        where=sa.text('fee = 0'), chunk_size=2, dry_run=True)
+
+    assert (estimate.rows, estimate.chunks, estimate.dry_run) == (5, 3, True)
+    db.session.expire_all()
+    assert {r.fee for r in Registration.query.all()} == {0}
@@ -0,0 +1,64 @@
+from sqlalchemy import false, select
+
+from app import db, registrations
+from app.models import Class, Registration, Setting
+from app.registrations import register_many
+
+from conftest import login
+
+
+def test_register_many_skips_duplicates_and_waitlists(app, student):
+    year = Setting.get_current_year()
+    monday, wednesday = Class.query.filter(Class.class_no.in_([101, 201])).order_by(Class.class_no)
+    wednesday.capacity = 0
+    db.session.add(Registration(student_id=student.id, class_id=monday.id,
+                                year=year, month=1, fee=1.0))
+    db.session.commit()
+
+    results = register_many(student, [monday.id, wednesday.id, 999], [1, 2], year)
+    db.session.commit()
+
+    outcomes = {(r.class_obj.class_no if r.class_obj else None, r.month): r.outcome for r in results}
+    assert outcomes == {
+        (101, 1): 'duplicate', (101, 2): 'pending',
+        (201, 1): 'waitlisted', (201, 2): 'waitlisted',
+        (None, 1): 'unknown', (None, 2): 'unknown',
+    }
+    assert Registration.query.count() == 4
+    assert all(r.fee > 0 for r in results if r.outcome == 'pending')
+
+
+def test_batch_form_redirects_with_summary(client, student):
+    login(client, 'student1', 'password123')
+    class_ids = [c.id for c in Class.query.filter(Class.class_no.in_([101, 102]))]
+
+    response = client.post('/student/register/batch',
+                           data={'class_ids': class_ids, 'months': [3, 4, 5]})
+
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith('/student/dashboard')
+    assert Registration.query.filter_by(student_id=student.id).count() == 6
+    assert b'6 registration request(s) submitted' in client.get('/student/dashboard').data
+
+    client.post('/student/register/batch', data={'class_ids': class_ids[:1], 'months': [3]})
+    assert b'Already registered: Monday Class 101 (March).' in client.get('/student/dashboard').data
+
+    again = client.post('/student/register/batch',
+                        data={'class_ids': class_ids, 'months': [3]},
+                        headers={'Accept': 'application/json'}).get_json()
+    assert [item['outcome'] for item in again] == ['duplicate', 'duplicate']
+
+
+def test_batch_form_handles_a_duplicate_made_concurrently(client, student, monkeypatch):
+    login(client, 'student1', 'password123')
+    class_id = Class.query.filter_by(class_no=101).first().id
+    client.post('/student/register/batch', data={'class_ids': [class_id], 'months': [3]})
+    # As if the other request inserted between the duplicate check and the flush
+    monkeypatch.setattr(registrations, 'select', lambda *cols: select(*cols).where(false()))
+
+    response = client.post('/student/register/batch', data={'class_ids': [class_id], 'months': [3, 4]})
+
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith('/student/register/batch')
+    assert Registration.query.filter_by(student_id=student.id).count() == 1
+    assert b'just made elsewhere' in client.get('/student/register/batch').data
@@ -0,0 +1,116 @@
+from app import db
+from app.models import Class, ClassSeat, Registration, User
+
+from conftest import login, make_student
+
+
+def register(client, username, class_obj, month=3):
+    login(client, username, 'password123')
+    response = client.post('/student/register', data={'class_id': class_obj.id, 'month': month})
+    client.get('/logout')
+    return response
+
+
+def test_full_class_waitlists_and_promotes(app, client):
+    class_obj = Class.query.filter_by(class_no=101).first()
+    class_obj.capacity = 1
+    db.session.commit()
+    first, second = make_student('first'), make_student('second')
+
+    register(client, 'first', class_obj)
+    register(client, 'second', class_obj)
+
+    assert Registration.query.filter_by(student_id=first.id).one().status == 'pending'
+    waiting = Registration.query.filter_by(student_id=second.id).one()
+    assert waiting.status == 'waitlisted'
+
+    login(client, 'first', 'password123')
+    held = Registration.query.filter_by(student_id=first.id).one()
+    client.post(f'/student/registration/{held.id}/cancel')
+
+    db.session.expire_all()
+    assert db.session.get(Registration, waiting.id).status == 'pending'
+    assert ClassSeat.query.filter_by(class_id=class_obj.id, month=3).one().taken == 1
+
+
+def test_claim_is_conditional(app):
+    class_obj = Class.query.first()
+    class_obj.capacity = 2
+
+    assert ClassSeat.claim(class_obj, 2026, 5)
+    assert ClassSeat.claim(class_obj, 2026, 5)
+    assert not ClassSeat.claim(class_obj, 2026, 5)
+    assert ClassSeat.claim(class_obj, 2026, 6)
+
+
+def test_unlimited_class_needs_no_counter(app):
+    class_obj = Class.query.first()
+    assert ClassSeat.claim(class_obj, 2026, 5)
+    assert ClassSeat.query.count() == 0
+
+
+def test_bulk_delete_students_hands_seats_to_waitlist(app, client):
+    class_obj = Class.query.filter_by(class_no=101).first()
+    class_obj.capacity = 2
+    db.session.commit()
+    first, second, third = make_student('first'), make_student('second'), make_student('third')
+    for username in ('first', 'second', 'third'):
+        register(client, username, class_obj)
+
+    login(client, 'admin', 'admin123')
+    response = client.post('/admin/students/delete',
+                           data={'student_ids': [first.id, second.id]})
+
+    assert response.status_code == 302
+    db.session.expire_all()
+    assert [r.student_id for r in Registration.query.all()] == [third.id]
+    assert Registration.query.one().status == 'pending'
+    assert ClassSeat.query.filter_by(class_id=class_obj.id, month=3).one().taken == 1
+    assert User.query.filter(User.username.in_(['first', 'second'])).count() == 0
+
+
+def test_capacity_on_class_with_registrations_counts_them(app, client):
+    class_obj = Class.query.filter_by(class_no=101).first()
+    for username in ('first', 'second', 'third'):
+        make_student(username)
+        register(client, username, class_obj)
+
+    login(client, 'admin', 'admin123')
+    client.post(f'/admin/classes/{class_obj.id}/edit', data={
+        'class_no': class_obj.class_no, 'day_of_week': class_obj.day_of_week,
+        'start_time': class_obj.start_time.strftime('%H:%M'),
+        'end_time': class_obj.end_time.strftime('%H:%M'),
+        'teacher': class_obj.teacher, 'capacity': 3})
+    client.get('/logout')
+
+    assert ClassSeat.query.filter_by(class_id=class_obj.id, month=3).one().taken == 3
+    late = make_student('late')
+    register(client, 'late', class_obj)
+    assert Registration.query.filter_by(student_id=late.id).one().status == 'waitlisted'
+
+
+def test_first_claim_counts_existing_registrations(app, client):
+    class_obj = Class.query.filter_by(class_no=101).first()
+    make_student('first')
+    register(client, 'first', class_obj)
+
+    class_obj.capacity = 1
+    assert not ClassSeat.claim(class_obj, Registration.query.one().year, 3)
+
+
+def test_approving_waitlisted_needs_a_free_seat(app, client):
+    class_obj = Class.query.filter_by(class_no=101).first()
+    class_obj.capacity = 1
+    db.session.commit()
+    make_student('first')
+    second = make_student('second')
+    register(client, 'first', class_obj)
+    register(client, 'second', class_obj)
+    waiting = Registration.query.filter_by(student_id=second.id).one()
+
+    login(client, 'admin', 'admin123')
+    client.post(f'/admin/registrations/{waiting.id}/approve')
+
+    db.session.expire_all()
+    assert db.session.get(Registration, waiting.id).status == 'waitlisted'
+    assert ClassSeat.query.filter_by(class_id=class_obj.id, month=3).one().taken == 1
@@ -0,0 +1,109 @@
+import json
+
+from app import db
+from app.changefeed import change_feed, current_version, events_after, stream
+from app.models import Class, Registration, RegistrationEvent, Setting
+
+from conftest import login
+
+
+def _register(student, month=1, status='pending'):
+    class_obj = Class.query.filter_by(class_no=101).first()
+    registration = Registration(student_id=student.id, class_id=class_obj.id,
+                                year=Setting.get_current_year(), month=month, fee=40.0, status=status)
+    db.session.add(registration)
+    db.session.commit()
+    return registration
+
+
+def test_changes_are_recorded_as_versioned_events(app, student):
+    start = current_version()
+    registration = _register(student)
+    registration_id = registration.id
+    registration.status = 'approved'
+    db.session.commit()
+    db.session.delete(registration)
+    db.session.commit()
+    db.session.execute(db.update(Registration).values(fee=10.0))
+    db.session.commit()
+
+    events = events_after(start)
+    assert [(e['kind'], e['registration_id']) for e in events] == [
+        ('new', registration_id), ('approved', registration_id),
+        ('cancelled', registration_id), ('bulk', None)]
+    assert events[0]['registration'] is None  # cancelled since
+    assert current_version() == events[-1]['id']
+    assert events_after(current_version()) == []
+
+
+def test_stream_sends_events_after_version(app, student):
+    start = current_version()
+    registration = _register(student)
+
+    ticks = iter([0, 0, 10])
+    messages = list(stream(start, poll_seconds=0, max_seconds=5, clock=lambda: next(ticks)))
+
+    assert messages[0] == 'retry: 0\n\n'
+    event_id, kind, data = messages[1].strip().split('\n')
+    payload = json.loads(data[len('data: '):])
+    assert kind == 'event: new' and event_id == f'id: {payload["id"]}'
+    assert payload['registration']['student_name'] == 'Student One'
+    assert payload['registration']['month_name'] == 'January'
+    assert messages[2:] == [': keepalive\n\n']
+
+
+def test_events_endpoint_resumes_from_last_event_id(app, client, student):
+    app.config['SSE_MAX_SECONDS'] = 0
+    first = _register(student, month=1)
+    version = current_version()
+    _register(student, month=2)
+    assert client.get('/admin/registrations/events').status_code == 302
+
+    login(client, 'admin', 'admin123')
+    page = client.get('/admin/registrations?status=pending')
+    assert f'since={current_version()}'.encode() in page.data
+    assert f'data-registration-id="{first.id}"'.encode() in page.data
+
+    response = client.get('/admin/registrations/events', headers={'Last-Event-ID': str(version)})
+    assert response.mimetype == 'text/event-stream'
+    body = response.get_data(as_text=True)
+    assert body.count('event: new') == 1
+    assert '"month_name": "February"' in body
+
+
+def test_stream_sends_events_committed_behind_its_version(app):
+    start = current_version()
+    db.session.add(RegistrationEvent(id=start + 2, kind='bulk'))
+    db.session.commit()
+
+    ticks = iter([0, 0, 1, 10])
+    messages = stream(start, poll_seconds=0, max_seconds=5, clock=lambda: next(ticks))
+    assert next(messages).startswith('retry:')
+    assert next(messages).startswith(f'id: {start + 2}\n')
+
+    # An earlier id whose transaction commits late is still sent, without moving Last-Event-ID back
+    db.session.add(RegistrationEvent(id=start + 1, kind='bulk'))
+    db.session.commit()
+    late = next(messages)
+    assert late.startswith('event: bulk\n') and f'"id": {start + 1}' in late
+    assert list(messages) == [': keepalive\n\n']
+
+
+def test_streams_per_worker_are_capped(app, client):
+    app.config.update(SSE_MAX_SECONDS=0, SSE_MAX_STREAMS=1)
+    login(client, 'admin', 'admin123')
+
+    close_stream = change_feed.open_stream(1)
+    try:
+        busy = client.get('/admin/registrations/events')
+    finally:
+        close_stream()
+        close_stream()
+    assert busy.mimetype == 'text/event-stream'
+    assert busy.get_data(as_text=True) == 'retry: 30000\n\n'
+    assert change_feed.streams == 0
+
+    served = client.get('/admin/registrations/events')
+    assert ': keepalive' in served.get_data(as_text=True)
+    served.close()
+    assert change_feed.streams == 0
@@ -0,0 +1,56 @@
+import gzip
+import zlib
+
+from flask import Response
+
+
+def test_large_html_is_gzipped(app, client):
+    @app.route('/_big')
+    def big():
+        return '<tr><td>row</td></tr>' * 500
+
+    response = client.get('/_big', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert gzip.decompress(response.data) == b'<tr><td>row</td></tr>' * 500
+
+
+def test_small_or_unaccepted_responses_untouched(app, client):
+    @app.route('/_big')
+    def big():
+        return 'x' * 5000
+
+    assert 'Content-Encoding' not in client.get('/_big').headers
+    assert 'Content-Encoding' not in client.get(
+        '/health/live', headers={'Accept-Encoding': 'gzip'}).headers
+
+
+def test_streamed_response_compressed_incrementally(app, client):
+    @app.route('/_stream')
+    def stream():
+        return Response((f'line {i}\n' for i in range(1000)), mimetype='text/plain')
+
+    response = client.get('/_stream', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    assert gzip.decompress(response.data).startswith(b'line 0\nline 1\n')
+
+
+def test_streamed_chunks_decode_before_the_stream_ends(app, client):
+    produced = []
+
+    def lines():
+        for i in range(3):
+            produced.append(i)
+            yield f'line {i}\n'
+
+    @app.route('/_stream')
+    def stream():
+        return Response(lines(), mimetype='text/plain')
+
+    response = client.get('/_stream', headers={'Accept-Encoding': 'gzip'}, buffered=False)
+    decoder = zlib.decompressobj(31)
+    first = decoder.decompress(next(response.response))
+    assert first == b'line 0\n'
+    assert produced == [0]
+    response.close()
@@ -0,0 +1,48 @@
+import pytest
+
+from app import db
+from app.fees import calculate_fee, count_sessions, reprice_unsettled, session_count_expr
+from app.models import Class, Registration, Setting
+
+
+@pytest.mark.parametrize('month', range(1, 13))
+def test_sql_session_count_matches_calendar(app, month):
+    year = Setting.get_current_year()
+    for class_obj in Class.query.all():
+        count = db.session.scalar(
+            db.select(session_count_expr(year, db.literal(month), Class.day_of_week))
+            .where(Class.id == class_obj.id))
+        assert count == count_sessions(year, month, class_obj.day_of_week)
+
+
+def test_reprice_updates_only_unsettled(app, student):
+    classes = Class.query.all()
+    for month, status in ((1, 'pending'), (2, 'approved'), (3, 'waitlisted')):
+        db.session.add(Registration(student_id=student.id, class_id=classes[0].id,
+                                    month=month, fee=1.0, status=status))
+    db.session.commit()
+
+    assert reprice_unsettled(fee_per_session=80.0) == 2
+    db.session.commit()
+
+    fees = {r.month: r.fee for r in Registration.query.all()}
+    assert fees[1] == calculate_fee(classes[0], 1, fee_per_session=80.0)
+    assert fees[2] == 1.0
+    assert fees[3] == calculate_fee(classes[0], 3, fee_per_session=80.0)
+    assert reprice_unsettled(fee_per_session=80.0) == 0
+
+
+def test_reprice_covers_renewals_into_next_year(app, student):
+    class_obj = Class.query.first()
+    year = Setting.get_current_year()
+    for term, status in ((year - 1, 'pending'), (year, 'pending'), (year + 1, 'waitlisted')):
+        db.session.add(Registration(student_id=student.id, class_id=class_obj.id,
+                                    year=term, month=1, fee=1.0, status=status))
+    db.session.commit()
+
+    assert reprice_unsettled(fee_per_session=80.0) == 2
+    db.session.commit()
+
+    fees = {r.year: r.fee for r in Registration.query.all()}
+    assert fees[year - 1] == 1.0
+    assert fees[year + 1] == calculate_fee(class_obj, 1, year=year + 1, fee_per_session=80.0)
@@ -0,0 +1,60 @@
+from unittest import mock
+
+from app import create_app, db
+from app.config import SQLiteTestingConfig, config
+from app.health import HealthProbe
+
+
+def test_liveness_does_no_io(client):
+    with mock.patch.object(db.engine, 'connect') as connect:
+        response = client.get('/health/live')
+    assert response.status_code == 200
+    connect.assert_not_called()
+
+
+def test_readiness_is_cached(app, client):
+    assert client.get('/health/ready').status_code == 200
+
+    with mock.patch.object(db.engine, 'connect') as connect:
+        response = client.get('/health')
+    assert response.status_code == 200
+    assert response.get_json()['database'] == 'connected'
+    connect.assert_not_called()
+
+
+def test_readiness_reports_database_failure(app, client):
+    probe = app.extensions['health_probe']
+    with mock.patch.object(db.engine, 'connect', side_effect=Exception('down')):
+        probe.refresh()
+
+    response = client.get('/health/ready')
+    assert response.status_code == 503
+    assert response.get_json()['database'] == 'disconnected'
+    assert client.get('/health').status_code == 503
+
+
+def test_container_health_ignores_migration_state(app, client):
+    probe = app.extensions['health_probe']
+    with mock.patch.object(HealthProbe, '_current_revision', return_value=None):
+        probe._head = 'abc123'
+        probe.refresh()
+
+    assert client.get('/health/ready').status_code == 503
+    response = client.get('/health')
+    assert response.status_code == 200
+    assert response.get_json()['database'] == 'connected'
+
+
+def test_probe_thread_starts_with_first_request(monkeypatch):
+    class ProbedConfig(SQLiteTestingConfig):
+        HEALTH_PROBE_ENABLED = True
+
+    monkeypatch.setitem(config, 'probed-testing', ProbedConfig)
+    with mock.patch.object(HealthProbe, '_run'):
+        app = create_app('probed-testing')
+        probe = app.extensions['health_probe']
+        # Creating the app (as CLI commands do) starts nothing
+        assert probe._thread is None
+
+        app.test_client().get('/health/live')
+        assert probe._thread is not None
@@ -0,0 +1,71 @@
+import io
+
+from app import db
+from app.importer import import_registrations
+from app.models import Class, ClassSeat, Registration
+
+from conftest import login, make_student
+
+CSV = """username,class_no,day_of_week,month,status
+student1,101,Monday,3,
+student1,101,monday,March,
+student1,201,wednesday,3,approved
+nobody,101,monday,3,
+student1,999,monday,3,
+student1,101,monday,13,
+"""
+
+
+def test_import_resolves_prices_and_reports(app, student):
+    class_obj = Class.query.filter_by(class_no=201).first()
+    class_obj.capacity = 5
+    db.session.commit()
+
+    report = import_registrations(io.StringIO(CSV), year=2026, chunk_size=2)
+
+    assert report.inserted == 2
+    assert report.duplicates == [3]
+    assert [line for line, _ in report.errors] == [5, 6, 7]
+    approved = Registration.query.filter_by(status='approved').one()
+    assert approved.year == 2026 and approved.fee > 0
+    assert ClassSeat.query.filter_by(class_id=class_obj.id, year=2026, month=3).one().taken == 1
+
+
+def test_reimport_only_reports_duplicates(app, student):
+    import_registrations(io.StringIO(CSV), year=2026)
+
+    report = import_registrations(io.StringIO(CSV), year=2026)
+
+    assert report.inserted == 0
+    assert sorted(report.duplicates) == [2, 3, 4]
+    assert Registration.query.count() == 2
+
+
+def test_admin_upload(client, student):
+    make_student('student2')
+    login(client, 'admin', 'admin123')
+    data = {'status': 'pending',
+            'csv_file': (io.BytesIO(b'username,class_no,day_of_week,month\nstudent2,102,monday,5\n'),
+                         'term.csv')}
+
+    response = client.post('/admin/registrations/import', data=data,
+                           content_type='multipart/form-data')
+
+    assert b'1 imported, 0 skipped' in response.data
+    assert Registration.query.count() == 1
+
+
+def test_admin_upload_reports_rows_that_are_not_utf8(client, student):
+    make_student('student2')
+    login(client, 'admin', 'admin123')
+    # Saved by Excel as cp1252: the second row has an e-acute
+    csv_bytes = 'username,class_no,day_of_week,month\nstudent2,102,monday,5\nstudent2,102,monday,Février\n'
+    data = {'status': 'pending', 'csv_file': (io.BytesIO(csv_bytes.encode('cp1252')), 'term.csv')}
+
+    response = client.post('/admin/registrations/import', data=data,
+                           content_type='multipart/form-data')
+
+    assert response.status_code == 200
+    assert b'1 imported, 1 skipped' in response.data
+    assert b'not UTF-8' in response.data
+    assert Registration.query.count() == 1
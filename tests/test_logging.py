@@ -0,0 +1,36 @@
+import json
+import logging
+
+from app.logging_setup import EndpointSamplingFilter, JsonFormatter, RequestContextFilter
+
+
+def test_request_id_header(client):
+    response = client.get('/health/live', headers={'X-Request-ID': 'abc123'})
+    assert response.headers['X-Request-ID'] == 'abc123'
+    assert client.get('/health/live').headers['X-Request-ID']
+
+
+def test_json_record_carries_request_context(app):
+    record = logging.LogRecord('app', logging.INFO, __file__, 1, 'hello %s', ('world',), None)
+    with app.test_request_context('/health/live'):
+        app.preprocess_request()
+        RequestContextFilter().filter(record)
+
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry['message'] == 'hello world'
+    assert entry['endpoint'] == 'health.live'
+    assert entry['request_id']
+    assert entry['user_id'] is None
+
+
+def test_debug_sampling_per_endpoint():
+    sampler = EndpointSamplingFilter({'health.ready': 0.0})
+    record = logging.LogRecord('app', logging.DEBUG, __file__, 1, 'noisy', None, None)
+
+    record.endpoint = 'health.ready'
+    assert not sampler.filter(record)
+    record.levelno = logging.WARNING
+    assert sampler.filter(record)
+
+    record.levelno, record.endpoint = logging.DEBUG, 'admin.dashboard'
+    assert sampler.filter(record)
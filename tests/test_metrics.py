@@ -0,0 +1,60 @@
+from app import create_app, db
+from app.config import SQLiteTestingConfig, config
+from app.metrics import SnapshotCache, business_snapshot
+from app.models import Class, Registration
+
+from conftest import make_student
+
+
+def _register(student, class_no, month, status):
+    class_obj = Class.query.filter_by(class_no=class_no).first()
+    db.session.add(Registration(student_id=student.id, class_id=class_obj.id,
+                                year=2026, month=month, fee=1.0, status=status))
+
+
+def test_business_snapshot_counts(app, student):
+    _register(student, 101, 1, 'pending')
+    _register(student, 101, 2, 'pending')
+    _register(student, 201, 1, 'approved')
+    db.session.commit()
+
+    assert business_snapshot() == {
+        'students': 1,
+        'classes': 4,
+        'registrations': {'pending': 2, 'approved': 1, 'waitlisted': 0, 'rejected': 0},
+    }
+
+
+def test_snapshot_cache_is_shared_through_the_file(app, student, tmp_path):
+    path = str(tmp_path / 'business_metrics.json')
+    assert SnapshotCache(path, 60).get()['registrations']['pending'] == 0
+
+    _register(student, 101, 1, 'pending')
+    db.session.commit()
+
+    # A second worker reads the first one's snapshot until it expires
+    assert SnapshotCache(path, 60).get()['registrations']['pending'] == 0
+    assert SnapshotCache(path, 0).get()['registrations']['pending'] == 1
+
+
+def test_metrics_endpoint_exposes_gauges(monkeypatch, tmp_path):
+    class MetricsConfig(SQLiteTestingConfig):
+        METRICS_CACHE_FILE = str(tmp_path / 'business_metrics.json')
+
+    monkeypatch.setitem(config, 'metrics-testing', MetricsConfig)
+    app = create_app('metrics-testing')
+    with app.app_context():
+        _register(make_student('student1'), 101, 1, 'pending')
+        db.session.commit()
+
+        response = app.test_client().get('/metrics')
+        db.session.remove()
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    output = response.get_data(as_text=True)
+    assert 'app_pending_registrations 1.0' in output
+    assert 'app_registrations{status="approved"} 0.0' in output
+    assert 'app_classes 4.0' in output
+    # Counters from the other modules are on the same page
+    assert 'app_login_rate_limited_total' in output
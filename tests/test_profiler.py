@@ -0,0 +1,74 @@
+import pytest
+
+from app import create_app, db
+from app.config import SQLiteTestingConfig, config
+from app.models import Class, Registration
+from app.profiler import _active, load_report, redact_parameters
+
+from conftest import login, make_student
+
+
+@pytest.fixture
+def profiled_client(monkeypatch, tmp_path):
+    class ProfiledConfig(SQLiteTestingConfig):
+        PROFILER_QUERY_PARAM = '_profile'
+        PROFILER_DIR = str(tmp_path)
+
+    monkeypatch.setitem(config, 'profiled-testing', ProfiledConfig)
+    app = create_app('profiled-testing')
+    with app.app_context():
+        yield app.test_client()
+        db.session.remove()
+
+
+def test_admin_query_param_stores_report(profiled_client):
+    student = make_student('student1')
+    class_obj = Class.query.first()
+    db.session.add(Registration(student_id=student.id, class_id=class_obj.id,
+                                month=1, fee=200.0))
+    db.session.commit()
+    login(profiled_client, 'admin', 'admin123')
+
+    response = profiled_client.get('/admin/dashboard?_profile')
+    report_id = response.headers['X-Profile-Id']
+
+    detail = profiled_client.get(f'/admin/profiles/{report_id}')
+    assert detail.status_code == 200
+    assert b'SELECT' in detail.data
+    # Lazy loads are attributed to the template line that triggered them
+    call_sites = [q['call_site'] or '' for q in load_report(report_id)['queries']]
+    assert any(site.startswith('app/templates/admin/dashboard.html:') for site in call_sites)
+    # Bound values such as the admin's user id are not stored, only their types
+    parameters = ''.join(q['parameters'] for q in load_report(report_id)['queries'])
+    assert 'int' in parameters and not any(char.isdigit() for char in parameters)
+
+    download = profiled_client.get(f'/admin/profiles/{report_id}.prof')
+    assert download.status_code == 200
+    assert download.headers['Content-Disposition'].startswith('attachment')
+    assert report_id.encode() in profiled_client.get('/admin/profiles').data
+
+
+def test_students_cannot_profile(profiled_client):
+    make_student('student1')
+    login(profiled_client, 'student1', 'password123')
+    assert 'X-Profile-Id' not in profiled_client.get('/student/dashboard?_profile').headers
+
+
+def test_redact_parameters_keeps_only_types():
+    assert redact_parameters((1, 'secret')) == '(int, str)'
+    assert redact_parameters({'password': 'secret'}) == '{password: str}'
+    assert redact_parameters([(1, 'a'), (2, 'b')]) == '2 x (int, str)'
+
+
+def test_concurrent_request_is_not_profiled(profiled_client):
+    login(profiled_client, 'admin', 'admin123')
+    with _active:
+        response = profiled_client.get('/admin/dashboard?_profile')
+    assert response.status_code == 200
+    assert 'X-Profile-Id' not in response.headers
+    assert 'X-Profile-Id' in profiled_client.get('/admin/dashboard?_profile').headers
+
+
+def test_switched_off_by_default_installs_no_hooks(app):
+    hooks = [f.__name__ for f in app.before_request_funcs[None]]
+    assert 'start_profile' not in hooks
@@ -0,0 +1,114 @@
+import pytest
+
+from app import create_app, db
+from app.config import SQLiteTestingConfig, config
+from app.models import User
+from app.ratelimit import Bucket, TokenBucketStore
+
+from conftest import make_student
+
+
+class RateLimitedConfig(SQLiteTestingConfig):
+    LOGIN_RATE_LIMIT_ENABLED = True
+    LOGIN_RATE_LIMIT_IP = (5, 60)
+    LOGIN_RATE_LIMIT_USERNAME = (2, 60)
+
+
+@pytest.fixture
+def limited_app(monkeypatch, tmp_path):
+    monkeypatch.setattr(RateLimitedConfig, 'LOGIN_RATE_LIMIT_STORE',
+                        str(tmp_path / 'ratelimit.sqlite'), raising=False)
+    monkeypatch.setitem(config, 'ratelimit-testing', RateLimitedConfig)
+    app = create_app('ratelimit-testing')
+    with app.app_context():
+        yield app
+        db.session.remove()
+
+
+def test_token_bucket_refills_and_is_shared(tmp_path):
+    path = str(tmp_path / 'buckets.sqlite')
+    first, second = TokenBucketStore(path), TokenBucketStore(path)
+    buckets = {'ip:1.2.3.4': Bucket(2, 1.0)}
+
+    assert first.take(buckets, now=100.0) is None
+    assert second.take(buckets, now=100.0) is None
+    key, retry_after = first.take(buckets, now=100.5)
+    assert key == 'ip:1.2.3.4' and retry_after == pytest.approx(0.5)
+    assert second.take(buckets, now=101.0) is None
+
+
+def test_empty_bucket_takes_nothing_from_the_other(tmp_path):
+    store = TokenBucketStore(str(tmp_path / 'buckets.sqlite'))
+    ip, user = Bucket(1, 1.0), Bucket(5, 1.0)
+
+    assert store.take({'ip:a': ip, 'username:bob': user}, now=0.0) is None
+    assert store.take({'ip:a': ip, 'username:bob': user}, now=0.0)[0] == 'ip:a'
+    # bob's bucket only paid for the allowed attempt
+    for _ in range(4):
+        assert store.take({'ip:b': Bucket(10, 1.0), 'username:bob': user}, now=0.0) is None
+
+
+def test_login_flood_is_refused_before_password_check(limited_app, monkeypatch):
+    make_student('student1')
+    client = limited_app.test_client()
+    checks = []
+    verify = User.verify_password
+    monkeypatch.setattr(User, 'verify_password', lambda self, pw: checks.append(pw) or verify(self, pw))
+
+    for _ in range(2):
+        assert client.post('/login', data={'username': 'student1', 'password': 'wrong'}).status_code == 200
+    response = client.post('/login', data={'username': 'Student1', 'password': 'password123'})
+
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    assert b'Too many login attempts' in response.data
+    assert checks == ['wrong', 'wrong']
+
+    # Another username from the same IP still gets through until the IP bucket is empty
+    assert client.post('/login', data={'username': 'admin', 'password': 'wrong'}).status_code == 200
+
+
+def test_failures_from_one_ip_do_not_lock_the_user_out_elsewhere(limited_app):
+    make_student('student1')
+    attacker = limited_app.test_client()
+    for _ in range(3):
+        attacker.post('/login', data={'username': 'student1', 'password': 'wrong'})
+    assert attacker.post('/login', data={'username': 'student1', 'password': 'password123'}).status_code == 429
+
+    owner = limited_app.test_client()
+    response = owner.post('/login', data={'username': 'student1', 'password': 'password123'},
+                          environ_base={'REMOTE_ADDR': '10.0.0.2'})
+    assert response.status_code == 302
+
+
+def test_successful_logins_do_not_drain_the_username_bucket(limited_app):
+    make_student('student1')
+    for _ in range(3):
+        client = limited_app.test_client()
+        assert client.post('/login', data={'username': 'student1', 'password': 'password123'}).status_code == 302
+
+
+class ProxiedConfig(RateLimitedConfig):
+    PROXY_FIX_X_FOR = 1
+
+
+def test_forwarded_client_ip_is_used_behind_a_proxy(monkeypatch, tmp_path):
+    monkeypatch.setattr(ProxiedConfig, 'LOGIN_RATE_LIMIT_STORE',
+                        str(tmp_path / 'ratelimit.sqlite'), raising=False)
+    monkeypatch.setitem(config, 'proxied-testing', ProxiedConfig)
+    app = create_app('proxied-testing')
+    with app.app_context():
+        make_student('student1')
+        client = app.test_client()
+        # Every request comes from the proxy; only the forwarded IPs differ
+        for n in range(5):
+            client.post('/login', data={'username': f'nobody{n}', 'password': 'wrong'},
+                        headers={'X-Forwarded-For': '203.0.113.1'})
+        refused = client.post('/login', data={'username': 'student1', 'password': 'password123'},
+                              headers={'X-Forwarded-For': '203.0.113.1'})
+        allowed = client.post('/login', data={'username': 'student1', 'password': 'password123'},
+                              headers={'X-Forwarded-For': '203.0.113.2'})
+        db.session.remove()
+
+    assert refused.status_code == 429
+    assert allowed.status_code == 302
@@ -0,0 +1,46 @@
+from app import db
+from app.models import Class, Registration
+from app.readmodels import RegistrationRow, registration_rows, student_rows
+
+from conftest import login, make_student
+
+
+def add_registration(student, class_obj, month, status='pending'):
+    db.session.add(Registration(student_id=student.id, class_id=class_obj.id,
+                                month=month, fee=200.0, status=status))
+    db.session.commit()
+
+
+def test_registration_rows_carry_joined_names(app, student):
+    class_obj = Class.query.first()
+    add_registration(student, class_obj, 3)
+
+    (row,) = registration_rows(Registration.student_id == student.id)
+
+    assert isinstance(row, RegistrationRow)
+    assert (row.student_name, row.class_no, row.month_name) == ('Student One', class_obj.class_no, 'March')
+    assert row.time_display == class_obj.time_display
+    assert not hasattr(row, '__dict__')
+
+
+def test_student_rows_count_registrations(app, student):
+    other = make_student('student2', name='Another Student')
+    classes = Class.query.all()
+    add_registration(student, classes[0], 1)
+    add_registration(student, classes[1], 1)
+
+    rows = student_rows()
+
+    assert [(r.name, r.registration_count) for r in rows] == [('Another Student', 0), ('Student One', 2)]
+    assert [r.id for r in student_rows([other.id])] == [other.id]
+
+
+def test_admin_pages_render_from_rows(client, student):
+    add_registration(student, Class.query.first(), 5, status='waitlisted')
+    login(client, 'admin', 'admin123')
+
+    assert b'Student One' in client.get('/admin/registrations?status=waitlisted').data
+    assert b'1 classes' in client.get('/admin/students').data
+    detail = client.get(f'/admin/students/{student.id}')
+    assert b'student1@example.com' in detail.data and b'May' in detail.data
+    assert client.get('/admin/students/999').status_code == 404
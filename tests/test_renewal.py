@@ -0,0 +1,61 @@
+from datetime import date
+
+from app import db
+from app.fees import count_sessions
+from app.models import Class, ClassSeat, Registration, Setting
+from app.renewal import RenewalScheduler, renew_month
+
+from conftest import make_student
+
+
+def _register(student, class_obj, year, month, status='approved'):
+    db.session.add(Registration(student_id=student.id, class_id=class_obj.id,
+                                year=year, month=month, fee=1.0, status=status))
+
+
+def test_renew_month_copies_approved_pairs_once(app, student):
+    monday, wednesday, friday = Class.query.filter(
+        Class.class_no.in_([101, 201, 301])).order_by(Class.class_no)
+    _register(student, monday, 2026, 12)
+    _register(student, wednesday, 2026, 12, status='pending')
+    _register(student, friday, 2026, 12)
+    _register(student, friday, 2027, 1, status='pending')
+    db.session.commit()
+
+    assert renew_month(2026, 12, fee_per_session=10.0) == (1, 0)
+    assert renew_month(2026, 12, fee_per_session=10.0) == (0, 0)
+
+    renewed = Registration.query.filter_by(year=2027, month=1).order_by(Registration.class_id).all()
+    assert [(r.class_obj.class_no, r.status) for r in renewed] == [(101, 'approved'), (301, 'pending')]
+    assert renewed[0].fee == count_sessions(2027, 1, 'monday') * 10.0
+    assert renewed[0].created_at is not None
+
+
+def test_renew_month_waitlists_full_classes(app, student):
+    monday = Class.query.filter_by(class_no=101).first()
+    monday.capacity = 1
+    other = make_student('student2')
+    _register(student, monday, 2026, 3)
+    _register(other, monday, 2026, 3)
+    db.session.commit()
+
+    assert renew_month(2026, 3, status='pending') == (1, 1)
+
+    statuses = {r.student_id: r.status for r in Registration.query.filter_by(month=4)}
+    assert statuses == {student.id: 'pending', other.id: 'waitlisted'}
+    assert ClassSeat.query.filter_by(class_id=monday.id, year=2026, month=4).one().taken == 1
+
+
+def test_scheduler_runs_from_renewal_day(app, student):
+    app.config['RENEWAL_DAY'] = 25
+    # The term from settings, not the calendar year
+    year = 2031
+    Setting.query.first().year = year
+    _register(student, Class.query.filter_by(class_no=101).first(), year, 5)
+    db.session.commit()
+    scheduler = RenewalScheduler(app)
+
+    assert scheduler.run_due(date(2030, 5, 24)) is None
+    assert scheduler.run_due(date(2030, 5, 25)) == (1, 0)
+    assert scheduler.run_due(date(2030, 5, 26)) is None
+    assert Registration.query.filter_by(year=year, month=6).count() == 1
@@ -0,0 +1,49 @@
+import pytest
+
+from app import create_app, db
+from app.config import SQLiteTestingConfig, config
+from app.models import Class, Setting
+
+from conftest import login
+
+
+@pytest.fixture
+def replica_app(monkeypatch, tmp_path):
+    """Primary and replica as two SQLite files (no replication between them)."""
+    class ReplicaTestingConfig(SQLiteTestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path}/primary.db'
+        SQLALCHEMY_BINDS = {'replica': f'sqlite:///{tmp_path}/replica.db'}
+
+    monkeypatch.setitem(config, 'replica-testing', ReplicaTestingConfig)
+    app = create_app('replica-testing')
+
+    @app.route('/_bind', methods=['GET', 'POST'])
+    def which_bind():
+        before = db.session.get_bind(Class).url.database
+        db.session.add(Setting(year=2000, fee_per_session=1.0))
+        db.session.flush()
+        after = db.session.get_bind(Class).url.database
+        db.session.rollback()
+        return f'{before} {after}'
+
+    return app
+
+
+def test_get_reads_from_replica_until_flush(replica_app):
+    before, after = replica_app.test_client().get('/_bind').text.split()
+    assert before.endswith('replica.db')
+    assert after.endswith('primary.db')
+
+
+def test_post_and_following_reads_use_primary(replica_app):
+    client = replica_app.test_client()
+    assert client.post('/_bind').text.split()[0].endswith('primary.db')
+
+    # Read-your-writes window after the POST
+    assert client.get('/_bind').text.split()[0].endswith('primary.db')
+
+
+def test_login_post_makes_user_sticky(replica_app):
+    client = replica_app.test_client()
+    login(client, 'admin', 'admin123')
+    assert client.get('/_bind').text.split()[0].endswith('primary.db')
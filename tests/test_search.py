@@ -0,0 +1,75 @@
+import time
+
+from app import db, search
+from app.search import StudentTrie, search_students
+
+from conftest import login, make_student
+
+
+def test_trie_prefix_and_multi_term():
+    trie = StudentTrie()
+    trie.add(1, 'Alice Walker', '0123456789', 'awalker', 'alice@example.com')
+    trie.add(2, 'Alicia Keys', '0987654321', 'akeys', 'keys@music.com')
+
+    assert trie.search(['ali']) == {1, 2}
+    assert trie.search(['ali', 'wal']) == {1}
+    assert trie.search(['music']) == {2}
+    assert trie.search(['0987']) == {2}
+    assert trie.search(['zed']) == set()
+
+
+def test_search_pages_are_bounded(app):
+    for i in range(5):
+        make_student(f'pupil{i}', name=f'Pupil {i}')
+
+    first, has_next = search_students('pupil', page=1, per_page=2)
+    assert [s.name for s in first] == ['Pupil 0', 'Pupil 1'] and has_next
+    last, has_next = search_students('pupil', page=3, per_page=2)
+    assert [s.name for s in last] == ['Pupil 4'] and not has_next
+
+    # New students show up without a restart
+    make_student('zelda', name='Zelda Pupil')
+    assert [s.name for s in search_students('zel')[0]] == ['Zelda Pupil']
+
+
+def test_search_endpoints(client, student):
+    login(client, 'admin', 'admin123')
+
+    suggestions = client.get('/admin/students/search.json?q=stud').get_json()
+    assert suggestions[0]['username'] == 'student1'
+
+    page = client.get('/admin/students/search?q=one')
+    assert page.status_code == 200
+    assert b'Student One' in page.data
+
+
+def test_search_orders_every_match_before_paging(app):
+    for i in reversed(range(5)):
+        make_student(f'pupil{i}', name=f'Pupil {i}')
+
+    students, has_next = search_students('pupil', page=2, per_page=2)
+    assert [s.name for s in students] == ['Pupil 2', 'Pupil 3'] and has_next
+    # The user comes with the student; the typeahead reads it for every hit
+    assert all('user' in s.__dict__ for s in students)
+
+
+def test_trie_is_rebuilt_after_commit_or_max_age(app, monkeypatch):
+    student = make_student('pupil0', name='Pupil Zero')
+    assert search_students('pupil')[0] == [student]
+
+    # A flush that is rolled back leaves the index alone
+    student.name = 'Renamed'
+    db.session.flush()
+    cached = search.trie_cache.get(db.engine, 60)
+    db.session.rollback()
+    assert search.trie_cache.get(db.engine, 60) is cached
+
+    student.name = 'Renamed'
+    db.session.commit()
+    assert search_students('renamed')[0] == [student]
+
+    # Changes from another worker show up once the trie is max_age old
+    cached = search.trie_cache.get(db.engine, 60)
+    later = time.monotonic() + 61
+    monkeypatch.setattr(search.time, 'monotonic', lambda: later)
+    assert search.trie_cache.get(db.engine, 60) is not cached
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from app import create_app, db, slowlog
+from app.config import SQLiteTestingConfig, config
+from app.models import Class, Registration
+
+from conftest import login, make_student
+
+
+@pytest.fixture
+def slow_log(monkeypatch, tmp_path):
+    path = tmp_path / 'slow.log'
+
+    class SlowLogTestingConfig(SQLiteTestingConfig):
+        # Every statement counts as slow
+        SLOW_QUERY_THRESHOLD_MS = 0
+        SLOW_QUERY_LOG = str(path)
+
+    monkeypatch.setitem(config, 'slowlog-testing', SlowLogTestingConfig)
+    app = create_app('slowlog-testing')
+    with app.app_context():
+        yield app, path
+        db.session.remove()
+
+
+def test_slow_queries_are_attributed_to_template_lines(slow_log):
+    app, path = slow_log
+    student = make_student('student1')
+    db.session.add(Registration(student_id=student.id, class_id=Class.query.first().id,
+                                month=1, fee=200.0))
+    db.session.commit()
+    client = app.test_client()
+    login(client, 'admin', 'admin123')
+
+    client.get('/admin/dashboard')
+    # Writes the queued lines
+    slowlog._stop_listener()
+
+    entries = [json.loads(line) for line in path.read_text().splitlines()]
+    from_view = [e for e in entries if e['endpoint'] == 'admin.dashboard']
+    assert from_view
+    assert all(e['statement'] and 'duration_ms' in e for e in from_view)
+    assert any(e['call_site'].startswith('app/templates/admin/dashboard.html:')
+               for e in from_view if e['call_site'])
+
+    # The login looked the user up by name; only the parameter's type is kept
+    from_login = [e for e in entries if e['endpoint'] == 'auth.login']
+    assert any('str' in e['parameters'] for e in from_login)
+    assert "'admin'" not in path.read_text()
@@ -0,0 +1,44 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import User, Class, Registration, Setting
+
+from conftest import login
+
+
+def test_schema_created_from_models(app):
+    """The SQLite profile builds the schema and seeds what init.sql would."""
+    assert Setting.query.count() == 1
+    assert Class.query.count() == 4
+    assert User.query.filter_by(username='admin', role='admin').first() is not None
+
+
+def test_foreign_keys_enforced(app, student):
+    """SQLite only checks foreign keys (and cascades) when switched on per connection."""
+    class_obj = Class.query.first()
+    db.session.add(Registration(student_id=student.id, class_id=class_obj.id,
+                                month=1, fee=200.0))
+    db.session.commit()
+
+    db.session.execute(db.text('DELETE FROM classes WHERE id = :id'), {'id': class_obj.id})
+    assert Registration.query.count() == 0
+
+    with pytest.raises(IntegrityError):
+        db.session.add(Registration(student_id=student.id, class_id=class_obj.id,
+                                    month=2, fee=200.0))
+        db.session.flush()
+    db.session.rollback()
+
+
+def test_student_can_register_in_process(client, student):
+    login(client, 'student1', 'password123')
+    class_obj = Class.query.filter_by(class_no=101).first()
+
+    response = client.post('/student/register',
+                           data={'class_id': class_obj.id, 'month': 3})
+
+    assert response.status_code == 302
+    registration = Registration.query.filter_by(student_id=student.id).one()
+    assert registration.status == 'pending'
+    assert registration.fee > 0
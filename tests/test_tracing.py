@@ -0,0 +1,76 @@
+import json
+
+import pytest
+from flask import g
+
+from app import create_app
+from app.config import SQLiteTestingConfig, config
+from app.models import Class
+
+from conftest import login, make_student
+
+
+class TracingConfig(SQLiteTestingConfig):
+    TRACING_EXPORTER = 'file'
+    TRACING_SAMPLE_RATE = 1.0
+
+
+@pytest.fixture
+def traced_app(monkeypatch, tmp_path):
+    monkeypatch.setattr(TracingConfig, 'TRACING_FILE', str(tmp_path / 'traces.jsonl'), raising=False)
+    monkeypatch.setitem(config, 'tracing-testing', TracingConfig)
+    app = create_app('tracing-testing')
+    with app.app_context():
+        yield app
+
+
+def _traces(app):
+    with open(app.config['TRACING_FILE']) as f:
+        return [json.loads(line)['resourceSpans'][0]['scopeSpans'][0]['spans'] for line in f]
+
+
+def test_register_request_is_traced(traced_app):
+    make_student('student1')
+    class_id = Class.query.filter_by(class_no=101).first().id
+    client = traced_app.test_client()
+    login(client, 'student1', 'password123')
+    # Requests share the fixture's app context; drop the user the login cached
+    g.pop('_login_user', None)
+
+    response = client.post('/student/register', data={'class_id': class_id, 'month': 3})
+
+    spans = _traces(traced_app)[-1]
+    root = spans[0]
+    assert response.headers['X-Trace-Id'] == root['traceId']
+    assert root['name'] == 'POST /student/register'
+    assert 'parentSpanId' not in root
+    names = [s['name'] for s in spans]
+    for expected in ('auth.load_user', 'RegistrationRequestForm.validate',
+                     'registration.duplicate_check', 'fees.calculate_fee', 'sql'):
+        assert expected in names
+    assert all(s['traceId'] == root['traceId'] for s in spans)
+    assert all(int(s['endTimeUnixNano']) >= int(s['startTimeUnixNano']) for s in spans)
+
+    by_id = {s['spanId']: s for s in spans}
+    duplicate_check = spans[names.index('registration.duplicate_check')]
+    assert any(s['name'] == 'sql' and s['parentSpanId'] == duplicate_check['spanId'] for s in spans)
+    assert all(by_id[s['parentSpanId']] for s in spans[1:])
+
+
+def test_render_spans_and_traceparent_sampling(traced_app):
+    client = traced_app.test_client()
+    trace_id = 'ab' * 16
+
+    client.get('/login', headers={'traceparent': f'00-{trace_id}-{"cd" * 8}-01'})
+    client.get('/login', headers={'traceparent': f'00-{"ef" * 16}-{"cd" * 8}-00'})
+
+    traces = _traces(traced_app)
+    assert len(traces) == 1
+    root = traces[0][0]
+    assert root['traceId'] == trace_id and root['parentSpanId'] == 'cd' * 8
+    assert any(s['name'] == 'render auth/login.html' for s in traces[0])
+
+
+def test_untraced_app_installs_nothing(app, client):
+    assert app.jinja_env.template_class.__name__ == 'Template'
+    assert 'X-Trace-Id' not in client.get('/login').headers